@@ -1,33 +1,138 @@
 # app/__init__.py
 from flask import Flask
 from flask_sqlalchemy import SQLAlchemy
+from flask_migrate import Migrate
 from flask_mail import Mail
 from flask_jwt_extended import JWTManager
 from flask_cors import CORS
-from dotenv import load_dotenv
 import os
+from app.engines import engine_options, tune_engine
+from app.jsonprovider import FastJSONProvider
+from app.replicas import RoutingSession, replica_binds
 
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={"class_": RoutingSession})
+migrate = Migrate(render_as_batch=True)  # Batch mode lets Alembic alter SQLite tables
 mail = Mail()
 jwt = JWTManager()
 
 def create_app():
     app = Flask(__name__)
-    load_dotenv()  # Load .env from the project root
+    app.json = FastJSONProvider(app)  # orjson, falling back to the standard library
 
     # Ensure config is set before initializing extensions
     app.config["SQLALCHEMY_DATABASE_URI"] = os.getenv("DB_URI", "sqlite:///nilotic_wallet.db")
     app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+    app.config["DB_PROFILE"] = os.getenv("DB_PROFILE", "auto")  # auto, sqlite, server or none (see app/engines.py)
+    app.config["DB_POOL_SIZE"] = int(os.getenv("DB_POOL_SIZE", 5))
+    app.config["DB_MAX_OVERFLOW"] = int(os.getenv("DB_MAX_OVERFLOW", 10))
+    app.config["DB_POOL_TIMEOUT"] = float(os.getenv("DB_POOL_TIMEOUT", 30))
+    app.config["DB_POOL_RECYCLE"] = int(os.getenv("DB_POOL_RECYCLE", 1800))
+    app.config["DB_POOL_PRE_PING"] = os.getenv("DB_POOL_PRE_PING", "True") == "True"
+    app.config["DB_SQLITE_JOURNAL_MODE"] = os.getenv("DB_SQLITE_JOURNAL_MODE", "WAL")
+    app.config["DB_SQLITE_SYNCHRONOUS"] = os.getenv("DB_SQLITE_SYNCHRONOUS", "NORMAL")
+    app.config["DB_SQLITE_BUSY_TIMEOUT"] = int(os.getenv("DB_SQLITE_BUSY_TIMEOUT", 5000))  # Milliseconds
+    app.config["DB_SQLITE_CACHE_KB"] = int(os.getenv("DB_SQLITE_CACHE_KB", 20000))
+    app.config["SQLALCHEMY_ENGINE_OPTIONS"] = engine_options(app.config["SQLALCHEMY_DATABASE_URI"], app.config)
+    # Comma-separated read replicas; only @read_only views query them
+    app.config["DB_REPLICA_URIS"] = os.getenv("DB_REPLICA_URIS", "")
+    app.config["DB_REPLICA_POOL_SIZE"] = int(os.getenv("DB_REPLICA_POOL_SIZE", 5))
+    app.config["DB_REPLICA_MAX_OVERFLOW"] = int(os.getenv("DB_REPLICA_MAX_OVERFLOW", 10))
+    app.config["DB_REPLICA_MAX_LAG"] = float(os.getenv("DB_REPLICA_MAX_LAG", 5))
+    app.config["DB_REPLICA_CHECK_INTERVAL"] = float(os.getenv("DB_REPLICA_CHECK_INTERVAL", 5))
+    app.config["DB_REPLICA_STICKY_SECONDS"] = float(os.getenv("DB_REPLICA_STICKY_SECONDS", 5))  # Reads stay on the primary after a client writes
+    app.config["SQLALCHEMY_BINDS"] = replica_binds(app.config["DB_REPLICA_URIS"], lambda uri: engine_options(uri, app.config, "DB_REPLICA_"))
     app.config["SECRET_KEY"] = os.getenv("SECRET_KEY", "your-secret-key")
+    app.config["PASSWORD_HASH_METHOD"] = os.getenv("PASSWORD_HASH_METHOD", "pbkdf2:sha256:600000")
+    app.config["PASSWORD_SALT_LENGTH"] = int(os.getenv("PASSWORD_SALT_LENGTH", 16))
+    app.config["PASSWORD_HASH_EXECUTOR"] = os.getenv("PASSWORD_HASH_EXECUTOR", "process")  # process, thread or inline
+    app.config["PASSWORD_HASH_WORKERS"] = int(os.getenv("PASSWORD_HASH_WORKERS", 2))
     app.config["APP_HOST"] = os.getenv("APP_HOST", "0.0.0.0")
     app.config["APP_PORT"] = int(os.getenv("APP_PORT", 5500))
     app.config["BASE_URL"] = os.getenv("BASE_URL", "http://localhost:5500")
     app.config["FRONTEND_URL"] = os.getenv("FRONTEND_URL", "http://localhost:5173")
     app.config["NILOTIC_API"] = os.getenv("NILOTIC_API", "http://localhost:8080")
+    app.config["NILOTIC_POOL_SIZE"] = int(os.getenv("NILOTIC_POOL_SIZE", 32))
+    app.config["NILOTIC_CONNECT_TIMEOUT"] = float(os.getenv("NILOTIC_CONNECT_TIMEOUT", 3))
+    app.config["NILOTIC_TIMEOUT"] = float(os.getenv("NILOTIC_TIMEOUT", 30))
+    app.config["NILOTIC_RETRIES"] = int(os.getenv("NILOTIC_RETRIES", 2))
+    app.config["NILOTIC_BACKOFF"] = float(os.getenv("NILOTIC_BACKOFF", 0.3))
+    app.config["NILOTIC_READ_TIMEOUT"] = float(os.getenv("NILOTIC_READ_TIMEOUT", 3))  # Balance reads that can fall back to the DB
+    app.config["NILOTIC_BREAKER_ENABLED"] = os.getenv("NILOTIC_BREAKER_ENABLED", "True") == "True"
+    app.config["NILOTIC_BREAKER_WINDOW"] = int(os.getenv("NILOTIC_BREAKER_WINDOW", 20))
+    app.config["NILOTIC_BREAKER_MIN_CALLS"] = int(os.getenv("NILOTIC_BREAKER_MIN_CALLS", 10))
+    app.config["NILOTIC_BREAKER_FAILURE_RATE"] = float(os.getenv("NILOTIC_BREAKER_FAILURE_RATE", 0.5))
+    app.config["NILOTIC_BREAKER_SLOW_CALL"] = float(os.getenv("NILOTIC_BREAKER_SLOW_CALL", 10))
+    app.config["NILOTIC_BREAKER_OPEN_SECONDS"] = float(os.getenv("NILOTIC_BREAKER_OPEN_SECONDS", 30))
+    app.config["NILOTIC_BREAKER_HALF_OPEN_CALLS"] = int(os.getenv("NILOTIC_BREAKER_HALF_OPEN_CALLS", 1))
     app.config["JWT_SECRET_KEY"] = os.getenv("JWT_SECRET_KEY", app.config["SECRET_KEY"])
     app.config["SIMULATE_MINING"] = os.getenv("SIMULATE_MINING", "True") == "True"
     app.config["CORS_ORIGIN_URL"] = os.getenv("CORS_ORIGIN_URL", "http://localhost:5173")
 
+    app.config["BALANCE_CACHE_TTL"] = float(os.getenv("BALANCE_CACHE_TTL", 5))
+    app.config["BALANCE_CACHE_STALE_TTL"] = float(os.getenv("BALANCE_CACHE_STALE_TTL", 60))
+    app.config["BALANCE_CACHE_SIZE"] = int(os.getenv("BALANCE_CACHE_SIZE", 10000))
+    app.config["BALANCE_CACHE_REFRESH_WORKERS"] = int(os.getenv("BALANCE_CACHE_REFRESH_WORKERS", 4))
+    app.config["PRINCIPAL_CACHE_TTL"] = float(os.getenv("PRINCIPAL_CACHE_TTL", 30))
+    app.config["PRINCIPAL_CACHE_SIZE"] = int(os.getenv("PRINCIPAL_CACHE_SIZE", 10000))
+
+    app.config["TRANSFER_BATCH_MAX_ROWS"] = int(os.getenv("TRANSFER_BATCH_MAX_ROWS", 5000))
+    app.config["TRANSFER_BATCH_SUBMIT_SIZE"] = int(os.getenv("TRANSFER_BATCH_SUBMIT_SIZE", 100))
+    app.config["TRANSFER_BATCH_WORKERS"] = int(os.getenv("TRANSFER_BATCH_WORKERS", 8))
+
+    app.config["RATELIMIT_ENABLED"] = os.getenv("RATELIMIT_ENABLED", "True") == "True"
+    app.config["RATELIMIT_STORAGE_URL"] = os.getenv("RATELIMIT_STORAGE_URL", "memory")  # memory (per process) or redis://...
+    app.config["RATELIMIT_LOGIN_PER_IP"] = os.getenv("RATELIMIT_LOGIN_PER_IP", "30/minute")
+    app.config["RATELIMIT_LOGIN_PER_EMAIL"] = os.getenv("RATELIMIT_LOGIN_PER_EMAIL", "5/minute")
+    app.config["RATELIMIT_REGISTER_PER_IP"] = os.getenv("RATELIMIT_REGISTER_PER_IP", "10/hour")
+    app.config["RATELIMIT_REGISTER_PER_EMAIL"] = os.getenv("RATELIMIT_REGISTER_PER_EMAIL", "3/hour")
+    app.config["RATELIMIT_FORGOT_PASSWORD_PER_IP"] = os.getenv("RATELIMIT_FORGOT_PASSWORD_PER_IP", "10/hour")
+    app.config["RATELIMIT_FORGOT_PASSWORD_PER_EMAIL"] = os.getenv("RATELIMIT_FORGOT_PASSWORD_PER_EMAIL", "3/hour")
+    app.config["RATELIMIT_RESET_PASSWORD_PER_IP"] = os.getenv("RATELIMIT_RESET_PASSWORD_PER_IP", "10/minute")
+    app.config["RATELIMIT_RESEND_VERIFICATION_PER_IP"] = os.getenv("RATELIMIT_RESEND_VERIFICATION_PER_IP", "10/hour")
+    app.config["RATELIMIT_RESEND_VERIFICATION_PER_EMAIL"] = os.getenv("RATELIMIT_RESEND_VERIFICATION_PER_EMAIL", "3/hour")
+    app.config["RATELIMIT_CLAIM_ESCROW_PER_IP"] = os.getenv("RATELIMIT_CLAIM_ESCROW_PER_IP", "20/minute")
+    app.config["RATELIMIT_CLAIM_ESCROW_PER_EMAIL"] = os.getenv("RATELIMIT_CLAIM_ESCROW_PER_EMAIL", "5/minute")  # OTPs are six digits
+    app.config["METRICS_ENABLED"] = os.getenv("METRICS_ENABLED", "True") == "True"
+    # Trusted proxies in front of the app, for the client IP the per-IP rate limits
+    # key on. Left at 0 behind a proxy, every client shares the proxy's bucket. An
+    # app bound to loopback is only reachable through a local proxy, so trust one.
+    loopback = app.config["APP_HOST"] in ("127.0.0.1", "localhost", "::1")
+    app.config["PROXY_FIX_X_FOR"] = int(os.getenv("PROXY_FIX_X_FOR", 1 if loopback else 0))
+
+    app.config["KYC_STORAGE_DIR"] = os.getenv("KYC_STORAGE_DIR", "kyc_photos")
+    app.config["KYC_MAX_UPLOAD_BYTES"] = int(os.getenv("KYC_MAX_UPLOAD_BYTES", 5 * 1024 * 1024))
+    app.config["KYC_THUMBNAIL_SIZE"] = int(os.getenv("KYC_THUMBNAIL_SIZE", 256))  # Needs Pillow
+    app.config["KYC_WORKERS"] = int(os.getenv("KYC_WORKERS", 1))  # 0 = process only via `flask cli process-kyc`
+    app.config["KYC_BATCH_SIZE"] = int(os.getenv("KYC_BATCH_SIZE", 20))
+    app.config["KYC_POLL_INTERVAL"] = float(os.getenv("KYC_POLL_INTERVAL", 30))
+    # Rejects oversized request bodies from Content-Length before any of it is read
+    app.config["MAX_CONTENT_LENGTH"] = int(os.getenv("MAX_CONTENT_LENGTH", app.config["KYC_MAX_UPLOAD_BYTES"] + 1024 * 1024))
+
+    app.config["MINING_WORKERS"] = int(os.getenv("MINING_WORKERS", 2))  # 0 = run jobs only via `flask cli run-mining-jobs`
+    app.config["MINING_POLL_INTERVAL"] = float(os.getenv("MINING_POLL_INTERVAL", 5))
+    app.config["MINING_JOB_LEASE"] = float(os.getenv("MINING_JOB_LEASE", 120))  # Seconds before a stuck Running job is retried
+    app.config["MINING_JOB_MAX_ATTEMPTS"] = int(os.getenv("MINING_JOB_MAX_ATTEMPTS", 3))  # Leases before a job that keeps erroring is failed
+
+    app.config["NODE_WEBHOOK_SECRET"] = os.getenv("NODE_WEBHOOK_SECRET", "")  # Empty disables POST /node/events
+    app.config["NODE_WEBHOOK_MAX_EVENTS"] = int(os.getenv("NODE_WEBHOOK_MAX_EVENTS", 1000))
+    app.config["NODE_EVENTS_DEFER_SECONDS"] = float(os.getenv("NODE_EVENTS_DEFER_SECONDS", 120))  # Longest a node call in flight holds back events
+    app.config["EVENTS_BROKER_URL"] = os.getenv("EVENTS_BROKER_URL", "memory")  # memory (per process) or redis://...
+    app.config["SSE_HEARTBEAT"] = float(os.getenv("SSE_HEARTBEAT", 15))
+    app.config["SSE_MAX_SECONDS"] = float(os.getenv("SSE_MAX_SECONDS", 300))
+    app.config["SSE_RETRY_MS"] = int(os.getenv("SSE_RETRY_MS", 3000))
+    app.config["SSE_QUEUE_SIZE"] = int(os.getenv("SSE_QUEUE_SIZE", 100))
+    app.config["SSE_TOKEN_SECONDS"] = int(os.getenv("SSE_TOKEN_SECONDS", 60))  # Lifetime of the ?jwt= stream token
+
+    app.config["LEDGER_PAGE_MAX"] = int(os.getenv("LEDGER_PAGE_MAX", 100))
+
+    app.config["ESCROW_SWEEP_INTERVAL"] = float(os.getenv("ESCROW_SWEEP_INTERVAL", 0))  # Seconds; 0 disables the background sweep
+    app.config["ESCROW_SWEEP_CHUNK_SIZE"] = int(os.getenv("ESCROW_SWEEP_CHUNK_SIZE", 500))
+    app.config["ESCROW_CLAIM_MAX_ROWS"] = int(os.getenv("ESCROW_CLAIM_MAX_ROWS", 1000))  # Per claim-all request; the rest wait for the next
+
+    app.config["SYNC_CHUNK_SIZE"] = int(os.getenv("SYNC_CHUNK_SIZE", 500))
+    app.config["SYNC_WORKERS"] = int(os.getenv("SYNC_WORKERS", 16))
+    app.config["SYNC_TIMEOUT"] = float(os.getenv("SYNC_TIMEOUT", 10))
+
     app.config["MAIL_SERVER"] = os.getenv("MAIL_SERVER", "localhost")
     app.config["MAIL_PORT"] = int(os.getenv("MAIL_PORT", 1025))
     app.config["MAIL_USE_TLS"] = os.getenv("MAIL_USE_TLS", "False") == "True"
@@ -35,23 +140,86 @@ def create_app():
     app.config["MAIL_USERNAME"] = os.getenv("MAIL_USERNAME")
     app.config["MAIL_PASSWORD"] = os.getenv("MAIL_PASSWORD")
     app.config["MAIL_DEFAULT_SENDER"] = os.getenv("MAIL_DEFAULT_SENDER", "no-reply@niloticwallet.com")
+    app.config["MAIL_QUEUE_WORKERS"] = int(os.getenv("MAIL_QUEUE_WORKERS", 1))  # 0 = deliver only via `flask cli deliver-emails`
+    app.config["MAIL_QUEUE_BATCH_SIZE"] = int(os.getenv("MAIL_QUEUE_BATCH_SIZE", 50))
+    app.config["MAIL_QUEUE_POLL_INTERVAL"] = float(os.getenv("MAIL_QUEUE_POLL_INTERVAL", 5))
+    app.config["MAIL_QUEUE_MAX_ATTEMPTS"] = int(os.getenv("MAIL_QUEUE_MAX_ATTEMPTS", 5))
+    app.config["MAIL_QUEUE_RETRY_DELAY"] = float(os.getenv("MAIL_QUEUE_RETRY_DELAY", 30))
+    app.config["MAIL_QUEUE_LEASE"] = float(os.getenv("MAIL_QUEUE_LEASE", 300))
 
     # Initialize extensions after config is set
     db.init_app(app)
+    with app.app_context():
+        for engine in db.engines.values():  # Created here, connected on first use
+            tune_engine(engine, app.config)
+    migrate.init_app(app, db)
     mail.init_app(app)
     jwt.init_app(app)
 
-    # Import all models to register them with SQLAlchemy
-    from app.models.user import User
-    from app.models.wallet import Wallet
-    from app.models.kyc import KYC  # Ensure KYC is imported
+    from app import replicas
+    replicas.router.configure(
+        app.config["SQLALCHEMY_BINDS"],
+        app.config["DB_REPLICA_MAX_LAG"],
+        app.config["DB_REPLICA_CHECK_INTERVAL"],
+        app.config["DB_REPLICA_STICKY_SECONDS"],
+    )
+    replicas.init_app(app)
+
+    from app.email import email_worker
+    email_worker.init_app(app, app.config["MAIL_QUEUE_WORKERS"], app.config["MAIL_QUEUE_POLL_INTERVAL"])
+
+    from app.ratelimit import limiter, make_store
+    limiter.configure(app.config["RATELIMIT_ENABLED"], make_store(app.config["RATELIMIT_STORAGE_URL"]))
+    if app.config["PROXY_FIX_X_FOR"]:
+        from werkzeug.middleware.proxy_fix import ProxyFix
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=app.config["PROXY_FIX_X_FOR"])
+
+    from app.events import event_broker, make_transport
+    event_broker.configure(make_transport(app.config["EVENTS_BROKER_URL"]), app.config["SSE_QUEUE_SIZE"])
+
+    from app.storage import kyc_store, StreamingRequest
+    kyc_store.configure(app.config["KYC_STORAGE_DIR"], app.config["KYC_MAX_UPLOAD_BYTES"])
+    app.request_class = StreamingRequest
+
+    from app.kyc import kyc_worker
+    kyc_worker.init_app(app, app.config["KYC_WORKERS"], app.config["KYC_POLL_INTERVAL"])
+
+    from app.mining import mining_worker
+    mining_worker.init_app(app, app.config["MINING_WORKERS"], app.config["MINING_POLL_INTERVAL"])
+
+    from app.sweeper import escrow_sweeper
+    sweep_interval = app.config["ESCROW_SWEEP_INTERVAL"]
+    escrow_sweeper.init_app(app, 1 if sweep_interval > 0 else 0, sweep_interval)
+
+    from app.passwords import password_hasher
+    password_hasher.configure(
+        app.config["PASSWORD_HASH_METHOD"],
+        app.config["PASSWORD_SALT_LENGTH"],
+        app.config["PASSWORD_HASH_EXECUTOR"],
+        app.config["PASSWORD_HASH_WORKERS"],
+    )
+
+    from app.cache import balance_cache
+    balance_cache.configure(
+        app.config["BALANCE_CACHE_TTL"],
+        app.config["BALANCE_CACHE_STALE_TTL"],
+        app.config["BALANCE_CACHE_SIZE"],
+        app.config["BALANCE_CACHE_REFRESH_WORKERS"],
+    )
+
+    # Importing app.principal also registers its cache invalidation listeners.
+    from app.principal import principal_cache
+    principal_cache.configure(app.config["PRINCIPAL_CACHE_TTL"], app.config["PRINCIPAL_CACHE_SIZE"])
 
     from app.routes.auth import auth_bp
     from app.routes.wallet import wallet_bp
     from app.routes.transaction import transaction_bp
     from app.routes.mining import mining_bp
+    from app.routes.escrow import escrow_bp
+    from app.routes.node import node_bp
+    from app.routes.health import health_bp
+    from app.routes.metrics import metrics_bp
     from app.cli import cli_bp
-    # from app.routes.escrow import escrow_bp  # Uncomment if exists
 
     # Enable CORS using CORS_ORIGIN_URL from config
     CORS(app, resources={r"/*": {"origins": app.config["CORS_ORIGIN_URL"]}})
@@ -60,10 +228,13 @@ def create_app():
     app.register_blueprint(wallet_bp, url_prefix="/wallet")
     app.register_blueprint(transaction_bp, url_prefix="/transaction")
     app.register_blueprint(mining_bp, url_prefix="/mining")
+    app.register_blueprint(escrow_bp, url_prefix="/escrow")
+    app.register_blueprint(node_bp, url_prefix="/node")
+    app.register_blueprint(health_bp)
+    if app.config["METRICS_ENABLED"]:
+        from app import metrics
+        metrics.init_app(app)
+        app.register_blueprint(metrics_bp)
     app.register_blueprint(cli_bp)
 
-    # Create all tables within app context
-    with app.app_context():
-        db.create_all()
-
     return app
\ No newline at end of file
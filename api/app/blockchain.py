@@ -0,0 +1,240 @@
+import os
+import threading
+import time
+from collections import deque
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from flask import current_app
+from app import metrics
+
+# One pooled, keep-alive session per process. Rebuilt after a fork so that
+# workers never share sockets with their parent.
+_session = None
+_session_pid = None
+_session_lock = threading.Lock()
+
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS"})
+
+CLOSED, HALF_OPEN, OPEN = "closed", "half_open", "open"
+
+
+class CircuitOpen(requests.ConnectionError):
+    """Raised instead of calling an endpoint whose circuit is open.
+
+    A ``requests.RequestException``, so every caller that already handles
+    an unreachable node handles this too, just without the wait.
+    """
+
+
+class CircuitBreaker:
+    """Failure-rate circuit breaker for one node endpoint.
+
+    Outcomes of the last ``window`` calls are kept; once at least
+    ``min_calls`` are recorded and the failed share reaches
+    ``failure_rate``, the circuit opens and calls fail fast for
+    ``open_seconds``. Then up to ``half_open_calls`` probes go through:
+    all succeeding closes the circuit, any failing opens it again.
+    Connection errors, timeouts, 5xx responses and calls slower than
+    ``slow_call`` seconds count as failures. State is per process.
+    """
+
+    def __init__(self, endpoint, window=20, min_calls=10, failure_rate=0.5, slow_call=10.0, open_seconds=30.0, half_open_calls=1):
+        self.endpoint = endpoint
+        self.min_calls = min_calls
+        self.failure_rate = failure_rate
+        self.slow_call = slow_call
+        self.open_seconds = open_seconds
+        self.half_open_calls = half_open_calls
+        self.state = CLOSED
+        self.rejected = 0
+        self._outcomes = deque(maxlen=window)
+        self._opened_at = 0.0
+        self._probes = 0
+        self._probe_successes = 0
+        self._lock = threading.Lock()
+
+    def before_call(self):
+        """Raise CircuitOpen unless a call may go to the node now."""
+        with self._lock:
+            if self.state == OPEN and time.monotonic() - self._opened_at >= self.open_seconds:
+                self._transition(HALF_OPEN)
+            if self.state == CLOSED:
+                return
+            if self.state == HALF_OPEN and self._probes < self.half_open_calls:
+                self._probes += 1
+                return
+            self.rejected += 1
+            state = self.state
+        metrics.observe_circuit_rejected(self.endpoint)
+        raise CircuitOpen(f"NILOTIC_API {self.endpoint} is unavailable (circuit {state})")
+
+    def record(self, ok, seconds=0.0):
+        ok = ok and seconds < self.slow_call
+        with self._lock:
+            if self.state == HALF_OPEN:
+                if not ok:
+                    self._transition(OPEN)
+                else:
+                    self._probe_successes += 1
+                    if self._probe_successes >= self.half_open_calls:
+                        self._transition(CLOSED)
+            elif self.state == CLOSED:
+                self._outcomes.append(ok)
+                failures = self._outcomes.count(False)
+                if len(self._outcomes) >= self.min_calls and failures / len(self._outcomes) >= self.failure_rate:
+                    self._transition(OPEN)
+            # Calls that started before the circuit opened are ignored
+
+    def _transition(self, state):
+        print(f"NILOTIC_API {self.endpoint} circuit: {self.state} -> {state}")
+        self.state = state
+        self._outcomes.clear()
+        self._probes = 0
+        self._probe_successes = 0
+        if state == OPEN:
+            self._opened_at = time.monotonic()
+        metrics.observe_circuit_state(self.endpoint, state)
+
+    def is_open(self):
+        with self._lock:
+            return self.state == OPEN and time.monotonic() - self._opened_at < self.open_seconds
+
+    def snapshot(self):
+        with self._lock:
+            calls = len(self._outcomes)
+            snapshot = {
+                "state": self.state,
+                "calls": calls,
+                "failure_rate": round(self._outcomes.count(False) / calls, 3) if calls else 0.0,
+                "rejected": self.rejected,
+            }
+            if self.state == OPEN:
+                snapshot["retry_in"] = round(max(0.0, self.open_seconds - (time.monotonic() - self._opened_at)), 1)
+            return snapshot
+
+
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+
+def get_breaker(endpoint):
+    """Return the circuit breaker for a node endpoint (e.g. "/balance"), or None when disabled."""
+    config = current_app.config
+    if not config["NILOTIC_BREAKER_ENABLED"]:
+        return None
+    breaker = _breakers.get(endpoint)
+    if breaker is None:
+        with _breakers_lock:
+            breaker = _breakers.get(endpoint)
+            if breaker is None:
+                breaker = _breakers[endpoint] = CircuitBreaker(
+                    endpoint,
+                    window=config["NILOTIC_BREAKER_WINDOW"],
+                    min_calls=config["NILOTIC_BREAKER_MIN_CALLS"],
+                    failure_rate=config["NILOTIC_BREAKER_FAILURE_RATE"],
+                    slow_call=config["NILOTIC_BREAKER_SLOW_CALL"],
+                    open_seconds=config["NILOTIC_BREAKER_OPEN_SECONDS"],
+                    half_open_calls=config["NILOTIC_BREAKER_HALF_OPEN_CALLS"],
+                )
+    return breaker
+
+
+def is_available(path):
+    """False while the circuit for ``path``'s endpoint is open, so read paths can skip the node."""
+    breaker = get_breaker(metrics.node_endpoint(path))
+    return breaker is None or not breaker.is_open()
+
+
+def circuit_states():
+    """Snapshot of every endpoint's breaker in this process, for health output."""
+    return {endpoint: breaker.snapshot() for endpoint, breaker in sorted(_breakers.items())}
+
+
+def _build_session(config):
+    retry = Retry(
+        total=config["NILOTIC_RETRIES"],
+        backoff_factor=config["NILOTIC_BACKOFF"],
+        status_forcelist=(502, 503, 504),
+        allowed_methods=IDEMPOTENT_METHODS,  # Never replay a POST that may have reached the node
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(
+        pool_connections=1,
+        pool_maxsize=config["NILOTIC_POOL_SIZE"],
+        max_retries=retry,
+    )
+    session = requests.Session()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def get_session():
+    """Return the process-wide session for NILOTIC_API, creating it on first use."""
+    global _session, _session_pid
+    pid = os.getpid()
+    if _session is None or _session_pid != pid:
+        with _session_lock:
+            if _session is None or _session_pid != pid:
+                _session = _build_session(current_app.config)
+                _session_pid = pid
+    return _session
+
+
+def close_session():
+    global _session, _session_pid
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+        _session = None
+        _session_pid = None
+
+
+def request(method, path, timeout=None, **kwargs):
+    """Send a request to NILOTIC_API through the pooled session.
+
+    ``path`` is relative to NILOTIC_API (e.g. "/balance"). Raises
+    ``requests.RequestException`` on connection errors and timeouts, and
+    ``CircuitOpen`` (also a RequestException) without calling the node while
+    the endpoint's circuit is open; callers decide whether to
+    ``raise_for_status``.
+    """
+    config = current_app.config
+    if timeout is None:
+        timeout = (config["NILOTIC_CONNECT_TIMEOUT"], config["NILOTIC_TIMEOUT"])
+    url = f"{config['NILOTIC_API']}{path}"
+    breaker = get_breaker(metrics.node_endpoint(path))
+    if breaker is not None:
+        breaker.before_call()
+    started = time.perf_counter()
+    try:
+        response = get_session().request(method, url, timeout=timeout, **kwargs)
+    except Exception as e:
+        elapsed = time.perf_counter() - started
+        metrics.observe_node(path, method, elapsed, error=e)
+        if breaker is not None:
+            breaker.record(False, elapsed)
+        raise
+    elapsed = time.perf_counter() - started
+    metrics.observe_node(path, method, elapsed, response.status_code)
+    if breaker is not None:
+        breaker.record(response.status_code < 500, elapsed)
+    return response
+
+
+def get(path, **kwargs):
+    return request("GET", path, **kwargs)
+
+
+def post(path, **kwargs):
+    return request("POST", path, **kwargs)
+
+
+def get_balance(address, timeout=None):
+    """Return (balance, stake) for ``address`` as reported by the node."""
+    response = get("/balance", params={"address": address}, timeout=timeout)
+    response.raise_for_status()
+    balance_data = response.json()
+    return float(balance_data.get("balance", 0.0)), float(balance_data.get("stake", 0.0))
@@ -0,0 +1,123 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+
+class BalanceCache:
+    """In-process TTL + LRU cache of blockchain balances keyed by wallet address.
+
+    Entries younger than ``ttl`` are fresh. Entries older than that but younger
+    than ``stale_ttl`` are served as-is while a background refresh runs
+    (stale-while-revalidate). The cache is per process, so write paths only
+    invalidate locally; ``ttl`` bounds how stale another worker can be.
+    """
+
+    def __init__(self, ttl=5.0, stale_ttl=60.0, max_size=10000, refresh_workers=4):
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._refreshing = set()
+        self._refreshed_at = {}
+        self._executor = None
+        self._executor_pid = None
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.configure(ttl, stale_ttl, max_size, refresh_workers)
+
+    def configure(self, ttl, stale_ttl, max_size, refresh_workers=4):
+        self.ttl = ttl
+        self.stale_ttl = max(stale_ttl, ttl)
+        self.max_size = max_size
+        self.refresh_workers = refresh_workers
+
+    def get(self, address):
+        """Return ``(entry, state)`` where state is "fresh", "stale" or None on a miss."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(address)
+            if entry is not None:
+                age = now - entry["cached_at"]
+                if age < self.ttl:
+                    self._entries.move_to_end(address)
+                    self.hits += 1
+                    return entry, "fresh"
+                if age < self.stale_ttl:
+                    self._entries.move_to_end(address)
+                    self.stale_hits += 1
+                    return entry, "stale"
+                del self._entries[address]
+            self.misses += 1
+            return None, None
+
+    def set(self, address, balance, stake):
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            self._entries[address] = {"balance": balance, "stake": stake, "cached_at": time.monotonic()}
+            self._entries.move_to_end(address)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, *addresses):
+        with self._lock:
+            for address in addresses:
+                self._entries.pop(address, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._refreshed_at.clear()
+
+    def refresh_async(self, app, address, refresh):
+        """Run ``refresh(address)`` in the background.
+
+        Skipped while one is in flight or if the last one for ``address``
+        started less than ``ttl`` ago, so a failing node is not asked again
+        on every poll.
+        """
+        now = time.monotonic()
+        with self._lock:
+            if address in self._refreshing or now - self._refreshed_at.get(address, -self.ttl) < self.ttl:
+                return
+            self._refreshing.add(address)
+            self._refreshed_at[address] = now
+            if len(self._refreshed_at) > max(self.max_size, 1):
+                self._refreshed_at = {a: t for a, t in self._refreshed_at.items() if now - t < self.ttl}
+            if self._executor is None or self._executor_pid != os.getpid():
+                # Executor threads do not survive a fork; start fresh in each worker
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.refresh_workers, thread_name_prefix="balance-refresh"
+                )
+                self._executor_pid = os.getpid()
+
+        def run():
+            try:
+                with app.app_context():
+                    refresh(address)
+            finally:
+                with self._lock:
+                    self._refreshing.discard(address)
+
+        self._executor.submit(run)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.stale_hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "ttl": self.ttl,
+                "stale_ttl": self.stale_ttl,
+                "hits": self.hits,
+                "stale_hits": self.stale_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_ratio": (self.hits + self.stale_hits) / lookups if lookups else 0.0,
+            }
+
+
+balance_cache = BalanceCache()
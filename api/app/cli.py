@@ -1,23 +1,85 @@
+import click
 from flask import Blueprint
-from app import db
-from app.models.wallet import Wallet
-from app.utils import sync_wallet_with_blockchain
+from app.sync import sync_all_wallets
+from app.email import deliver_queued_emails
+from app.sweeper import sweep_expired_escrows
+from app.kyc import process_pending_kyc
+from app.mining import run_mining_jobs
 
 cli_bp = Blueprint("cli", __name__)
 
 @cli_bp.cli.command("sync-blockchain")
-def sync_blockchain():
+@click.option("--chunk-size", type=int, default=None, help="Wallets per keyset page (default: SYNC_CHUNK_SIZE).")
+@click.option("--workers", type=int, default=None, help="Concurrent balance lookups (default: SYNC_WORKERS).")
+def sync_blockchain(chunk_size, workers):
     """Sync all wallet balances and stakes with the blockchain."""
-    wallets = Wallet.query.all()
-    if not wallets:
+    summary = sync_all_wallets(chunk_size=chunk_size, workers=workers)
+    if not summary["total"]:
         print("No wallets found to sync.")
         return
 
-    success_count = 0
-    for wallet in wallets:
-        if sync_wallet_with_blockchain(wallet.address):
-            success_count += 1
-        else:
-            print(f"Failed to sync wallet {wallet.address}")
+    print(
+        f"Successfully synced {summary['synced']} out of {summary['total']} wallets "
+        f"({summary['updated']} updated, {summary['failed']} failed) "
+        f"in {summary['elapsed']:.2f}s, {summary['rate']:.1f} wallets/s."
+    )
 
-    print(f"Successfully synced {success_count} out of {len(wallets)} wallets.")
\ No newline at end of file
+
+@cli_bp.cli.command("deliver-emails")
+@click.option("--batch-size", type=int, default=None, help="Emails per SMTP connection (default: MAIL_QUEUE_BATCH_SIZE).")
+def deliver_emails(batch_size):
+    """Send every queued email that is due, then exit."""
+    total = 0
+    while True:
+        attempted = deliver_queued_emails(batch_size)
+        if not attempted:
+            break
+        total += attempted
+    print(f"Attempted delivery of {total} queued emails.")
+
+
+@cli_bp.cli.command("sweep-escrows")
+@click.option("--chunk-size", type=int, default=None, help="Escrows per chunk (default: ESCROW_SWEEP_CHUNK_SIZE).")
+def sweep_escrows(chunk_size):
+    """Expire overdue pending escrows and refund their senders."""
+    report = sweep_expired_escrows(chunk_size)
+    for i, chunk in enumerate(report["chunks"], start=1):
+        print(f"Chunk {i}: {chunk['rows']} escrows, {chunk['senders']} senders refunded {chunk['amount']} SLW in {chunk['seconds']}s")
+    print(f"Expired {report['processed']} escrows, refunded {report['refunded']} SLW in {report['seconds']}s.")
+
+
+@cli_bp.cli.command("process-kyc")
+@click.option("--batch-size", type=int, default=None, help="Photos per batch (default: KYC_BATCH_SIZE).")
+def process_kyc(batch_size):
+    """Validate and thumbnail every pending KYC photo, then exit."""
+    total = 0
+    while True:
+        processed = process_pending_kyc(batch_size)
+        if not processed:
+            break
+        total += processed
+    print(f"Processed {total} pending KYC submissions.")
+
+
+@cli_bp.cli.command("run-mining-jobs")
+def run_mining_jobs_command():
+    """Run every queued mining job, then exit."""
+    total = 0
+    while run_mining_jobs():
+        total += 1
+    print(f"Ran {total} mining jobs.")
+
+
+@cli_bp.cli.command("replica-status")
+def replica_status():
+    """Check every read replica's reachability and replication lag."""
+    from app import db
+    from app.replicas import router
+    if not router.keys:
+        print("No read replicas configured (DB_REPLICA_URIS).")
+        return
+    for key in router.keys:
+        status = router.check(key, db.engines[key])
+        state = "ok" if status["ok"] and status["lag"] <= router.max_lag else "skipped"
+        lag = "unreachable" if status["lag"] is None else f"{status['lag']:.1f}s behind"
+        print(f"{key} ({db.engines[key].url.render_as_string(hide_password=True)}): {lag}, {state}")
@@ -1,11 +1,104 @@
+import time
+import uuid
+from datetime import datetime, timedelta
+from flask import current_app
 from flask_mail import Message
-from app import mail
+from app import db, mail, metrics
+from app.models.outbound_email import OutboundEmail
+from app.workers import BackgroundWorker
+
+def queue_email(to, subject, body):
+    """Add an email to the outbound queue in the current transaction.
+
+    Nothing is sent until the caller commits; call ``email_worker.wake()``
+    afterwards to have it delivered right away instead of on the next poll.
+    """
+    email = OutboundEmail(recipient=to, subject=subject, body=body)
+    db.session.add(email)
+    return email
 
 def send_email(to, subject, body):
-    msg = Message(subject, recipients=[to], body=body)
+    """Queue an email, commit it and wake the delivery worker."""
+    queue_email(to, subject, body)
+    db.session.commit()
+    email_worker.wake()
+    print(f"Email to {to} queued for delivery")
+
+def _record_failure(email, error, now):
+    config = current_app.config
+    email.last_error = str(error)[:500]
+    email.claim_token = None
+    if email.attempts >= config["MAIL_QUEUE_MAX_ATTEMPTS"]:
+        email.status = "Dead"
+        print(f"Giving up on email {email.id} to {email.recipient}: {error}")
+    else:
+        delay = config["MAIL_QUEUE_RETRY_DELAY"] * 2 ** (email.attempts - 1)
+        email.next_attempt_at = now + timedelta(seconds=delay)
+        print(f"Failed to send email to {email.recipient} (attempt {email.attempts}): {error}")
+
+def deliver_queued_emails(batch_size=None):
+    """Lease one batch of due emails and send it over a single SMTP connection.
+
+    Rows are leased by stamping a claim token and pushing ``next_attempt_at``
+    forward, so concurrent workers never send the same message and rows held
+    by a crashed worker become due again once the lease runs out. Returns the
+    number of emails attempted.
+    """
+    config = current_app.config
+    batch_size = batch_size or config["MAIL_QUEUE_BATCH_SIZE"]
+    now = datetime.utcnow()
+    token = uuid.uuid4().hex
+
+    due_ids = [
+        row.id for row in db.session.query(OutboundEmail.id)
+        .filter(OutboundEmail.status == "Pending", OutboundEmail.next_attempt_at <= now)
+        .order_by(OutboundEmail.next_attempt_at, OutboundEmail.id)
+        .limit(batch_size)
+    ]
+    if not due_ids:
+        db.session.rollback()
+        return 0
+
+    db.session.query(OutboundEmail).filter(
+        OutboundEmail.id.in_(due_ids),
+        OutboundEmail.status == "Pending",
+        OutboundEmail.next_attempt_at <= now,
+    ).update({
+        OutboundEmail.claim_token: token,
+        OutboundEmail.attempts: OutboundEmail.attempts + 1,
+        OutboundEmail.next_attempt_at: now + timedelta(seconds=config["MAIL_QUEUE_LEASE"]),
+    }, synchronize_session=False)
+    db.session.commit()
+
+    batch = OutboundEmail.query.filter_by(claim_token=token).order_by(OutboundEmail.id).all()
+    pending = list(batch)
+    connected = False
+    started = time.perf_counter()
     try:
-        mail.send(msg)
-        print(f"Email sent to {to} via SMTP")
+        with mail.connect() as connection:
+            metrics.observe_smtp(time.perf_counter() - started, True, connect=True)
+            connected = True
+            while pending:
+                email = pending[0]
+                started = time.perf_counter()
+                try:
+                    connection.send(Message(email.subject, recipients=[email.recipient], body=email.body))
+                    metrics.observe_smtp(time.perf_counter() - started, True)
+                    email.status = "Sent"
+                    email.sent_at = datetime.utcnow()
+                    email.claim_token = None
+                    print(f"Email sent to {email.recipient} via SMTP")
+                except Exception as e:
+                    metrics.observe_smtp(time.perf_counter() - started, False)
+                    _record_failure(email, e, datetime.utcnow())
+                pending.pop(0)
     except Exception as e:
-        print(f"Failed to send email to {to}: {e}")
-        raise  # Re-raise the exception to propagate the error
\ No newline at end of file
+        if not connected:
+            metrics.observe_smtp(time.perf_counter() - started, False, connect=True)
+        # Connecting (or the connection itself) failed; retry what is left later
+        for email in pending:
+            _record_failure(email, e, datetime.utcnow())
+    db.session.commit()
+    return len(batch)
+
+email_worker = BackgroundWorker("email", deliver_queued_emails)
@@ -0,0 +1,70 @@
+from sqlalchemy import event
+
+# DB_PROFILE picks how engines are tuned:
+#   auto    sqlite for sqlite:// URIs, server for everything else
+#   sqlite  WAL journal, synchronous=NORMAL, busy_timeout and cache size on connect
+#   server  QueuePool sizing, timeout, recycle and pre-ping
+#   none    SQLAlchemy's defaults
+PROFILES = ("auto", "sqlite", "server", "none")
+
+
+def resolve_profile(uri, profile):
+    if profile not in PROFILES:
+        raise ValueError(f"Unsupported DB_PROFILE: {profile}")
+    if profile == "auto":
+        return "sqlite" if uri.startswith("sqlite") else "server"
+    return profile
+
+
+def _is_memory(uri):
+    return uri in ("sqlite://", "sqlite:///:memory:") or "mode=memory" in uri
+
+
+def engine_options(uri, config, prefix="DB_"):
+    """Engine options for ``uri`` under DB_PROFILE.
+
+    Pool size and overflow come from ``<prefix>POOL_SIZE`` and
+    ``<prefix>MAX_OVERFLOW`` so replicas can be sized apart from the
+    primary; the other pool settings are shared.
+    """
+    profile = resolve_profile(uri, config["DB_PROFILE"])
+    if profile == "server" and not uri.startswith("sqlite"):
+        return {
+            "pool_size": config[f"{prefix}POOL_SIZE"],
+            "max_overflow": config[f"{prefix}MAX_OVERFLOW"],
+            "pool_timeout": config["DB_POOL_TIMEOUT"],
+            "pool_recycle": config["DB_POOL_RECYCLE"],
+            "pool_pre_ping": config["DB_POOL_PRE_PING"],
+        }
+    if profile == "sqlite" and uri.startswith("sqlite"):
+        # The driver's own lock wait, in seconds, matching busy_timeout
+        return {"connect_args": {"timeout": config["DB_SQLITE_BUSY_TIMEOUT"] / 1000}}
+    return {}
+
+
+def sqlite_pragmas(config, memory=False):
+    pragmas = {
+        "busy_timeout": config["DB_SQLITE_BUSY_TIMEOUT"],
+        "synchronous": config["DB_SQLITE_SYNCHRONOUS"],
+        "cache_size": -config["DB_SQLITE_CACHE_KB"],  # Negative means KiB rather than pages
+    }
+    if not memory:
+        pragmas = {"journal_mode": config["DB_SQLITE_JOURNAL_MODE"], **pragmas}
+    return pragmas
+
+
+def tune_engine(engine, config):
+    """Apply the SQLite profile's pragmas to every new connection of ``engine``."""
+    uri = engine.url.render_as_string(hide_password=False)
+    if engine.dialect.name != "sqlite" or resolve_profile(uri, config["DB_PROFILE"]) != "sqlite":
+        return
+    pragmas = sqlite_pragmas(config, memory=_is_memory(uri))
+
+    @event.listens_for(engine, "connect")
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas.items():
+                cursor.execute(f"PRAGMA {name}={value}")
+        finally:
+            cursor.close()
@@ -0,0 +1,28 @@
+import hashlib
+from flask import current_app, make_response, request
+
+
+def make_etag(*parts):
+    """Tag a representation by the values it is built from; equal parts give equal tags."""
+    return hashlib.blake2b(repr(parts).encode(), digest_size=12).hexdigest()
+
+
+def not_modified(etag):
+    """True if the request's If-None-Match already names ``etag``."""
+    return request.if_none_match.contains_weak(etag)
+
+
+def conditional(etag, build):
+    """Answer 304 if the client already has ``etag``, else call ``build()`` for the response.
+
+    Either way the response carries the (weak) ETag and asks clients to
+    revalidate before reusing it, so polling browsers send If-None-Match on
+    their own and get their cached body back on a 304.
+    """
+    if not_modified(etag):
+        response = current_app.response_class(status=304)
+    else:
+        response = make_response(build())
+    response.set_etag(etag, weak=True)
+    response.headers["Cache-Control"] = "private, no-cache"
+    return response
@@ -0,0 +1,126 @@
+import json
+import os
+import queue
+import threading
+from collections import defaultdict
+
+
+class LocalTransport:
+    """Delivers published updates to this process only."""
+
+    def publish(self, broker, user_id, event):
+        broker.dispatch(user_id, event)
+
+    def listen(self, broker):
+        pass
+
+
+class RedisTransport:
+    """Delivers published updates to every process through a Redis channel (``pip install redis``).
+
+    Each process runs one listener thread, started with its first
+    subscriber, that hands channel messages to its own streams.
+    """
+
+    def __init__(self, url, channel="wallet-events"):
+        import redis  # Optional dependency, only needed for cross-process fan-out
+        self.channel = channel
+        self._client = redis.Redis.from_url(url)
+        self._listener_pid = None
+        self._lock = threading.Lock()
+
+    def publish(self, broker, user_id, event):
+        try:
+            self._client.publish(self.channel, json.dumps({"user_id": user_id, "event": event}))
+        except Exception as e:
+            print(f"Event publish to Redis failed, delivering locally only: {e}")
+            broker.dispatch(user_id, event)
+
+    def listen(self, broker):
+        pid = os.getpid()
+        with self._lock:
+            if self._listener_pid == pid:
+                return
+            threading.Thread(target=self._listen, args=(broker,), name="wallet-events", daemon=True).start()
+            self._listener_pid = pid
+
+    def _listen(self, broker):
+        while True:
+            try:
+                pubsub = self._client.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(self.channel)
+                for message in pubsub.listen():
+                    payload = json.loads(message["data"])
+                    broker.dispatch(payload["user_id"], payload["event"])
+            except Exception as e:
+                print(f"Wallet event listener error, reconnecting: {e}")
+                threading.Event().wait(1)
+
+
+def make_transport(url):
+    if not url or url == "memory":
+        return LocalTransport()
+    if url.startswith(("redis://", "rediss://", "unix://")):
+        return RedisTransport(url)
+    raise ValueError(f"Unsupported EVENTS_BROKER_URL: {url}")
+
+
+class EventBroker:
+    """Fans wallet updates out to the SSE streams open in this process.
+
+    Each stream has a bounded queue; a client too slow to drain it loses
+    its oldest update rather than growing memory (every update carries the
+    full balance, so the next one catches it up). With the default local
+    transport, an update only reaches streams in the worker process that
+    published it; configure a Redis transport when running several.
+    """
+
+    def __init__(self, max_queue=100):
+        self.max_queue = max_queue
+        self.transport = LocalTransport()
+        self._subscribers = defaultdict(set)
+        self._lock = threading.Lock()
+
+    def configure(self, transport, max_queue=100):
+        self.transport = transport
+        self.max_queue = max_queue
+
+    def subscribe(self, user_id):
+        self.transport.listen(self)
+        stream = queue.Queue(maxsize=self.max_queue)
+        with self._lock:
+            self._subscribers[user_id].add(stream)
+        return stream
+
+    def unsubscribe(self, user_id, stream):
+        with self._lock:
+            streams = self._subscribers.get(user_id)
+            if streams is not None:
+                streams.discard(stream)
+                if not streams:
+                    del self._subscribers[user_id]
+
+    def publish(self, user_id, event):
+        self.transport.publish(self, user_id, event)
+
+    def dispatch(self, user_id, event):
+        """Hand ``event`` to every stream of ``user_id`` in this process."""
+        with self._lock:
+            streams = list(self._subscribers.get(user_id, ()))
+        for stream in streams:
+            while True:
+                try:
+                    stream.put_nowait(event)
+                    break
+                except queue.Full:
+                    try:
+                        stream.get_nowait()
+                    except queue.Empty:
+                        pass
+
+    def stats(self):
+        with self._lock:
+            return {"users": len(self._subscribers), "streams": sum(len(s) for s in self._subscribers.values())}
+
+
+event_broker = EventBroker()
@@ -0,0 +1,34 @@
+from flask.json.provider import DefaultJSONProvider
+
+COMPACT = {"separators": (",", ":")}
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """Flask's JSON provider, serializing with orjson (pinned in requirements.txt).
+
+    Output matches the default provider (sorted keys, compact separators,
+    dates as HTTP dates, Decimals as strings) except that non-ASCII text is
+    written as UTF-8 instead of ``\\u`` escapes. Indented (debug) output and
+    anything orjson rejects, such as integers over 64 bits, fall back to the
+    standard library.
+    """
+
+    def __init__(self, app):
+        super().__init__(app)
+        try:
+            import orjson  # In requirements.txt; without it, the standard library
+        except ImportError:
+            orjson = None
+        self._orjson = orjson
+        if orjson is not None:
+            self._options = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+            if self.sort_keys:
+                self._options |= orjson.OPT_SORT_KEYS
+
+    def dumps(self, obj, **kwargs):
+        if self._orjson is None or (kwargs and kwargs != COMPACT):
+            return super().dumps(obj, **kwargs)
+        try:
+            return self._orjson.dumps(obj, default=self.default, option=self._options).decode()
+        except self._orjson.JSONEncodeError:
+            return super().dumps(obj, **kwargs)
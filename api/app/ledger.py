@@ -0,0 +1,70 @@
+import base64
+from datetime import datetime
+from sqlalchemy import insert, tuple_
+from app import db
+from app.models.ledger import LedgerEntry
+from app.models.wallet import Wallet
+
+def record(wallet, kind, amount, counterparty=None, tx_id=None):
+    """Append one entry for ``wallet`` to the current transaction."""
+    db.session.add(LedgerEntry(
+        wallet_id=wallet.id,
+        user_id=wallet.user_id,
+        kind=kind,
+        amount=amount,
+        counterparty=counterparty,
+        tx_id=tx_id,
+    ))
+
+def record_many(entries):
+    """Append many entries with one multi-row INSERT.
+
+    Each entry is a dict with wallet_id, user_id, kind, amount and optionally
+    counterparty and tx_id.
+    """
+    if not entries:
+        return
+    now = datetime.utcnow()
+    rows = [{"counterparty": None, "tx_id": None, "created_at": now, **entry} for entry in entries]
+    db.session.execute(insert(LedgerEntry), rows)
+
+def encode_cursor(entry):
+    raw = f"{entry.created_at.isoformat()}|{entry.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+def decode_cursor(cursor):
+    """Return (created_at, id) from an opaque cursor; raises ValueError if malformed."""
+    try:
+        created_at, entry_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        return datetime.fromisoformat(created_at), int(entry_id)
+    except (UnicodeDecodeError, ValueError, TypeError) as e:
+        raise ValueError("Invalid cursor") from e
+
+def page(user_id, limit, cursor=None, wallet_id=None):
+    """Return up to ``limit`` entries, newest first, and the cursor for the next page.
+
+    Keyset pagination on (created_at, id) against the per-user or per-wallet
+    index, so every page costs the same no matter how deep it is.
+    """
+    query = db.session.query(LedgerEntry, Wallet.address).join(Wallet, Wallet.id == LedgerEntry.wallet_id)
+    if wallet_id is not None:
+        query = query.filter(LedgerEntry.wallet_id == wallet_id)
+    else:
+        query = query.filter(LedgerEntry.user_id == user_id)
+    if cursor:
+        query = query.filter(tuple_(LedgerEntry.created_at, LedgerEntry.id) < tuple_(*decode_cursor(cursor)))
+    rows = query.order_by(LedgerEntry.created_at.desc(), LedgerEntry.id.desc()).limit(limit + 1).all()
+
+    next_cursor = encode_cursor(rows[limit - 1][0]) if len(rows) > limit else None
+    return rows[:limit], next_cursor
+
+def to_dict(entry, address):
+    return {
+        "id": str(entry.id),
+        "date": entry.created_at.isoformat(),
+        "type": entry.kind,
+        "amount": entry.amount,
+        "address": address,
+        "counterparty": entry.counterparty,
+        "tx_id": entry.tx_id,
+    }
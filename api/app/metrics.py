@@ -0,0 +1,138 @@
+import os
+import time
+from flask import g, has_request_context, request
+from prometheus_client import CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Gauge, Histogram, REGISTRY, generate_latest
+from prometheus_client import multiprocess
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Under gunicorn, set PROMETHEUS_MULTIPROC_DIR (to an empty, writable dir)
+# before start-up so /metrics aggregates every worker, not just the one
+# that happened to serve the scrape.
+
+REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds", "Request latency by route.",
+    ["blueprint", "route", "method", "status"],
+)
+REQUEST_QUERIES = Histogram(
+    "http_request_db_queries", "SQL statements executed per request.",
+    ["blueprint", "route"], buckets=(0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 100, 250),
+)
+REQUEST_DB_SECONDS = Histogram(
+    "http_request_db_seconds", "Time spent in SQL statements per request.",
+    ["blueprint", "route"],
+)
+BACKGROUND_QUERIES = Counter(
+    "db_background_queries", "SQL statements executed outside requests (workers, CLI).",
+)
+NODE_SECONDS = Histogram(
+    "nilotic_request_duration_seconds", "NILOTIC_API call latency by endpoint.",
+    ["endpoint", "method"], buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30),
+)
+NODE_ERRORS = Counter(
+    "nilotic_request_errors", "Failed NILOTIC_API calls by endpoint and reason.",
+    ["endpoint", "method", "reason"],
+)
+NODE_CIRCUIT_STATE = Gauge(
+    "nilotic_circuit_state", "Circuit breaker state by endpoint (0 closed, 1 half-open, 2 open).",
+    ["endpoint"], multiprocess_mode="max",
+)
+NODE_CIRCUIT_REJECTED = Counter(
+    "nilotic_circuit_rejected", "NILOTIC_API calls failed fast by an open circuit.",
+    ["endpoint"],
+)
+SMTP_SECONDS = Histogram(
+    "smtp_send_duration_seconds", "Time to hand one message to the SMTP server.",
+    ["result"],
+)
+SMTP_CONNECT_SECONDS = Histogram(
+    "smtp_connect_duration_seconds", "Time to open an SMTP connection.",
+    ["result"],
+)
+
+def node_endpoint(path):
+    """Collapse a node path to its first segment ("/balance/abc" -> "/balance") to bound label values."""
+    return "/" + path.strip("/").split("/", 1)[0].split("?", 1)[0]
+
+def observe_node(path, method, seconds, status=None, error=None):
+    endpoint = node_endpoint(path)
+    NODE_SECONDS.labels(endpoint, method).observe(seconds)
+    if error is not None:
+        NODE_ERRORS.labels(endpoint, method, type(error).__name__).inc()
+    elif status is not None and status >= 400:
+        NODE_ERRORS.labels(endpoint, method, f"http_{status // 100}xx").inc()
+
+CIRCUIT_STATES = {"closed": 0, "half_open": 1, "open": 2}
+
+def observe_circuit_state(endpoint, state):
+    NODE_CIRCUIT_STATE.labels(endpoint).set(CIRCUIT_STATES[state])
+
+def observe_circuit_rejected(endpoint):
+    NODE_CIRCUIT_REJECTED.labels(endpoint).inc()
+
+def observe_smtp(seconds, ok, connect=False):
+    (SMTP_CONNECT_SECONDS if connect else SMTP_SECONDS).labels("ok" if ok else "error").observe(seconds)
+
+def _route_labels():
+    rule = request.url_rule.rule if request.url_rule else "unmatched"
+    return request.blueprint or "app", rule
+
+def _before_request():
+    g.metrics_start = time.perf_counter()
+    g.metrics_queries = 0
+    g.metrics_db_seconds = 0.0
+
+def _record(status):
+    if "metrics_start" not in g:
+        return
+    blueprint, route = _route_labels()
+    REQUEST_SECONDS.labels(blueprint, route, request.method, str(status)).observe(time.perf_counter() - g.metrics_start)
+    REQUEST_QUERIES.labels(blueprint, route).observe(g.metrics_queries)
+    REQUEST_DB_SECONDS.labels(blueprint, route).observe(g.metrics_db_seconds)
+    g.pop("metrics_start")
+
+def _after_request(response):
+    _record(response.status_code)
+    return response
+
+def _teardown_request(exc):
+    _record(500)  # Only reached without a response when the view raised
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("metrics_query_start", []).append(time.perf_counter())
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info["metrics_query_start"].pop()
+    if has_request_context() and "metrics_start" in g:
+        g.metrics_queries += 1
+        g.metrics_db_seconds += time.perf_counter() - started
+    else:
+        BACKGROUND_QUERIES.inc()
+
+def _handle_error(exception_context):
+    conn = exception_context.connection
+    if conn is not None and conn.info.get("metrics_query_start"):
+        conn.info["metrics_query_start"].pop()
+
+_listening = False
+
+def init_app(app):
+    """Time every request and SQL statement for /metrics."""
+    global _listening
+    app.before_request(_before_request)
+    app.after_request(_after_request)
+    app.teardown_request(_teardown_request)
+    if not _listening:
+        event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+        event.listen(Engine, "handle_error", _handle_error)
+        _listening = True
+
+def render():
+    """Return (body, content type) in the Prometheus text format."""
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
@@ -0,0 +1,178 @@
+from datetime import datetime, timedelta
+import requests
+from flask import current_app
+from sqlalchemy import update
+from app import db, blockchain, node_events
+from app.models.ledger import LedgerEntry
+from app.models.mining_job import MiningJob
+from app.models.wallet import Wallet
+from app.utils import sync_wallet_with_blockchain
+from app.cache import balance_cache
+from app import ledger
+from app.workers import BackgroundWorker
+
+SIMULATED_REWARD = 5.0
+SIMULATED_BLOCK_HASH = "simulated-block-hash"
+
+def enqueue(user_id, wallet, stake):
+    """Add a mining job to the current transaction; commit, then call ``mining_worker.wake()``."""
+    job = MiningJob(user_id=user_id, wallet_id=wallet.id, stake=stake)
+    db.session.add(job)
+    return job
+
+def to_dict(job):
+    return {
+        "job_id": job.id,
+        "status": job.status,
+        "wallet_address": job.wallet.address,
+        "stake": job.stake,
+        "reward": job.reward,
+        "block_hash": job.block_hash,
+        "simulated": job.simulated,
+        "error": job.error,
+        "new_balance": job.wallet.balance if job.status == "Succeeded" else None,
+        "created_at": job.created_at.isoformat(),
+        "finished_at": job.finished_at.isoformat() if job.finished_at else None,
+    }
+
+def _lease_next(now):
+    """Claim the oldest due job for this thread, or return None.
+
+    Queued jobs are due at once; Running jobs become due again when their
+    lease runs out (the worker holding them died). The conditional UPDATE
+    makes the claim atomic, so two workers never run the same job.
+    """
+    lease = timedelta(seconds=current_app.config["MINING_JOB_LEASE"])
+    candidates = (
+        db.session.query(MiningJob.id)
+        .filter(MiningJob.status.in_(["Queued", "Running"]), MiningJob.next_attempt_at <= now)
+        .order_by(MiningJob.next_attempt_at, MiningJob.id)
+        .limit(5)
+        .all()
+    )
+    for (job_id,) in candidates:
+        claimed = db.session.execute(
+            update(MiningJob)
+            .where(MiningJob.id == job_id, MiningJob.status.in_(["Queued", "Running"]), MiningJob.next_attempt_at <= now)
+            .values(status="Running", attempts=MiningJob.attempts + 1, next_attempt_at=now + lease)
+        ).rowcount
+        db.session.commit()
+        if claimed:
+            return db.session.get(MiningJob, job_id)
+    db.session.rollback()
+    return None
+
+def _call_node(wallet_address, stake):
+    """Return ``(reward, block_hash, simulated)`` for one /mine call.
+
+    With SIMULATE_MINING on, an unreachable or failing node yields the fixed
+    simulated reward instead of an error, so the flow works offline.
+    """
+    simulate = current_app.config.get("SIMULATE_MINING", False)
+    try:
+        response = blockchain.post("/mine", json={"stake": stake, "address": wallet_address})
+        if simulate and not response.ok:
+            return SIMULATED_REWARD, SIMULATED_BLOCK_HASH, True
+        response.raise_for_status()
+        result = response.json()
+    except requests.RequestException:
+        if simulate:
+            return SIMULATED_REWARD, SIMULATED_BLOCK_HASH, True
+        raise
+    if not isinstance(result, dict):
+        raise ValueError(f"Unexpected /mine response: {str(result)[:100]}")
+    block_hash = result.get("blockHash", "unknown")
+    if isinstance(block_hash, bytes):
+        block_hash = block_hash.hex()
+    return float(result.get("reward", SIMULATED_REWARD)), str(block_hash)[:128], False
+
+def _call_key(job):
+    return f"mining-job-{job.id}"
+
+def _finish(job, status, error=None):
+    node_events.clear_in_flight(_call_key(job))
+    job.status = status
+    job.error = str(error)[:500] if error else None
+    job.finished_at = datetime.utcnow()
+    db.session.commit()
+
+def _fail_after_mine(job, wallet, error):
+    """Fail a job the node has already mined for; its stake and reward are on chain, so resync."""
+    _finish(job, "Failed", error)
+    if not job.simulated:
+        # Booked under the block hash, so the node's event for it is not applied on top
+        sync_wallet_with_blockchain(wallet.address, tx_id=job.block_hash)
+
+def run_mining_job(job):
+    """Mine for one leased job and apply the stake and reward to its wallet.
+
+    /mine is not idempotent, so the node's result is committed on the job
+    before the wallet is touched. A job re-run after its lease ran out (the
+    worker died mid-job) applies that result instead of mining again. The
+    job's NodeCall marker holds back the node's event for the block until
+    the reward is booked under its hash.
+    """
+    wallet = job.wallet
+    if job.block_hash is None:
+        node_events.mark_in_flight([wallet.id], _call_key(job))
+        db.session.commit()
+        try:
+            reward, block_hash, simulated = _call_node(wallet.address, job.stake)
+        except (requests.RequestException, ValueError, TypeError) as e:  # Unreachable, refused or an unreadable result
+            print(f"Mining job {job.id} failed: {e}")
+            return _finish(job, "Failed", f"Mining failed: {e}")
+        job.reward = reward
+        job.block_hash = block_hash
+        job.simulated = simulated
+        db.session.commit()
+    elif db.session.query(LedgerEntry.id).filter_by(wallet_id=wallet.id, tx_id=job.block_hash).first():
+        # The marker outlived NODE_EVENTS_DEFER_SECONDS and the node's event was applied
+        return _finish(job, "Succeeded")
+    reward, block_hash = job.reward, job.block_hash
+    if reward <= 0:
+        return _fail_after_mine(job, wallet, "No reward received from mining")
+
+    # Guarded like a transfer debit, so a balance spent since the job was
+    # queued cannot go negative.
+    applied = db.session.execute(
+        update(Wallet)
+        .where(Wallet.id == wallet.id, Wallet.balance >= job.stake)
+        .values(balance=Wallet.balance - job.stake + reward, stake=db.func.coalesce(Wallet.stake, 0.0) + job.stake)
+    ).rowcount
+    if not applied:
+        db.session.rollback()
+        return _fail_after_mine(job, wallet, "Insufficient balance for stake")
+
+    if job.stake:
+        ledger.record(wallet, "Staked", -job.stake, tx_id=block_hash)
+    ledger.record(wallet, "Mined", reward, tx_id=block_hash)
+    _finish(job, "Succeeded")
+    balance_cache.invalidate(wallet.address)
+
+    if not job.simulated:
+        sync_wallet_with_blockchain(wallet.address)
+    print(f"Mining job {job.id} mined {reward} SLW for {wallet.address}")
+
+def run_mining_jobs():
+    """Lease and run one due job; returns 1 if a job ran, else 0.
+
+    A job that errors is left Running and retried when its lease runs out,
+    until it has been leased MINING_JOB_MAX_ATTEMPTS times; then it fails.
+    """
+    job = _lease_next(datetime.utcnow())
+    if job is None:
+        return 0
+    max_attempts = current_app.config["MINING_JOB_MAX_ATTEMPTS"]
+    if job.attempts > max_attempts:
+        _finish(job, "Failed", f"Gave up after {max_attempts} attempts")
+        return 1
+    try:
+        run_mining_job(job)
+    except Exception as e:
+        db.session.rollback()
+        print(f"Mining job {job.id} error (attempt {job.attempts}): {e}")
+        if job.attempts >= max_attempts:
+            _finish(job, "Failed", f"Mining failed: {e}")
+    return 1
+
+mining_worker = BackgroundWorker("mining", run_mining_jobs)
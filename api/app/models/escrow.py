@@ -9,4 +9,10 @@ class Escrow(db.Model):
     otp = db.Column(db.String(6), nullable=False)
     status = db.Column(db.String(20), default="Pending")  # Pending, Claimed, Expired
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
-    expires_at = db.Column(db.DateTime, default=lambda: datetime.utcnow() + timedelta(hours=72))
\ No newline at end of file
+    expires_at = db.Column(db.DateTime, default=lambda: datetime.utcnow() + timedelta(hours=72))
+
+    __table_args__ = (
+        db.Index("ix_escrow_status_expires_at", "status", "expires_at"),  # Expiry sweeps
+        db.Index("ix_escrow_recipient_email_status_expires_at", "recipient_email", "status", "expires_at"),  # Claims by recipient
+        db.Index("ix_escrow_sender_id_status", "sender_id", "status"),  # Pending outgoing totals
+    )
\ No newline at end of file
@@ -3,13 +3,22 @@ from datetime import datetime
 
 class KYC(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    user_id = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=False, index=True)
     photo_path = db.Column(db.String(255), nullable=False)
+    photo_hash = db.Column(db.String(64), nullable=True)  # SHA-256 of the photo; names the stored file
+    photo_size = db.Column(db.Integer, nullable=True)
+    thumbnail_path = db.Column(db.String(255), nullable=True)
     form_data = db.Column(db.Text, nullable=True)
     verified = db.Column(db.Boolean, default=False, nullable=False)
+    status = db.Column(db.String(20), default="Pending", server_default="Pending", nullable=False)  # Pending, Verified, Rejected
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    processed_at = db.Column(db.DateTime, nullable=True)
 
     user = db.relationship("User", backref=db.backref("kyc", uselist=False))
 
+    __table_args__ = (
+        db.Index("ix_kyc_status_id", "status", "id"),
+    )
+
     def __repr__(self):
-        return f"<KYC {self.id} for User {self.user_id}>"
\ No newline at end of file
+        return f"<KYC {self.id} for User {self.user_id}>"
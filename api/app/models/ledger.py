@@ -0,0 +1,28 @@
+from app import db
+from datetime import datetime
+
+class LedgerEntry(db.Model):
+    """Append-only record of every change to a wallet balance.
+
+    ``amount`` is the signed change to the wallet balance (negative for money
+    leaving the wallet), so the entries for a wallet sum to its net movement.
+    ``user_id`` is denormalised from the wallet so a user's activity across all
+    wallets can be paged from a single index.
+    """
+    id = db.Column(db.Integer, primary_key=True)
+    wallet_id = db.Column(db.Integer, db.ForeignKey("wallet.id"), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=False)
+    kind = db.Column(db.String(20), nullable=False)  # Sent, Received, Escrow, Claimed, Refund, Staked, Mined, Sync
+    amount = db.Column(db.Float, nullable=False)
+    counterparty = db.Column(db.String(120), nullable=True)  # Wallet address or email on the other side
+    tx_id = db.Column(db.String(128), nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        db.Index("ix_ledger_entry_wallet_created", "wallet_id", "created_at", "id"),
+        db.Index("ix_ledger_entry_user_created", "user_id", "created_at", "id"),
+        db.Index("ix_ledger_entry_tx_id", "tx_id", "wallet_id"),  # Node events already applied by this API
+    )
+
+    def __repr__(self):
+        return f"<LedgerEntry {self.id} {self.kind} {self.amount} on Wallet {self.wallet_id}>"
@@ -0,0 +1,26 @@
+from app import db
+from datetime import datetime
+
+class MiningJob(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=False)
+    wallet_id = db.Column(db.Integer, db.ForeignKey("wallet.id"), nullable=False)
+    stake = db.Column(db.Float, default=0.0, nullable=False)
+    status = db.Column(db.String(20), default="Queued", nullable=False)  # Queued, Running, Succeeded, Failed
+    reward = db.Column(db.Float, nullable=True)
+    block_hash = db.Column(db.String(128), nullable=True)
+    simulated = db.Column(db.Boolean, default=False, nullable=False)
+    error = db.Column(db.String(500), nullable=True)
+    attempts = db.Column(db.Integer, default=0, nullable=False)
+    next_attempt_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)  # Lease expiry while Running
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    finished_at = db.Column(db.DateTime, nullable=True)
+
+    wallet = db.relationship("Wallet")
+
+    __table_args__ = (
+        db.Index("ix_mining_job_status_next_attempt", "status", "next_attempt_at"),
+    )
+
+    def __repr__(self):
+        return f"<MiningJob {self.id} for Wallet {self.wallet_id} ({self.status})>"
@@ -0,0 +1,33 @@
+from app import db
+from datetime import datetime
+
+class NodeEvent(db.Model):
+    """A block or transaction notification from the node, kept so redeliveries apply once."""
+    id = db.Column(db.Integer, primary_key=True)
+    event_id = db.Column(db.String(128), unique=True, nullable=False)
+    kind = db.Column(db.String(20), nullable=False)  # transaction, block
+    block = db.Column(db.Integer, nullable=True)
+    changes = db.Column(db.Integer, default=0, nullable=False)  # Wallet changes applied from this event
+    received_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+    def __repr__(self):
+        return f"<NodeEvent {self.event_id} ({self.kind})>"
+
+
+class NodeCall(db.Model):
+    """A node call of this API that has not booked its result yet, one row per wallet it touches.
+
+    Node events for these wallets wait until the row is gone (or older than
+    NODE_EVENTS_DEFER_SECONDS), since their tx_id is not in the ledger yet.
+    """
+    id = db.Column(db.Integer, primary_key=True)
+    key = db.Column(db.String(64), nullable=False, index=True)
+    wallet_id = db.Column(db.Integer, db.ForeignKey("wallet.id"), nullable=False)
+    started_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        db.Index("ix_node_call_wallet_started", "wallet_id", "started_at"),
+    )
+
+    def __repr__(self):
+        return f"<NodeCall {self.key} on Wallet {self.wallet_id}>"
@@ -0,0 +1,23 @@
+from app import db
+from datetime import datetime
+
+class OutboundEmail(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    recipient = db.Column(db.String(120), nullable=False)
+    subject = db.Column(db.String(255), nullable=False)
+    body = db.Column(db.Text, nullable=False)
+    status = db.Column(db.String(20), default="Pending", nullable=False)  # Pending, Sent, Dead
+    attempts = db.Column(db.Integer, default=0, nullable=False)
+    last_error = db.Column(db.String(500), nullable=True)
+    claim_token = db.Column(db.String(32), nullable=True)  # Set by the worker that leased the row
+    next_attempt_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    sent_at = db.Column(db.DateTime, nullable=True)
+
+    __table_args__ = (
+        db.Index("ix_outbound_email_status_next_attempt", "status", "next_attempt_at"),
+        db.Index("ix_outbound_email_claim_token", "claim_token"),
+    )
+
+    def __repr__(self):
+        return f"<OutboundEmail {self.id} to {self.recipient} ({self.status})>"
@@ -8,5 +8,10 @@ class Wallet(db.Model):
     address = db.Column(db.String(36), unique=True, nullable=False)  # UUID length
     balance = db.Column(db.Float, default=0.0)  # Available balance
     stake = db.Column(db.Float, default=0.0)    # Staked amount
+    # Bumped by every UPDATE of the row, ORM or Core (debits, credits, syncs,
+    # node events), so reads can use it as an ETag without asking the node.
+    version = db.Column(db.Integer, nullable=False, default=1, server_default="1", onupdate=db.literal_column("version + 1"))
 
+    # The unique (user_id, name) index also serves the Genesis wallet lookup
+    # (user_id = ? AND name = "Genesis Wallet") and any user_id-only filter.
     __table_args__ = (db.UniqueConstraint("user_id", "name", name="unique_user_wallet_name"),)
\ No newline at end of file
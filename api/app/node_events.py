@@ -0,0 +1,222 @@
+import hashlib
+import hmac
+import math
+import uuid
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+from flask import current_app
+from sqlalchemy import bindparam, delete, insert, update
+from app import db, ledger
+from app.cache import balance_cache
+from app.events import event_broker
+from app.models.ledger import LedgerEntry
+from app.models.node_event import NodeCall, NodeEvent
+from app.models.wallet import Wallet
+
+SIGNATURE_HEADER = "X-Nilotic-Signature"
+EVENT_KINDS = ("transaction", "block")
+
+
+def sign(secret, body):
+    return "sha256=" + hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+
+
+def verify_signature(secret, body, signature):
+    """Check an ``X-Nilotic-Signature: sha256=<hex>`` HMAC of the raw request body."""
+    return bool(signature) and hmac.compare_digest(sign(secret, body), signature)
+
+
+def _number(value, field):
+    try:
+        number = float(value or 0.0)
+    except (TypeError, ValueError):
+        raise ValueError(f"{field} must be a number")
+    if not math.isfinite(number):
+        raise ValueError(f"{field} must be finite")
+    return number
+
+
+def parse(payload):
+    """Validate a webhook body and return its events in a normal form.
+
+    The body is one event or ``{"events": [...]}``. Each event has an ``id``
+    (unique per event, used to drop redeliveries), a ``type`` of
+    "transaction" or "block", an optional ``block`` height and ``changes``:
+    ``[{"address", "balance_delta", "stake_delta", "tx_id", "counterparty"}]``.
+    Raises ValueError on anything malformed.
+    """
+    if not isinstance(payload, dict):
+        raise ValueError("Expected a JSON object")
+    raw_events = payload["events"] if "events" in payload else [payload]
+    if not isinstance(raw_events, list):
+        raise ValueError("events must be a list")
+
+    events = []
+    for raw in raw_events:
+        if not isinstance(raw, dict) or not isinstance(raw.get("id"), str) or not raw["id"]:
+            raise ValueError("Every event needs a string id")
+        if raw.get("type") not in EVENT_KINDS:
+            raise ValueError(f"Event {raw['id']}: type must be one of {', '.join(EVENT_KINDS)}")
+        changes = raw.get("changes")
+        if not isinstance(changes, list):
+            raise ValueError(f"Event {raw['id']}: changes must be a list")
+        parsed = []
+        for change in changes:
+            if not isinstance(change, dict) or not isinstance(change.get("address"), str):
+                raise ValueError(f"Event {raw['id']}: every change needs an address")
+            parsed.append({
+                "address": change["address"],
+                "balance_delta": _number(change.get("balance_delta"), "balance_delta"),
+                "stake_delta": _number(change.get("stake_delta"), "stake_delta"),
+                "tx_id": str(change.get("tx_id") or raw.get("tx_id") or "") or None,
+                "counterparty": change.get("counterparty"),
+            })
+        block = raw.get("block")
+        events.append({
+            "id": raw["id"][:128],
+            "type": raw["type"],
+            "block": block if isinstance(block, int) else None,
+            "changes": parsed,
+        })
+    return events
+
+
+def _chunks(items, size=500):
+    items = list(items)
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def _ledger_kind(event_type, delta):
+    if event_type == "block":
+        return "Mined"
+    return "Received" if delta > 0 else "Sent"
+
+
+def mark_in_flight(wallet_ids, key=None):
+    """Add a NodeCall row per wallet to the current transaction and return its key.
+
+    Commit it before calling the node, and ``clear_in_flight(key)`` in the
+    transaction that books the call's result (or releases it). In between,
+    node events for those wallets are deferred: their tx_id is not in the
+    ledger yet, so applying them would count the change twice.
+    """
+    key = key or uuid.uuid4().hex
+    now = datetime.utcnow()
+    db.session.execute(insert(NodeCall), [{"key": key, "wallet_id": wallet_id, "started_at": now} for wallet_id in set(wallet_ids)])
+    return key
+
+
+def clear_in_flight(key):
+    db.session.execute(delete(NodeCall).where(NodeCall.key == key))
+
+
+def apply_events(events):
+    """Apply a batch of parsed node events in one transaction and push the new balances.
+
+    Events already recorded (redeliveries) are skipped, as are changes whose
+    ``tx_id`` this API already booked for the wallet from the node's own
+    response (transfers and mining). Events that touch a wallet with a node
+    call still in flight (see ``mark_in_flight``) are deferred: they are not
+    recorded, so the node's redelivery is applied (or skipped as booked)
+    once the call has booked its tx_id. The rest are summed per wallet and
+    applied with one executemany UPDATE, one ledger INSERT and one
+    NodeEvent INSERT. After the commit the balance cache is refreshed and
+    each owner's SSE streams get the wallet's new balance.
+    """
+    seen = set()
+    for chunk in _chunks({e["id"] for e in events}):
+        seen.update(row.event_id for row in db.session.query(NodeEvent.event_id).filter(NodeEvent.event_id.in_(chunk)))
+    fresh = []
+    for event in events:
+        if event["id"] not in seen:
+            seen.add(event["id"])
+            fresh.append(event)
+
+    wallets = {}
+    for chunk in _chunks({c["address"] for e in fresh for c in e["changes"]}):
+        rows = db.session.query(Wallet.id, Wallet.user_id, Wallet.address).filter(Wallet.address.in_(chunk))
+        wallets.update({row.address: row for row in rows})
+
+    booked = set()
+    for chunk in _chunks({c["tx_id"] for e in fresh for c in e["changes"] if c["tx_id"]}):
+        booked.update(db.session.query(LedgerEntry.wallet_id, LedgerEntry.tx_id).filter(LedgerEntry.tx_id.in_(chunk)))
+
+    # Markers older than the cutoff belong to a worker that died mid-call
+    cutoff = datetime.utcnow() - timedelta(seconds=current_app.config["NODE_EVENTS_DEFER_SECONDS"])
+    db.session.execute(delete(NodeCall).where(NodeCall.started_at <= cutoff))
+    in_flight = set()
+    for chunk in _chunks({row.id for row in wallets.values()}):
+        in_flight.update(row.wallet_id for row in db.session.query(NodeCall.wallet_id).filter(NodeCall.wallet_id.in_(chunk)))
+
+    deltas = defaultdict(lambda: [0.0, 0.0])
+    entries = []
+    records = []
+    summary = {"received": len(events), "duplicates": len(events) - len(fresh), "deferred": 0, "already_applied": 0, "unknown_addresses": 0}
+    ready = []
+    for event in fresh:
+        if any(
+            c["address"] in wallets and wallets[c["address"]].id in in_flight and (wallets[c["address"]].id, c["tx_id"]) not in booked
+            for c in event["changes"]
+        ):
+            summary["deferred"] += 1
+        else:
+            ready.append(event)
+    for event in ready:
+        applied = 0
+        for change in event["changes"]:
+            wallet = wallets.get(change["address"])
+            if wallet is None:
+                summary["unknown_addresses"] += 1
+                continue
+            if (wallet.id, change["tx_id"]) in booked:
+                summary["already_applied"] += 1
+                continue
+            deltas[wallet.id][0] += change["balance_delta"]
+            deltas[wallet.id][1] += change["stake_delta"]
+            if change["balance_delta"]:
+                entries.append({
+                    "wallet_id": wallet.id,
+                    "user_id": wallet.user_id,
+                    "kind": _ledger_kind(event["type"], change["balance_delta"]),
+                    "amount": change["balance_delta"],
+                    "counterparty": change["counterparty"],
+                    "tx_id": change["tx_id"] or event["id"],
+                })
+            applied += 1
+        records.append({"event_id": event["id"], "kind": event["type"], "block": event["block"], "changes": applied})
+
+    table = Wallet.__table__
+    if deltas:
+        db.session.connection().execute(
+            update(table)
+            .where(table.c.id == bindparam("event_wallet_id"))
+            .values(
+                balance=db.func.coalesce(table.c.balance, 0.0) + bindparam("balance_delta"),
+                stake=db.func.coalesce(table.c.stake, 0.0) + bindparam("stake_delta"),
+            ),
+            [{"event_wallet_id": wallet_id, "balance_delta": b, "stake_delta": s} for wallet_id, (b, s) in deltas.items()],
+        )
+    ledger.record_many(entries)
+    if records:
+        db.session.execute(insert(NodeEvent), records)
+
+    updated = []
+    for chunk in _chunks(deltas):
+        updated.extend(db.session.query(Wallet.id, Wallet.user_id, Wallet.address, Wallet.balance, Wallet.stake).filter(Wallet.id.in_(chunk)))
+    db.session.commit()
+
+    for row in updated:
+        balance_cache.set(row.address, row.balance, row.stake)
+        balance_delta, stake_delta = deltas[row.id]
+        event_broker.publish(row.user_id, {
+            "address": row.address,
+            "balance": row.balance,
+            "stake": row.stake,
+            "balance_delta": balance_delta,
+            "stake_delta": stake_delta,
+        })
+    summary["applied"] = len(ready)
+    summary["wallets"] = len(updated)
+    return summary
@@ -0,0 +1,84 @@
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from werkzeug.security import check_password_hash, generate_password_hash
+
+
+class PasswordHasher:
+    """Hashes and verifies passwords off the request thread.
+
+    ``method`` is any werkzeug method string (e.g. "scrypt:32768:8:1" or
+    "pbkdf2:sha256:600000"). Work runs on a bounded pool: "process" (the
+    default) keeps the CPU-heavy key derivation away from the worker's GIL
+    and caps how many cores logins can take, "thread" relies on hashlib
+    releasing the GIL, and "inline" runs on the caller's thread. Hashes made
+    with a different method or cost report ``needs_rehash``.
+    """
+
+    def __init__(self, method="pbkdf2:sha256", salt_length=16, executor="process", workers=2):
+        self._pool = None
+        self._pool_pid = None
+        self._lock = threading.Lock()
+        self.configure(method, salt_length, executor, workers)
+
+    def configure(self, method, salt_length=16, executor="process", workers=2):
+        self.shutdown()
+        self.method = method
+        self.salt_length = salt_length
+        self.executor = executor
+        self.workers = workers
+        self._method_prefix = None
+
+    def _get_pool(self):
+        pid = os.getpid()
+        if self._pool is None or self._pool_pid != pid:
+            with self._lock:
+                if self._pool is None or self._pool_pid != pid:
+                    if self.executor == "process":
+                        # forkserver children do not inherit the app's threads or sockets.
+                        # Like any multiprocessing code they import __main__, so entry
+                        # points must keep server start-up under `if __name__ == "__main__"`.
+                        context = multiprocessing.get_context("forkserver" if os.name == "posix" else "spawn")
+                        self._pool = ProcessPoolExecutor(max_workers=self.workers, mp_context=context)
+                    else:
+                        self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="password")
+                    self._pool_pid = pid
+        return self._pool
+
+    def _run(self, fn, *args):
+        if self.executor == "inline" or self.workers <= 0:
+            return fn(*args)
+        return self._get_pool().submit(fn, *args).result()
+
+    def hash(self, password):
+        return self._run(generate_password_hash, password, self.method, self.salt_length)
+
+    def verify(self, pwhash, password):
+        return self._run(check_password_hash, pwhash, password)
+
+    @property
+    def method_prefix(self):
+        # Werkzeug fills in default costs ("pbkdf2:sha256" -> "pbkdf2:sha256:600000"),
+        # so compare stored hashes against the fully expanded prefix. Computing it
+        # costs one full hash, so it is done on first use rather than at start-up.
+        if self._method_prefix is None:
+            self._method_prefix = generate_password_hash("", self.method, self.salt_length).split("$", 1)[0]
+        return self._method_prefix
+
+    def needs_rehash(self, pwhash):
+        return pwhash.split("$", 1)[0] != self.method_prefix
+
+    def warm_up(self):
+        """Start the pool's workers now rather than on the first login."""
+        if self.executor != "inline" and self.workers > 0:
+            list(self._get_pool().map(check_password_hash, ["x"] * self.workers, ["x"] * self.workers))
+
+    def shutdown(self):
+        if self._pool is not None and self._pool_pid == os.getpid():
+            self._pool.shutdown(wait=False)
+        self._pool = None
+        self._pool_pid = None
+
+
+password_hasher = PasswordHasher()
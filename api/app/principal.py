@@ -0,0 +1,118 @@
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from flask import g
+from flask_jwt_extended import get_jwt_identity
+from sqlalchemy import event
+from sqlalchemy.orm import Session, object_session
+from app import db
+from app.models.user import User
+from app.models.wallet import Wallet
+
+# A detached snapshot of the authenticated user and their Genesis wallet, safe
+# to share across requests and threads (no lazy loads, no session binding).
+Principal = namedtuple("Principal", "id email verified kyc_completed wallet_id wallet_address")
+
+
+class PrincipalCache:
+    """Short-TTL, size-bounded map of user id -> Principal for this process."""
+
+    def __init__(self, ttl=30.0, max_size=10000):
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.configure(ttl, max_size)
+
+    def configure(self, ttl, max_size):
+        self.ttl = ttl
+        self.max_size = max_size
+
+    def get(self, user_id):
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                return None
+            principal, cached_at = entry
+            if time.monotonic() - cached_at >= self.ttl:
+                del self._entries[user_id]
+                return None
+            self._entries.move_to_end(user_id)
+            return principal
+
+    def set(self, principal):
+        if self.ttl <= 0 or self.max_size <= 0:
+            return
+        with self._lock:
+            self._entries[principal.id] = (principal, time.monotonic())
+            self._entries.move_to_end(principal.id)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, *user_ids):
+        with self._lock:
+            for user_id in user_ids:
+                self._entries.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+principal_cache = PrincipalCache()
+
+
+def load_principal(user_id):
+    """Load a Principal with one query (user joined to their Genesis wallet)."""
+    row = (
+        db.session.query(User.id, User.email, User.verified, User.kyc_completed, Wallet.id, Wallet.address)
+        .outerjoin(Wallet, (Wallet.user_id == User.id) & (Wallet.name == "Genesis Wallet"))
+        .filter(User.id == user_id)
+        .first()
+    )
+    return Principal(*row) if row else None
+
+
+def current_principal():
+    """Resolve the JWT identity to a Principal at most once per request.
+
+    Checks ``g`` first, then the in-process cache, then the database. Must be
+    called inside a ``@jwt_required()`` view. Returns None for unknown users.
+    """
+    if "principal" in g:
+        return g.principal
+    user_id = int(get_jwt_identity())
+    principal = principal_cache.get(user_id)
+    if principal is None:
+        principal = load_principal(user_id)
+        if principal is not None:
+            principal_cache.set(principal)
+    g.principal = principal
+    return principal
+
+
+# Drop cached principals once changes to the user row (KYC completion, password
+# reset, verification) or a new Genesis wallet are committed.
+def _mark_stale(session, user_id):
+    session.info.setdefault("stale_principals", set()).add(user_id)
+
+
+@event.listens_for(User, "after_update")
+def _user_updated(mapper, connection, target):
+    _mark_stale(object_session(target), target.id)
+
+
+@event.listens_for(Wallet, "after_insert")
+def _wallet_created(mapper, connection, target):
+    if target.name == "Genesis Wallet":
+        _mark_stale(object_session(target), target.user_id)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_committed(session):
+    stale = session.info.pop("stale_principals", None)
+    if stale:
+        principal_cache.invalidate(*stale)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_rolled_back(session):
+    session.info.pop("stale_principals", None)
@@ -0,0 +1,166 @@
+import math
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from flask import current_app, jsonify, request
+
+PERIODS = {"second": 1, "minute": 60, "hour": 3600, "day": 86400}
+
+def parse_rate(spec):
+    """Turn "10/minute" into ``(capacity, tokens_per_second)``; "" or "0" disables the limit."""
+    if not spec or spec.strip() in ("0", "off"):
+        return None
+    count, _, period = spec.strip().partition("/")
+    count = int(count)
+    seconds = PERIODS[period.strip().rstrip("s") or "second"]
+    return count, count / seconds
+
+
+class MemoryStore:
+    """Token buckets in a bounded, process-local dict.
+
+    Fast enough to be free per request, but each worker process counts on
+    its own, so the effective limit is multiplied by the number of workers.
+    """
+
+    def __init__(self, max_keys=100000):
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def take(self, key, capacity, rate, cost=1):
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated = self._buckets.pop(key, (capacity, now))
+            tokens = min(capacity, tokens + (now - updated) * rate)
+            if tokens >= cost:
+                tokens -= cost
+                retry_after = 0.0
+            else:
+                retry_after = (cost - tokens) / rate
+            self._buckets[key] = (tokens, now)
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)  # Least recently used
+        return retry_after == 0.0, retry_after
+
+    def clear(self):
+        with self._lock:
+            self._buckets.clear()
+
+
+class RedisStore:
+    """Token buckets shared by every worker through Redis (``pip install redis``).
+
+    The refill-and-take runs as one Lua script on the server clock, so
+    concurrent workers on different hosts see one consistent bucket.
+    """
+
+    SCRIPT = """
+    local capacity = tonumber(ARGV[1])
+    local rate = tonumber(ARGV[2])
+    local cost = tonumber(ARGV[3])
+    local clock = redis.call('TIME')
+    local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+    local state = redis.call('HMGET', KEYS[1], 'tokens', 'updated')
+    local tokens = tonumber(state[1]) or capacity
+    local updated = tonumber(state[2]) or now
+    tokens = math.min(capacity, tokens + math.max(0, now - updated) * rate)
+    local retry_after = 0
+    if tokens >= cost then
+        tokens = tokens - cost
+    else
+        retry_after = (cost - tokens) / rate
+    end
+    redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'updated', tostring(now))
+    redis.call('PEXPIRE', KEYS[1], math.ceil(capacity / rate * 1000))
+    return tostring(retry_after)
+    """
+
+    def __init__(self, url, prefix="ratelimit:"):
+        import redis  # Optional dependency, only needed for a shared store
+        self.prefix = prefix
+        self._client = redis.Redis.from_url(url)
+        self._script = self._client.register_script(self.SCRIPT)
+
+    def take(self, key, capacity, rate, cost=1):
+        retry_after = float(self._script(keys=[self.prefix + key], args=[capacity, rate, cost]))
+        return retry_after == 0.0, retry_after
+
+    def clear(self):
+        for key in self._client.scan_iter(self.prefix + "*"):
+            self._client.delete(key)
+
+
+def make_store(url):
+    if not url or url == "memory":
+        return MemoryStore()
+    if url.startswith(("redis://", "rediss://", "unix://")):
+        return RedisStore(url)
+    raise ValueError(f"Unsupported RATELIMIT_STORAGE_URL: {url}")
+
+
+class RateLimiter:
+    def __init__(self):
+        self.store = MemoryStore()
+        self.enabled = True
+        self.proxy_warned = False
+
+    def configure(self, enabled, store):
+        self.enabled = enabled
+        self.store = store
+
+    def check(self, key, spec):
+        """Take one token from ``key``'s bucket; return seconds to wait, or 0 if allowed."""
+        rate = parse_rate(spec)
+        if not self.enabled or rate is None:
+            return 0
+        try:
+            allowed, retry_after = self.store.take(key, *rate)
+        except Exception as e:
+            # A broken shared store must not take logins down with it
+            print(f"Rate limiter store error, allowing request: {e}")
+            return 0
+        return 0 if allowed else retry_after
+
+    def warn_proxy(self):
+        """Say once per process that forwarded requests are limited per proxy, not per client."""
+        if self.proxy_warned or not self.enabled:
+            return
+        self.proxy_warned = True
+        print(
+            "WARNING: requests carry X-Forwarded-For but PROXY_FIX_X_FOR is 0, so per-IP rate "
+            f"limits are keyed on the proxy ({request.remote_addr}) and all clients share one bucket. "
+            "Set PROXY_FIX_X_FOR to the number of proxies in front of the app."
+        )
+
+    def limit(self, name):
+        """Limit a view per client IP and, when the JSON body has one, per email.
+
+        Rates come from RATELIMIT_<NAME>_PER_IP and RATELIMIT_<NAME>_PER_EMAIL
+        (e.g. "10/minute"). Rejected requests get 429 with Retry-After. The IP
+        is ``request.remote_addr``, so behind a reverse proxy PROXY_FIX_X_FOR
+        must be set or every client shares the proxy's bucket.
+        """
+        def decorator(view):
+            @wraps(view)
+            def wrapper(*args, **kwargs):
+                config = current_app.config
+                prefix = f"RATELIMIT_{name.upper()}"
+                if not config.get("PROXY_FIX_X_FOR") and "X-Forwarded-For" in request.headers:
+                    self.warn_proxy()
+                retry_after = self.check(f"{name}:ip:{request.remote_addr}", config.get(f"{prefix}_PER_IP"))
+                data = request.get_json(silent=True)
+                email = data.get("email") if isinstance(data, dict) else None
+                if not retry_after and isinstance(email, str) and email:
+                    retry_after = self.check(f"{name}:email:{email.strip().lower()}", config.get(f"{prefix}_PER_EMAIL"))
+                if retry_after:
+                    seconds = max(1, math.ceil(retry_after))
+                    response = jsonify({"error": "Too many requests, please try again later", "retry_after": seconds})
+                    return response, 429, {"Retry-After": str(seconds)}
+                return view(*args, **kwargs)
+            return wrapper
+        return decorator
+
+
+limiter = RateLimiter()
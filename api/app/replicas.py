@@ -0,0 +1,200 @@
+import itertools
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from flask import g, has_request_context, request
+from flask_sqlalchemy.session import Session
+from sqlalchemy import text
+from sqlalchemy.exc import DBAPIError, SQLAlchemyError
+from sqlalchemy.sql import Select
+from sqlalchemy.sql.dml import UpdateBase
+
+REPLICA_PREFIX = "replica_"
+
+# Seconds the replica is behind; 0 while it has replayed everything it received
+POSTGRES_LAG = text(
+    "SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+    "ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) END"
+)
+
+
+def replica_binds(uris, options=lambda uri: {}):
+    """Build SQLALCHEMY_BINDS entries ("replica_0", "replica_1", ...) for a comma-separated URI list.
+
+    ``options(uri)`` returns the engine options for each replica.
+    """
+    binds = {}
+    for i, uri in enumerate(u.strip() for u in (uris or "").split(",") if u.strip()):
+        binds[f"{REPLICA_PREFIX}{i}"] = {"url": uri, **options(uri)}
+    return binds
+
+
+class ReplicaRouter:
+    """Picks a healthy, caught-up replica for read-only requests in this process.
+
+    Each replica is checked at most every ``check_interval`` seconds (a
+    ``SELECT 1``, or its replay lag on Postgres); replicas that fail or lag
+    more than ``max_lag`` seconds are skipped until a later check passes.
+    Clients that wrote within ``sticky_seconds`` read from the primary so
+    they see their own writes. Both are per process.
+    """
+
+    def __init__(self):
+        self.keys = []
+        self._status = {}
+        self._writers = OrderedDict()
+        self._lock = threading.Lock()
+        self.configure([])
+
+    def configure(self, keys, max_lag=5.0, check_interval=5.0, sticky_seconds=5.0, max_writers=10000):
+        self.keys = list(keys)
+        self.max_lag = max_lag
+        self.check_interval = check_interval
+        self.sticky_seconds = sticky_seconds
+        self.max_writers = max_writers
+        self._cycle = itertools.cycle(self.keys)
+        self._status.clear()
+
+    def choose(self, engines):
+        """Return the bind key of a usable replica, or None to stay on the primary."""
+        for _ in range(len(self.keys)):
+            with self._lock:
+                key = next(self._cycle)
+            if self._usable(key, engines[key]):
+                return key
+        return None
+
+    def _usable(self, key, engine):
+        status = self._status.get(key)
+        if status is None or time.monotonic() - status["checked_at"] >= self.check_interval:
+            status = self.check(key, engine)
+        return status["ok"] and status["lag"] <= self.max_lag
+
+    def check(self, key, engine):
+        try:
+            with engine.connect() as conn:
+                if engine.dialect.name == "postgresql":
+                    lag = float(conn.execute(POSTGRES_LAG).scalar() or 0.0)
+                else:
+                    conn.execute(text("SELECT 1"))
+                    lag = 0.0
+            status = {"ok": True, "lag": lag, "checked_at": time.monotonic()}
+            if lag > self.max_lag:
+                print(f"Replica {key} is {lag:.1f}s behind, reading from the primary")
+        except SQLAlchemyError as e:
+            print(f"Replica {key} check failed, reading from the primary: {e}")
+            status = {"ok": False, "lag": None, "checked_at": time.monotonic()}
+        self._status[key] = status
+        return status
+
+    def mark_failed(self, key):
+        self._status[key] = {"ok": False, "lag": None, "checked_at": time.monotonic()}
+
+    def mark_writer(self, client):
+        if self.sticky_seconds <= 0:
+            return
+        with self._lock:
+            self._writers[client] = time.monotonic() + self.sticky_seconds
+            self._writers.move_to_end(client)
+            while len(self._writers) > self.max_writers:
+                self._writers.popitem(last=False)
+
+    def is_recent_writer(self, client):
+        with self._lock:
+            until = self._writers.get(client)
+            if until is None:
+                return False
+            if until <= time.monotonic():
+                del self._writers[client]
+                return False
+            return True
+
+    def snapshot(self):
+        now = time.monotonic()
+        return {
+            key: {
+                "ok": status["ok"],
+                "lag": status["lag"],
+                "checked_ago": round(now - status["checked_at"], 1),
+            }
+            for key, status in sorted(self._status.items())
+        }
+
+
+router = ReplicaRouter()
+
+
+class RoutingSession(Session):
+    """``db.session`` that sends SELECTs from ``@read_only`` views to a replica.
+
+    Everything else (flushes, INSERT/UPDATE/DELETE, SELECT ... FOR UPDATE,
+    and every query outside a read-only view) goes to the primary. A request
+    sticks to the replica it first picked, and to the primary once it writes.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and has_request_context():
+            if self._flushing or isinstance(clause, UpdateBase):
+                g.db_wrote = True
+            elif (
+                g.get("db_read_only") and not g.get("db_wrote")
+                and isinstance(clause, Select) and clause._for_update_arg is None
+            ):
+                if "db_replica" not in g:
+                    g.db_replica = router.choose(self._db.engines)
+                if g.db_replica:
+                    return self._db.engines[g.db_replica]
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+def _client():
+    # The bearer token identifies a signed-in client without decoding it
+    return request.headers.get("Authorization") or request.remote_addr
+
+
+def read_only(view):
+    """Allow a view's queries to run on a read replica.
+
+    Skipped (primary only) when no replicas are configured or the client
+    wrote recently. If the replica fails mid-request, the view runs again
+    on the primary.
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        if not router.keys or router.is_recent_writer(_client()):
+            return view(*args, **kwargs)
+        g.db_read_only = True
+        try:
+            return view(*args, **kwargs)
+        except DBAPIError:
+            replica = g.get("db_replica")
+            if not replica:
+                raise
+            print(f"Replica {replica} failed, retrying on the primary")
+            router.mark_failed(replica)
+            from app import db
+            db.session.rollback()
+            use_primary()
+            return view(*args, **kwargs)
+    return wrapper
+
+
+def use_primary():
+    """Send the rest of this request's queries to the primary, e.g. after a miss that may be replica lag."""
+    g.db_read_only = False
+    g.db_replica = None
+
+
+def on_replica():
+    return bool(has_request_context() and g.get("db_replica"))
+
+
+def _remember_writer(response):
+    if g.get("db_wrote"):
+        router.mark_writer(_client())
+    return response
+
+
+def init_app(app):
+    app.after_request(_remember_writer)
@@ -5,16 +5,20 @@ from app.models.user import User
 from app.models.wallet import Wallet
 from app.models.kyc import KYC  # Import KYC at the top
 from app.utils import sync_wallet_with_blockchain
-from app.email import send_email
+from app.email import send_email, queue_email, email_worker
+from app.storage import kyc_store
+from app.kyc import kyc_worker
+from app.ratelimit import limiter
 import uuid
 import requests
 from datetime import datetime, timedelta
 from sqlalchemy.exc import OperationalError
-import os
+from werkzeug.exceptions import RequestEntityTooLarge
 
 auth_bp = Blueprint("auth", __name__)
 
 @auth_bp.route("/register", methods=["POST"])
+@limiter.limit("register")
 def register():
     try:
         data = request.get_json()
@@ -35,14 +39,16 @@ def register():
 
         frontend_url = current_app.config["FRONTEND_URL"]
         verify_link = f"{frontend_url}/verify-email?token={token}"
-        send_email(email, "Verify Your Email", f"Click here to verify your email: {verify_link}")
+        queue_email(email, "Verify Your Email", f"Click here to verify your email: {verify_link}")
         db.session.commit()
+        email_worker.wake()
         return jsonify({"message": "User registered. Check your email for verification link."}), 201
     except Exception as e:
         db.session.rollback()
         return jsonify({"error": "Registration failed", "details": str(e)}), 500
 
 @auth_bp.route("/login", methods=["POST"])
+@limiter.limit("login")
 def login():
     try:
         data = request.get_json()
@@ -55,6 +61,11 @@ def login():
         user = User.query.filter_by(email=email).first()
         if not user or not user.check_password(password):
             return jsonify({"error": "Invalid email or password"}), 401
+
+        # Upgrade hashes made with an older algorithm or cost while we have the password
+        if user.password_needs_rehash():
+            user.set_password(password)
+            db.session.commit()
         
         if not user.verified:
             return jsonify({"error": "Email not verified"}), 401
@@ -122,6 +133,8 @@ def submit_kyc(user_id):
 
         if user.kyc_completed:
             return jsonify({"error": "KYC already completed"}), 400
+        if KYC.query.filter_by(user_id=user.id, status="Pending").first():
+            return jsonify({"error": "KYC already submitted and awaiting review"}), 400
 
         data = request.form
         kyc_token = data.get("kyc_token")
@@ -132,39 +145,37 @@ def submit_kyc(user_id):
         if not photo:
             return jsonify({"error": "Photo is required"}), 400
 
-        # Define base directory and user-specific subfolder
-        base_dir = "kyc_photos"
-        user_dir = os.path.join(base_dir, f"user_{user_id}")
-
-        # Create directories if they don’t exist
-        os.makedirs(user_dir, exist_ok=True)
-
-        # Save photo
-        photo_path = os.path.join(user_dir, f"{user_id}_{photo.filename}")
-        photo.save(photo_path)
-        current_app.logger.info(f"Saved photo to: {photo_path}")
+        # The upload was streamed into kyc_store while the form was parsed;
+        # this only moves it into place under its content hash.
+        photo_hash, photo_path, photo_size = kyc_store.save(photo.stream)
+        current_app.logger.info(f"Stored photo {photo_hash} ({photo_size} bytes) at: {photo_path}")
 
         # Process additional form data
         form_data = data.get("form_data")
 
-        # Use KYC model (now imported at the top)
+        # Validation and thumbnailing happen on the KYC worker
         kyc = KYC(
             user_id=user.id,
             photo_path=photo_path,
+            photo_hash=photo_hash,
+            photo_size=photo_size,
             form_data=form_data,
-            verified=True  # Adjust if manual review is needed
+            status="Pending",
         )
         db.session.add(kyc)
 
-        # Update user KYC status
-        user.kyc_completed = True
+        # kyc_completed is set by the KYC worker once it accepts the photo
         user.kyc_token = None
         user.kyc_token_expiry = None
         db.session.commit()
+        kyc_worker.wake()
 
-        current_app.logger.info(f"KYC completed for user_id: {user_id}")
-        return jsonify({"message": "KYC submitted successfully"}), 200
+        current_app.logger.info(f"KYC submitted for user_id: {user_id}")
+        return jsonify({"message": "KYC submitted successfully", "kyc_status": "Pending"}), 200
 
+    except RequestEntityTooLarge as e:  # MAX_CONTENT_LENGTH or KYC_MAX_UPLOAD_BYTES
+        db.session.rollback()
+        return jsonify({"error": "KYC submission failed", "details": e.description}), 413
     except FileNotFoundError as e:
         db.session.rollback()
         current_app.logger.error(f"KYC FileNotFoundError: {str(e)}")
@@ -179,6 +190,7 @@ def submit_kyc(user_id):
         return jsonify({"error": "KYC submission failed", "details": str(e)}), 500
     
 @auth_bp.route("/forgot-password", methods=["POST"])
+@limiter.limit("forgot_password")
 def forgot_password():
     try:
         data = request.get_json()
@@ -209,6 +221,7 @@ def forgot_password():
         return jsonify({"error": "Request failed", "details": str(e)}), 500
 
 @auth_bp.route("/reset-password", methods=["POST"])
+@limiter.limit("reset_password")
 def reset_password():
     try:
         data = request.get_json()
@@ -233,6 +246,7 @@ def reset_password():
         return jsonify({"error": "Reset failed", "details": str(e)}), 500
 
 @auth_bp.route("/resend-verification", methods=["POST"])
+@limiter.limit("resend_verification")
 def resend_verification():
     try:
         data = request.get_json()
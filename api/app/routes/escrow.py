@@ -1,18 +1,23 @@
 # app/routes/escrow.py
-from flask import Blueprint, request, jsonify, current_app
+from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required
-from app import db
+from app import db, blockchain
 from app.models.escrow import Escrow  # Import Escrow from models
-from app.models.user import User
 from app.models.wallet import Wallet
-from app.email import send_email
+from app.sweeper import expire_escrows, sweep_expired_escrows
+from app.email import email_worker
+from app.cache import balance_cache
+from app.ratelimit import limiter
+from app.transfers import TransferError, claim_all, credit, provision_recipient
+from app import ledger, node_events
 from datetime import datetime
+from sqlalchemy import update
 import requests
-import uuid
 
 escrow_bp = Blueprint("escrow", __name__)
 
 @escrow_bp.route("/claim/<int:escrow_id>", methods=["POST"])
+@limiter.limit("claim_escrow")
 def claim_escrow(escrow_id):
     data = request.get_json()
     otp = data.get("otp")
@@ -26,46 +31,77 @@ def claim_escrow(escrow_id):
         return jsonify({"error": "Invalid OTP or email"}), 400
 
     if escrow.expires_at < datetime.utcnow():
-        escrow.status = "Expired"
-        sender_wallet = Wallet.query.filter_by(user_id=escrow.sender_id, name="Genesis Wallet").first()
-        sender_wallet.balance += escrow.amount
-        db.session.commit()
+        # The sweeper's guarded expiry, so a racing sweep cannot refund it twice
+        if expire_escrows([escrow])["rows"]:
+            email_worker.wake()
         return jsonify({"error": "Escrow expired"}), 400
 
-    user = User.query.filter_by(email=email).first()
-    if not user:
-        user = User(email=email, verified=True)
-        user.set_password(str(uuid.uuid4()))  # Temporary password for new user
-        db.session.add(user)
-        db.session.commit()
-        wallet = Wallet(user_id=user.id, name="Genesis Wallet", address=str(uuid.uuid4()))
-        db.session.add(wallet)
-        db.session.commit()
-    else:
-        wallet = Wallet.query.filter_by(user_id=user.id, name="Genesis Wallet").first()
+    user, wallet = provision_recipient(email)
 
-    wallet.balance += escrow.amount
-    escrow.status = "Claimed"
     sender_wallet = Wallet.query.filter_by(user_id=escrow.sender_id, name="Genesis Wallet").first()
-    tx = {"sender": sender_wallet.address, "recipient": wallet.address, "amount": escrow.amount}
+    if not sender_wallet:
+        db.session.rollback()
+        return jsonify({"error": "Sender wallet not found"}), 400
+    # Claimed and committed before the node call, so no write lock is held
+    # across it; the guard stops a concurrent claim or sweep from also paying out.
+    claimed = db.session.execute(
+        update(Escrow).where(Escrow.id == escrow.id, Escrow.status == "Pending").values(status="Claimed")
+    ).rowcount
+    if not claimed:
+        db.session.rollback()
+        return jsonify({"error": "Invalid or expired escrow"}), 400
+    amount, user_id, wallet_id, wallet_address = escrow.amount, user.id, wallet.id, wallet.address
+    sender = {"id": sender_wallet.id, "user_id": sender_wallet.user_id, "address": sender_wallet.address}
+    call = node_events.mark_in_flight([wallet_id, sender["id"]])
+    db.session.commit()
+
+    tx = {"sender": sender["address"], "receiver": wallet_address, "amount": amount}
     try:
-        requests.post(f"{current_app.config['NILOTIC_API']}/transaction", json=tx).raise_for_status()
+        response = blockchain.post("/transaction", json=tx)
+        response.raise_for_status()
+        tx_id = response.json().get("tx_id", "simulated-tx-id")
     except requests.RequestException as e:
-        db.session.rollback()
+        db.session.execute(update(Escrow).where(Escrow.id == escrow_id, Escrow.status == "Claimed").values(status="Pending"))
+        node_events.clear_in_flight(call)
+        db.session.commit()
         return jsonify({"error": "Blockchain transaction failed", "details": str(e)}), 500
 
+    credit(wallet_id, amount)
+    # Both sides carry the node's tx_id so its webhook for this transaction
+    # is recognised as already booked (the escrow debited the sender earlier).
+    ledger.record_many([
+        {"wallet_id": wallet_id, "user_id": user_id, "kind": "Received", "amount": amount, "counterparty": sender["address"], "tx_id": tx_id},
+        {"wallet_id": sender["id"], "user_id": sender["user_id"], "kind": "Claimed", "amount": 0.0, "counterparty": email, "tx_id": tx_id},
+    ])
+    node_events.clear_in_flight(call)
     db.session.commit()
-    return jsonify({"message": "Escrow claimed", "wallet_address": wallet.address}), 200
+    balance_cache.invalidate(wallet_address, sender["address"])
+    return jsonify({"message": "Escrow claimed", "wallet_address": wallet_address}), 200
+
+@escrow_bp.route("/claim-all", methods=["POST"])
+@limiter.limit("claim_escrow")
+def claim_all_escrows():
+    """Claim every pending escrow for ``email``; ``otp`` may be the code from any of them."""
+    data = request.get_json(silent=True) or {}
+    email = data.get("email")
+    if not isinstance(email, str) or not email:
+        return jsonify({"error": "email and otp are required"}), 400
+    try:
+        result = claim_all(email, data.get("otp"))
+    except TransferError as e:
+        return jsonify(e.to_dict()), e.status
+    if not result["claimed"]:
+        return jsonify({"error": "Blockchain transaction failed", "details": result["failed"]}), 500
+    return jsonify({"message": "Escrows claimed", **result}), 200
 
 @escrow_bp.route("/check-expired", methods=["GET"])
 @jwt_required()
 def check_expired_escrows():
-    escrows = Escrow.query.filter_by(status="Pending").all()
-    for escrow in escrows:
-        if escrow.expires_at < datetime.utcnow():
-            escrow.status = "Expired"
-            sender_wallet = Wallet.query.filter_by(user_id=escrow.sender_id, name="Genesis Wallet").first()
-            sender_wallet.balance += escrow.amount
-            send_email(sender_wallet.user.email, "Escrow Expired", f"Your {escrow.amount} SLW has been returned.")
-    db.session.commit()
-    return jsonify({"message": "Expired escrows processed"}), 200
\ No newline at end of file
+    report = sweep_expired_escrows()
+    return jsonify({
+        "message": "Expired escrows processed",
+        "processed": report["processed"],
+        "refunded": report["refunded"],
+        "chunks": len(report["chunks"]),
+        "seconds": report["seconds"],
+    }), 200
\ No newline at end of file
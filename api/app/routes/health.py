@@ -0,0 +1,33 @@
+# app/routes/health.py
+from flask import Blueprint, jsonify
+from sqlalchemy import text
+from app import db, blockchain, replicas
+
+health_bp = Blueprint("health", __name__)
+
+@health_bp.route("/healthz", methods=["GET"])
+def healthz():
+    """Liveness: the worker is up and serving requests. Touches nothing else."""
+    return jsonify({"status": "ok"}), 200
+
+@health_bp.route("/readyz", methods=["GET"])
+def readyz():
+    """Readiness: the worker can reach its database.
+
+    The blockchain node is deliberately not checked; a slow node should make
+    requests fail fast, not pull every worker out of the load balancer. The
+    node's circuit breakers and the last read-replica checks are reported
+    (for this worker) but never change the status code; reads fall back to
+    the primary on their own.
+    """
+    circuits = blockchain.circuit_states()
+    extra = {"node": "degraded" if any(c["state"] != "closed" for c in circuits.values()) else "ok", "circuits": circuits}
+    if replicas.router.keys:
+        extra["replicas"] = replicas.router.snapshot()
+    try:
+        db.session.execute(text("SELECT 1"))
+    except Exception as e:
+        db.session.rollback()
+        print(f"Readiness check failed: {e}")
+        return jsonify({"status": "unavailable", "database": "error", **extra}), 503
+    return jsonify({"status": "ready", "database": "ok", **extra}), 200
@@ -0,0 +1,11 @@
+# app/routes/metrics.py
+from flask import Blueprint, current_app
+from app import metrics
+
+metrics_bp = Blueprint("metrics", __name__)
+
+@metrics_bp.route("/metrics", methods=["GET"])
+def prometheus_metrics():
+    """Prometheus scrape endpoint; keep it off the public load balancer."""
+    body, content_type = metrics.render()
+    return current_app.response_class(body, mimetype=content_type)
@@ -0,0 +1,42 @@
+# app/routes/node.py
+from flask import Blueprint, request, jsonify, current_app
+from sqlalchemy.exc import IntegrityError
+from app import db, node_events
+
+node_bp = Blueprint("node", __name__)
+
+@node_bp.route("/events", methods=["POST"])
+def ingest_events():
+    """Webhook for block and transaction notifications from NILOTIC_API.
+
+    The node signs the raw body with NODE_WEBHOOK_SECRET (see
+    ``node_events.sign``). A 2xx means the batch is committed; anything else
+    should be retried, and redelivered events are applied only once. A 409
+    with ``deferred`` in the summary means some events touch a wallet whose
+    transfer this API has not booked yet; the rest of the batch is committed.
+    """
+    config = current_app.config
+    secret = config["NODE_WEBHOOK_SECRET"]
+    if not secret:
+        return jsonify({"error": "Node webhooks are not enabled"}), 404
+
+    body = request.get_data(cache=True)
+    if not node_events.verify_signature(secret, body, request.headers.get(node_events.SIGNATURE_HEADER, "")):
+        return jsonify({"error": "Invalid signature"}), 401
+
+    try:
+        events = node_events.parse(request.get_json(silent=True))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    if len(events) > config["NODE_WEBHOOK_MAX_EVENTS"]:
+        return jsonify({"error": f"A delivery may contain at most {config['NODE_WEBHOOK_MAX_EVENTS']} events"}), 413
+
+    try:
+        summary = node_events.apply_events(events)
+    except IntegrityError:
+        # The same events are being applied by a concurrent delivery
+        db.session.rollback()
+        return jsonify({"error": "Conflicting delivery, retry later"}), 409
+    if summary["deferred"]:
+        return jsonify({"error": "Some events wait on a transfer in flight, retry later", **summary}), 409, {"Retry-After": "1"}
+    return jsonify(summary), 200
@@ -1,21 +1,20 @@
 # app/routes/transaction.py
 from flask import Blueprint, request, jsonify, current_app
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from app.utils import sync_wallet_with_blockchain
 from app import db
-from app.models.user import User
+from app.email import send_email, queue_email, email_worker
+from app.transfers import send, send_batch, TransferError
+from app.principal import current_principal
 from app.models.wallet import Wallet
-from app.models.escrow import Escrow
-from app.email import send_email
-import requests
-import pyotp
+from app import ledger
+from app.replicas import on_replica, read_only, use_primary
+from app.etags import conditional, make_etag
 
 transaction_bp = Blueprint("transaction", __name__)
 
 @transaction_bp.route("/send", methods=["POST"])
 @jwt_required()
 def send_transaction():
-    current_user_id = get_jwt_identity()
     data = request.get_json()
     sender_email = data.get("sender_email")
     recipient_email = data.get("recipient_email")
@@ -24,60 +23,106 @@ def send_transaction():
     if amount <= 0:
         return jsonify({"error": "Amount must be positive"}), 400
 
-    sender = User.query.filter_by(email=sender_email).first()
-    recipient = User.query.filter_by(email=recipient_email).first()
-
-    if not sender or sender.id != current_user_id:
-        return jsonify({"error": "Unauthorized: Invalid sender email or not your account"}), 403
-
-    if not sender.verified or not sender.kyc_completed:
-        return jsonify({"error": "Sender not verified or KYC incomplete"}), 400
-
-    sender_wallet = Wallet.query.filter_by(user_id=sender.id, name="Genesis Wallet").first()
-    if not sender_wallet or sender_wallet.balance < amount:
-        return jsonify({"error": "Insufficient balance or wallet not found"}), 400
-
-    blockchain_url = current_app.config["NILOTIC_API"]
-    if recipient and recipient.verified and recipient.kyc_completed:  # Native user
-        recipient_wallet = Wallet.query.filter_by(user_id=recipient.id, name="Genesis Wallet").first()
-        if not recipient_wallet:
-            return jsonify({"error": "Recipient wallet not found"}), 400
-
-        tx = {"sender": sender_wallet.address, "receiver": recipient_wallet.address, "amount": amount}
-        try:
-            response = requests.post(f"{blockchain_url}/transaction", json=tx, timeout=30)
-            response.raise_for_status()
-            tx_id = response.json().get("tx_id", "simulated-tx-id")
-
-            # Update local balances
-            sender_wallet.balance -= amount
-            recipient_wallet.balance += amount
-            db.session.commit()
-
-            # Sync both wallets with blockchain
-            sync_wallet_with_blockchain(sender_wallet.address)
-            sync_wallet_with_blockchain(recipient_wallet.address)
-
-            send_email(sender_email, "Transaction Sent", f"You sent {amount} SLW to {recipient_email}. Transaction ID: {tx_id}")
-            send_email(recipient_email, "Transaction Received", f"You received {amount} SLW from {sender_email}. Transaction ID: {tx_id}")
-            return jsonify({"message": "Transaction completed", "tx_id": tx_id}), 200
-        except requests.RequestException as e:
-            db.session.rollback()
-            return jsonify({"error": "Blockchain transaction failed", "details": str(e)}), 500
-    else:  # Alien user (escrow)
-        escrow = Escrow(
-            sender_id=sender.id,
-            recipient_email=recipient_email,
-            amount=amount,
-            otp=pyotp.TOTP(pyotp.random_base32()).now()
-        )
-        sender_wallet.balance -= amount
-        db.session.add(escrow)
-        db.session.commit()
-
-        # Sync sender wallet after escrow creation
-        sync_wallet_with_blockchain(sender_wallet.address)
+    try:
+        result = send(current_principal(), sender_email, recipient_email, amount)
+    except TransferError as e:
+        return jsonify(e.to_dict()), e.status
 
+    if "escrow" in result:  # Alien user (escrow)
+        escrow = result["escrow"]
         claim_link = f"{current_app.config['BASE_URL']}/escrow/claim/{escrow.id}?otp={escrow.otp}"
         send_email(recipient_email, "Claim Your SLW", f"Click here to claim {amount} SLW: {claim_link}")
-        return jsonify({"message": "Escrow created", "escrow_id": escrow.id}), 201
\ No newline at end of file
+        return jsonify({"message": "Escrow created", "escrow_id": escrow.id}), 201
+
+    tx_id = result["tx_id"]
+    queue_email(sender_email, "Transaction Sent", f"You sent {amount} SLW to {recipient_email}. Transaction ID: {tx_id}")
+    queue_email(recipient_email, "Transaction Received", f"You received {amount} SLW from {sender_email}. Transaction ID: {tx_id}")
+    db.session.commit()
+    email_worker.wake()
+    return jsonify({"message": "Transaction completed", "tx_id": tx_id}), 200
+
+
+@transaction_bp.route("/batch", methods=["POST"])
+@jwt_required()
+def send_batch_transaction():
+    data = request.get_json()
+    sender_email = data.get("sender_email")
+    entries = data.get("transfers")
+
+    if not isinstance(entries, list) or not entries:
+        return jsonify({"error": "transfers must be a non-empty list"}), 400
+
+    try:
+        results, escrows = send_batch(current_principal(), sender_email, entries)
+    except TransferError as e:
+        return jsonify(e.to_dict()), e.status
+
+    base_url = current_app.config["BASE_URL"]
+    sent = [row for row in results if row["status"] == "sent"]
+    for row in sent:
+        queue_email(row["recipient_email"], "Transaction Received", f"You received {row['amount']} SLW from {sender_email}. Transaction ID: {row['tx_id']}")
+    for escrow in escrows.values():
+        claim_link = f"{base_url}/escrow/claim/{escrow.id}?otp={escrow.otp}"
+        queue_email(escrow.recipient_email, "Claim Your SLW", f"Click here to claim {escrow.amount} SLW: {claim_link}")
+
+    summary = {
+        "sent": len(sent),
+        "escrowed": len(escrows),
+        "failed": sum(1 for row in results if row["status"] == "failed"),
+    }
+    summary["total_debited"] = sum(row["amount"] for row in results if row["status"] in ("sent", "escrow"))
+    if summary["sent"] or summary["escrowed"]:
+        queue_email(
+            sender_email,
+            "Batch Transfer Sent",
+            f"You sent {summary['total_debited']} SLW to {summary['sent'] + summary['escrowed']} recipients "
+            f"({summary['sent']} direct, {summary['escrowed']} escrow). {summary['failed']} transfers failed."
+        )
+    db.session.commit()
+    email_worker.wake()
+    return jsonify({"message": "Batch processed", **summary, "results": results}), 200
+
+
+def _page_limit(default):
+    try:
+        limit = int(request.args.get("limit", default))
+    except ValueError:
+        limit = default
+    return max(1, min(limit, current_app.config["LEDGER_PAGE_MAX"]))
+
+@transaction_bp.route("/recent", methods=["GET"])
+@jwt_required()
+@read_only
+def recent_transactions():
+    current_user_id = int(get_jwt_identity())
+    rows, _ = ledger.page(current_user_id, _page_limit(10))
+    # Ledger entries never change, so a page is identified by its entry ids
+    etag = make_etag([entry.id for entry, _ in rows])
+    return conditional(etag, lambda: (jsonify([ledger.to_dict(entry, address) for entry, address in rows]), 200))
+
+@transaction_bp.route("/history", methods=["GET"])
+@jwt_required()
+@read_only
+def transaction_history():
+    current_user_id = int(get_jwt_identity())
+    wallet_id = None
+    address = request.args.get("wallet")
+    if address:
+        wallet = Wallet.query.filter_by(address=address, user_id=current_user_id).first()
+        if not wallet and on_replica():
+            use_primary()  # May just not have replicated yet
+            wallet = Wallet.query.filter_by(address=address, user_id=current_user_id).first()
+        if not wallet:
+            return jsonify({"error": "Wallet not found or not owned by you"}), 404
+        wallet_id = wallet.id
+
+    try:
+        rows, next_cursor = ledger.page(current_user_id, _page_limit(50), request.args.get("cursor"), wallet_id)
+    except ValueError:
+        return jsonify({"error": "Invalid cursor"}), 400
+
+    etag = make_etag([entry.id for entry, _ in rows], next_cursor)
+    return conditional(etag, lambda: (jsonify({
+        "transactions": [ledger.to_dict(entry, address) for entry, address in rows],
+        "next_cursor": next_cursor
+    }), 200))
@@ -1,14 +1,33 @@
 # app/routes/wallet.py
-from flask import Blueprint, request, jsonify, current_app
-from app import db
+from flask import Blueprint, Response, request, jsonify, current_app
+from flask_jwt_extended import create_access_token, get_jwt, get_jwt_identity, get_jwt_request_location, jwt_required
+from sqlalchemy import func
+from app import db, blockchain, jwt
 from app.models.user import User
 from app.models.wallet import Wallet
+from app.models.escrow import Escrow
 from app.utils import sync_wallet_with_blockchain
+from app.sync import sync_user_wallets
+from app.cache import balance_cache
+from app.events import event_broker
+from app.replicas import on_replica, read_only, use_primary
+from app.etags import conditional, make_etag, not_modified
+import json
+import queue
+import time
 import uuid
+from datetime import timedelta
 import requests
 
 wallet_bp = Blueprint("wallet", __name__)
 
+STREAM_TOKEN_SCOPE = "wallet_events"
+
+@jwt.token_verification_loader
+def stream_tokens_only_open_streams(jwt_header, jwt_data):
+    # Stream tokens travel in a URL, so they open the event stream and nothing else
+    return jwt_data.get("scope") != STREAM_TOKEN_SCOPE or request.endpoint == "wallet.wallet_events"
+
 @wallet_bp.route("/create", methods=["POST"])
 def create_wallet():
     data = request.get_json()
@@ -27,13 +46,8 @@ def create_wallet():
     db.session.add(wallet)
     db.session.commit()
 
-    blockchain_url = current_app.config["NILOTIC_API"]
     try:
-        response = requests.post(
-            f"{blockchain_url}/stake",
-            json={"amount": 0, "address": wallet.address},
-            timeout=30
-        )
+        response = blockchain.post("/stake", json={"amount": 0, "address": wallet.address})
         response.raise_for_status()
         sync_wallet_with_blockchain(wallet.address)
     except requests.RequestException as e:
@@ -43,10 +57,128 @@ def create_wallet():
     return jsonify({"message": "Wallet created", "address": wallet.address, "balance": wallet.balance, "stake": wallet.stake}), 201
 
 @wallet_bp.route("/balance/<address>", methods=["GET"])
+@read_only
 def get_balance(address):
+    # "stale" marks a value the node has not confirmed recently. While the
+    # node's circuit is open, the stored value is served without waiting.
+    # The ETag is the row's (id, version), as in /wallet/list, so the tag and
+    # the body always come from the same row; the advisory "stale" flag is
+    # not part of it. The balance cache only records whether the node
+    # confirmed the value recently, which decides whether to ask it again.
+    node_available = blockchain.is_available("/balance")
+    _, state = balance_cache.get(address)
+    if node_available and state is None:
+        use_primary()  # The sync below books a ledger adjustment against the row it reads
     wallet = Wallet.query.filter_by(address=address).first()
+    if not wallet and on_replica():
+        use_primary()  # May just not have replicated yet
+        wallet = Wallet.query.filter_by(address=address).first()
     if not wallet:
         return jsonify({"error": "Wallet not found"}), 404
 
-    sync_wallet_with_blockchain(address)
-    return jsonify({"address": wallet.address, "balance": wallet.balance, "stake": wallet.stake}), 200
\ No newline at end of file
+    etag = make_etag(wallet.id, wallet.version)
+    synced = state == "fresh"
+    if node_available and state != "fresh":
+        if state == "stale" or not_modified(etag):
+            # Serve what we have and confirm it with the node in the background
+            # (at most once per cache TTL per address)
+            balance_cache.refresh_async(current_app._get_current_object(), address, sync_wallet_with_blockchain)
+        else:
+            synced = sync_wallet_with_blockchain(address, timeout=current_app.config["NILOTIC_READ_TIMEOUT"])
+            etag = make_etag(wallet.id, wallet.version)
+    return conditional(etag, lambda: (jsonify({"address": wallet.address, "balance": wallet.balance, "stake": wallet.stake, "stale": not synced}), 200))
+
+@wallet_bp.route("/events/token", methods=["POST"])
+@jwt_required()
+def wallet_events_token():
+    """Short-lived token for GET /wallet/events?jwt=<token>, which EventSource needs."""
+    expires = timedelta(seconds=current_app.config["SSE_TOKEN_SECONDS"])
+    token = create_access_token(identity=get_jwt_identity(), expires_delta=expires, additional_claims={"scope": STREAM_TOKEN_SCOPE})
+    return jsonify({"token": token, "expires_in": int(expires.total_seconds())}), 200
+
+@wallet_bp.route("/events", methods=["GET"])
+@jwt_required(locations=["headers", "query_string"])  # EventSource cannot set headers; pass ?jwt=<stream token>
+def wallet_events():
+    """Server-Sent Events stream of the caller's wallet balance updates.
+
+    Each update is an ``event: balance`` with the wallet's address, new
+    balance and stake, and the deltas applied. Comment lines keep idle
+    connections alive. The stream ends after SSE_MAX_SECONDS so that
+    connections rotate across workers; the client fetches a new token from
+    POST /wallet/events/token and reconnects.
+    """
+    if get_jwt_request_location() == "query_string" and get_jwt().get("scope") != STREAM_TOKEN_SCOPE:
+        return jsonify({"error": "Pass a stream token from POST /wallet/events/token, not an access token"}), 401
+    user_id = int(get_jwt_identity())
+    config = current_app.config
+    heartbeat = config["SSE_HEARTBEAT"]
+    deadline = time.monotonic() + config["SSE_MAX_SECONDS"]
+    retry_ms = int(config["SSE_RETRY_MS"])
+    stream = event_broker.subscribe(user_id)
+
+    def generate():
+        try:
+            yield f"retry: {retry_ms}\n\n"
+            while time.monotonic() < deadline:
+                try:
+                    event = stream.get(timeout=min(heartbeat, max(0.0, deadline - time.monotonic())))
+                except queue.Empty:
+                    yield ": keep-alive\n\n"
+                    continue
+                yield f"event: balance\ndata: {json.dumps(event)}\n\n"
+        finally:
+            event_broker.unsubscribe(user_id, stream)
+
+    return Response(generate(), mimetype="text/event-stream", headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+@wallet_bp.route("/cache/stats", methods=["GET"])
+@jwt_required()
+def balance_cache_stats():
+    return jsonify(balance_cache.stats()), 200
+
+@wallet_bp.route("/list", methods=["GET"])
+@jwt_required()
+@read_only
+def list_wallets():
+    current_user_id = int(get_jwt_identity())
+    if request.args.get("refresh") == "true":
+        use_primary()  # The sync writes ledger adjustments computed from the rows it reads
+        sync_user_wallets(current_user_id)
+
+    # One round trip: the wallets, their totals (window sums) and the pending
+    # outgoing escrow total (scalar subquery on ix_escrow_sender_id_status).
+    pending_escrow = (
+        db.session.query(func.coalesce(func.sum(Escrow.amount), 0.0))
+        .filter(Escrow.sender_id == current_user_id, Escrow.status == "Pending")
+        .scalar_subquery()
+    )
+    rows = (
+        db.session.query(
+            Wallet,
+            func.sum(Wallet.balance).over().label("total_balance"),
+            func.sum(Wallet.stake).over().label("total_stake"),
+            pending_escrow.label("pending_escrow"),
+        )
+        .filter(Wallet.user_id == current_user_id)
+        .order_by(Wallet.id)
+        .all()
+    )
+
+    totals = {"balance": 0.0, "stake": 0.0, "pending_escrow": 0.0}
+    if rows:
+        _, total_balance, total_stake, pending = rows[0]
+        totals = {"balance": total_balance or 0.0, "stake": total_stake or 0.0, "pending_escrow": pending or 0.0}
+    else:
+        totals["pending_escrow"] = db.session.query(pending_escrow).scalar() or 0.0
+
+    # Every UPDATE bumps a wallet's version, so (id, version) pairs stand in
+    # for the wallets' contents; claimed escrows change only the pending total.
+    etag = make_etag(current_user_id, [(wallet.id, wallet.version) for wallet, _, _, _ in rows], totals["pending_escrow"])
+
+    def build():
+        wallets = [
+            {"id": wallet.id, "name": wallet.name, "address": wallet.address, "balance": wallet.balance, "stake": wallet.stake}
+            for wallet, _, _, _ in rows
+        ]
+        return jsonify({"wallets": wallets, "totals": totals}), 200
+    return conditional(etag, build)
\ No newline at end of file
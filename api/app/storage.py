@@ -0,0 +1,141 @@
+import hashlib
+import os
+import tempfile
+import threading
+from flask import Request
+from werkzeug.exceptions import RequestEntityTooLarge
+
+class UploadTooLarge(RequestEntityTooLarge):
+    """An upload went past the store's ``max_bytes`` while it was being streamed."""
+
+
+class Spool:
+    """A temporary file inside the store that hashes and counts bytes as they are written.
+
+    Writing past ``max_bytes`` deletes the file and raises ``UploadTooLarge``,
+    so an oversized upload never lands on disk in full. A spool that is closed
+    without being committed removes its file.
+    """
+
+    def __init__(self, store):
+        self.store = store
+        self.digest = hashlib.sha256()
+        self.size = 0
+        self.committed = False
+        handle, self.path = tempfile.mkstemp(dir=store.tmp_dir, prefix="upload-")
+        self.file = os.fdopen(handle, "w+b")
+
+    def write(self, data):
+        self.size += len(data)
+        if self.size > self.store.max_bytes:
+            self.close()
+            raise UploadTooLarge(f"Uploads are limited to {self.store.max_bytes} bytes")
+        self.digest.update(data)
+        return self.file.write(data)
+
+    def __getattr__(self, name):
+        # read, seek, tell, flush, ... come straight from the file.
+        return getattr(self.file, name)
+
+    def __iter__(self):
+        return iter(self.file)
+
+    def close(self):
+        if not self.file.closed:
+            self.file.close()
+        if not self.committed:
+            try:
+                os.remove(self.path)
+            except FileNotFoundError:
+                pass
+
+
+class ContentStore:
+    """Content-addressed file storage on the local disk.
+
+    Files are named by the SHA-256 of their bytes and sharded two levels
+    deep (``objects/ab/cd/abcd...``), so identical uploads are stored once
+    and no directory grows past a few hundred entries. Uploads are streamed
+    into a spool under ``tmp/`` and moved into place atomically.
+    """
+
+    def __init__(self, root="kyc_photos", max_bytes=5 * 1024 * 1024, chunk_size=64 * 1024):
+        self._lock = threading.Lock()
+        self._ready = None
+        self.configure(root, max_bytes, chunk_size)
+
+    def configure(self, root, max_bytes, chunk_size=64 * 1024):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.chunk_size = chunk_size
+        self._ready = None
+
+    @property
+    def tmp_dir(self):
+        path = os.path.join(self.root, "tmp")
+        if self._ready != path:
+            with self._lock:
+                os.makedirs(path, exist_ok=True)
+                self._ready = path
+        return path
+
+    def path_for(self, digest, kind="objects", suffix=""):
+        return os.path.join(self.root, kind, digest[:2], digest[2:4], digest + suffix)
+
+    def spool(self):
+        return Spool(self)
+
+    def commit(self, spool, kind="objects", suffix=""):
+        """Move a finished spool into place and return ``(digest, path, size)``."""
+        digest = spool.digest.hexdigest()
+        path = self.path_for(digest, kind, suffix)
+        spool.file.flush()
+        if os.path.exists(path):
+            spool.close()  # Same content is already stored
+        else:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            os.replace(spool.path, path)
+            spool.committed = True
+            spool.close()
+        return digest, path, spool.size
+
+    def save(self, stream, kind="objects", suffix=""):
+        """Store a file-like object (or an upload already streamed into a spool)."""
+        if isinstance(stream, Spool) and stream.store is self:
+            return self.commit(stream, kind, suffix)
+        spool = self.spool()
+        try:
+            for chunk in iter(lambda: stream.read(self.chunk_size), b""):
+                spool.write(chunk)
+        except Exception:
+            spool.close()
+            raise
+        return self.commit(spool, kind, suffix)
+
+    def save_bytes(self, data, kind="objects", suffix=""):
+        spool = self.spool()
+        spool.write(data)
+        return self.commit(spool, kind, suffix)
+
+
+kyc_store = ContentStore()
+
+
+class StreamingRequest(Request):
+    """Request class that streams multipart file parts straight into ``kyc_store``.
+
+    Werkzeug would otherwise buffer each part in memory or an anonymous temp
+    file before the view could copy it. Here the parser writes into a hashing
+    spool in the store's ``tmp/`` dir, bounded by ``max_bytes``. Only the
+    endpoints in ``spool_endpoints`` do this; other uploads are left to
+    Werkzeug.
+    """
+
+    spool_endpoints = {"auth.submit_kyc"}
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        if self.endpoint not in self.spool_endpoints:
+            return super()._get_file_stream(total_content_length, content_type, filename, content_length)
+        if content_length is not None and content_length > kyc_store.max_bytes:
+            raise UploadTooLarge(f"Uploads are limited to {kyc_store.max_bytes} bytes")
+        return kyc_store.spool()
@@ -0,0 +1,120 @@
+import time
+from collections import defaultdict
+from datetime import datetime
+from flask import current_app
+from sqlalchemy import update
+from app import db
+from app.models.escrow import Escrow
+from app.models.user import User
+from app.models.wallet import Wallet
+from app.cache import balance_cache
+from app.email import queue_email, email_worker
+from app import ledger
+from app.workers import BackgroundWorker
+
+def _sweep_chunk(chunk_size, now):
+    # Served by ix_escrow_status_expires_at; SKIP LOCKED keeps concurrent
+    # sweepers (and in-flight claims) off each other's rows where supported.
+    rows = (
+        db.session.query(Escrow.id, Escrow.sender_id, Escrow.amount, Escrow.recipient_email)
+        .filter(Escrow.status == "Pending", Escrow.expires_at < now)
+        .order_by(Escrow.expires_at, Escrow.id)
+        .limit(chunk_size)
+        .with_for_update(skip_locked=True)
+        .all()
+    )
+    if not rows:
+        return None
+    return expire_escrows(rows)
+
+def expire_escrows(rows):
+    """Mark escrows Expired, refund their senders and queue a notice to each; commits.
+
+    ``rows`` carry id, sender_id, amount and recipient_email. Returns
+    ``{"rows", "senders", "amount"}`` for the escrows this call expired.
+    """
+    # Guarded on status: SKIP LOCKED is a no-op on SQLite, so a claim (or
+    # another expiry) may have committed since the SELECT. Only rows flipped
+    # here are refunded.
+    expire = (
+        update(Escrow)
+        .where(Escrow.id.in_([row.id for row in rows]), Escrow.status == "Pending")
+        .values(status="Expired")
+        .execution_options(synchronize_session=False)
+    )
+    if db.session.get_bind().dialect.update_returning:
+        expired = set(db.session.execute(expire.returning(Escrow.id)).scalars())
+    elif db.session.execute(expire).rowcount == len(rows):
+        expired = {row.id for row in rows}
+    else:
+        db.session.rollback()  # Lost a race without RETURNING to tell which rows; reselect
+        return {"rows": 0, "senders": 0, "amount": 0.0}
+    rows = [row for row in rows if row.id in expired]
+    if not rows:
+        db.session.commit()
+        return {"rows": 0, "senders": 0, "amount": 0.0}
+
+    refunds = defaultdict(lambda: [0.0, 0])
+    for row in rows:
+        refunds[row.sender_id][0] += row.amount
+        refunds[row.sender_id][1] += 1
+
+    for sender_id, (total, _) in refunds.items():
+        Wallet.query.filter_by(user_id=sender_id, name="Genesis Wallet").update(
+            {Wallet.balance: Wallet.balance + total}, synchronize_session=False
+        )
+
+    senders = (
+        db.session.query(User.id, User.email, Wallet.id.label("wallet_id"), Wallet.address)
+        .join(Wallet, (Wallet.user_id == User.id) & (Wallet.name == "Genesis Wallet"))
+        .filter(User.id.in_(list(refunds)))
+        .all()
+    )
+    wallet_ids = {sender.id: sender.wallet_id for sender in senders}
+    ledger.record_many([
+        {"wallet_id": wallet_ids[row.sender_id], "user_id": row.sender_id, "kind": "Refund", "amount": row.amount, "counterparty": row.recipient_email}
+        for row in rows if row.sender_id in wallet_ids
+    ])
+    for sender in senders:
+        total, count = refunds[sender.id]
+        noun = "escrow" if count == 1 else "escrows"
+        queue_email(sender.email, "Escrow Expired", f"Your {total} SLW from {count} expired {noun} has been returned.")
+
+    db.session.commit()
+    balance_cache.invalidate(*[sender.address for sender in senders])
+    return {"rows": len(rows), "senders": len(refunds), "amount": sum(total for total, _ in refunds.values())}
+
+def sweep_expired_escrows(chunk_size=None):
+    """Expire every pending escrow past its deadline and refund the senders.
+
+    Works through bounded chunks, each committed on its own with one refund
+    update and one notification per sender. Returns a report with totals and
+    per-chunk timings.
+    """
+    chunk_size = chunk_size or current_app.config["ESCROW_SWEEP_CHUNK_SIZE"]
+    now = datetime.utcnow()
+    report = {"processed": 0, "refunded": 0.0, "chunks": []}
+    started = time.perf_counter()
+    while True:
+        chunk_started = time.perf_counter()
+        chunk = _sweep_chunk(chunk_size, now)
+        if chunk is None:
+            break
+        chunk["seconds"] = round(time.perf_counter() - chunk_started, 4)
+        report["chunks"].append(chunk)
+        report["processed"] += chunk["rows"]
+        report["refunded"] += chunk["amount"]
+    report["seconds"] = round(time.perf_counter() - started, 4)
+
+    if report["processed"]:
+        email_worker.wake()
+    return report
+
+def _scheduled_sweep():
+    report = sweep_expired_escrows()
+    if report["processed"]:
+        print(f"Expired {report['processed']} escrows in {report['seconds']}s")
+    # Always report idle so the worker sleeps until the next interval
+    return 0
+
+escrow_sweeper = BackgroundWorker("escrow-sweeper", _scheduled_sweep)
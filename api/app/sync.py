@@ -0,0 +1,134 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from flask import current_app
+from sqlalchemy import update
+from app import db, blockchain
+from app.models.wallet import Wallet
+from app.cache import balance_cache
+from app import ledger
+
+
+def _fetch_balance(app, address, timeout):
+    """Fetch (balance, stake) for one address, or None if the node call fails."""
+    try:
+        with app.app_context():
+            return blockchain.get_balance(address, timeout=timeout)
+    except (requests.RequestException, ValueError) as e:
+        print(f"Failed to sync {address} with blockchain: {str(e)}")
+        return None
+
+
+def wallet_rows(query):
+    return query.with_entities(Wallet.id, Wallet.user_id, Wallet.address, Wallet.balance, Wallet.stake, Wallet.version)
+
+
+def iter_wallet_chunks(chunk_size):
+    """Yield wallets as lists of (id, user_id, address, balance, stake, version) rows using keyset pagination on id."""
+    last_id = 0
+    while True:
+        rows = (
+            wallet_rows(Wallet.query)
+            .filter(Wallet.id > last_id)
+            .order_by(Wallet.id)
+            .limit(chunk_size)
+            .all()
+        )
+        if not rows:
+            return
+        yield rows
+        last_id = rows[-1].id
+
+
+def sync_rows(rows, executor, app, timeout):
+    """Fetch node balances for ``rows`` concurrently and write back what changed.
+
+    ``rows`` carry (id, user_id, address, balance, stake, version). Each change
+    is guarded on the version that was read, so a wallet written to between the
+    read and the update (a debit, a webhook) is skipped rather than overwritten
+    and left to the next sync. Skipped rows count as failed. Returns
+    (synced, updated, failed).
+    """
+    results = list(executor.map(lambda row: _fetch_balance(app, row.address, timeout), rows))
+
+    updated = 0
+    stale = set()
+    adjustments = []
+    for row, result in zip(rows, results):
+        if result is None:
+            continue
+        balance, stake = result
+        if row.balance == balance and row.stake == stake:
+            continue
+        matched = db.session.execute(
+            update(Wallet)
+            .where(Wallet.id == row.id, Wallet.version == row.version)
+            .values(balance=balance, stake=stake)
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        if not matched:
+            stale.add(row.id)
+            continue
+        updated += 1
+        if row.balance != balance:
+            adjustments.append({"wallet_id": row.id, "user_id": row.user_id, "kind": "Sync", "amount": balance - (row.balance or 0.0)})
+
+    ledger.record_many(adjustments)
+    db.session.commit()
+
+    synced = 0
+    for row, result in zip(rows, results):
+        if result is not None and row.id not in stale:
+            balance_cache.set(row.address, *result)
+            synced += 1
+    if stale:
+        print(f"Skipped {len(stale)} wallets changed during sync; the next sync picks them up")
+    return synced, updated, len(rows) - synced
+
+
+def sync_all_wallets(chunk_size=None, workers=None):
+    """Reconcile every wallet with the blockchain.
+
+    Balance lookups for a chunk run concurrently over the shared blockchain
+    session; changed rows are written back guarded on their version and
+    committed once per chunk.
+    Returns a summary dict with counts and throughput.
+    """
+    config = current_app.config
+    chunk_size = chunk_size or config["SYNC_CHUNK_SIZE"]
+    workers = workers or config["SYNC_WORKERS"]
+    timeout = config["SYNC_TIMEOUT"]
+    app = current_app._get_current_object()
+
+    summary = {"total": 0, "synced": 0, "updated": 0, "failed": 0, "chunks": 0}
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for rows in iter_wallet_chunks(chunk_size):
+            chunk_started = time.perf_counter()
+            synced, updated, failed = sync_rows(rows, executor, app, timeout)
+            summary["synced"] += synced
+            summary["failed"] += failed
+
+            summary["total"] += len(rows)
+            summary["updated"] += updated
+            summary["chunks"] += 1
+            print(
+                f"Chunk {summary['chunks']}: {len(rows)} wallets, {updated} updated "
+                f"in {time.perf_counter() - chunk_started:.2f}s ({summary['total']} processed)"
+            )
+
+    summary["elapsed"] = time.perf_counter() - started
+    summary["rate"] = summary["total"] / summary["elapsed"] if summary["elapsed"] > 0 else 0.0
+    return summary
+
+
+def sync_user_wallets(user_id):
+    """Re-sync all of one user's wallets concurrently. Returns (synced, updated, failed)."""
+    config = current_app.config
+    rows = wallet_rows(Wallet.query.filter_by(user_id=user_id)).all()
+    if not rows:
+        return 0, 0, 0
+    app = current_app._get_current_object()
+    with ThreadPoolExecutor(max_workers=min(len(rows), config["SYNC_WORKERS"])) as executor:
+        return sync_rows(rows, executor, app, config["SYNC_TIMEOUT"])
@@ -0,0 +1,406 @@
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import pyotp
+import requests
+from flask import current_app
+from sqlalchemy import bindparam, update
+from app import db, blockchain, node_events
+from app.models.user import User
+from app.models.wallet import Wallet
+from app.models.escrow import Escrow
+from app.cache import balance_cache
+from app import ledger
+
+GENESIS_WALLET = "Genesis Wallet"
+
+class TransferError(Exception):
+    """A transfer was rejected; ``status`` is the HTTP status the route should return."""
+
+    def __init__(self, message, status=400, details=None):
+        super().__init__(message)
+        self.message = message
+        self.status = status
+        self.details = details
+
+    def to_dict(self):
+        body = {"error": self.message}
+        if self.details:
+            body["details"] = self.details
+        return body
+
+def load_recipient(email, lock=False):
+    """Return (user, Genesis wallet) for ``email`` in one query, with None for anything missing.
+
+    ``lock`` adds FOR UPDATE OF the user row (the wallet sits on the nullable
+    side of the outer join, which Postgres cannot lock), holding the
+    recipient steady until the caller commits. SQLite ignores it.
+    """
+    query = (
+        db.session.query(User, Wallet)
+        .outerjoin(Wallet, (Wallet.user_id == User.id) & (Wallet.name == GENESIS_WALLET))
+        .filter(User.email == email)
+    )
+    if lock:
+        query = query.with_for_update(of=User)
+    row = query.first()
+    return row if row else (None, None)
+
+def provision_recipient(email):
+    """Return (user, Genesis wallet) for ``email``, creating whichever is missing.
+
+    New rows are flushed, not committed, so they land with the caller's
+    transaction. A new user gets a random password and is marked verified,
+    since claiming an escrow proves they own the address.
+    """
+    user, wallet = load_recipient(email)
+    if user is None:
+        user = User(email=email, verified=True)
+        user.set_password(str(uuid.uuid4()))  # Temporary password for new user
+        db.session.add(user)
+        db.session.flush()
+    if wallet is None:
+        wallet = Wallet(user_id=user.id, name=GENESIS_WALLET, address=str(uuid.uuid4()))
+        db.session.add(wallet)
+        db.session.flush()
+    return user, wallet
+
+def _entry(wallet_id, user_id, kind, amount, counterparty=None, tx_id=None):
+    return {"wallet_id": wallet_id, "user_id": user_id, "kind": kind, "amount": amount, "counterparty": counterparty, "tx_id": tx_id}
+
+def _check_sender(sender, sender_email):
+    if not sender or sender.email != sender_email:
+        raise TransferError("Unauthorized: Invalid sender email or not your account", 403)
+    if not sender.verified or not sender.kyc_completed:
+        raise TransferError("Sender not verified or KYC incomplete")
+
+def debit(wallet_id, amount):
+    """Atomically take ``amount`` from a wallet; False if the balance does not cover it."""
+    result = db.session.execute(
+        update(Wallet)
+        .where(Wallet.id == wallet_id, Wallet.balance >= amount)
+        .values(balance=Wallet.balance - amount)
+    )
+    return result.rowcount == 1
+
+def credit(wallet_id, amount):
+    db.session.execute(update(Wallet).where(Wallet.id == wallet_id).values(balance=Wallet.balance + amount))
+
+def send(sender, sender_email, recipient_email, amount):
+    """Move ``amount`` from the sender's Genesis wallet to the recipient.
+
+    ``sender`` is the request's Principal, so only the recipient needs a
+    query. Verified, KYC-complete recipients are paid on-chain; anyone else
+    gets an escrow they can claim by email. Funds are reserved with a guarded
+    UPDATE and committed before the node is called, so racing transfers can
+    never overdraw a wallet and no write lock (on SQLite, the whole
+    database's) is held across the node round trip. A second short
+    transaction then books the transfer, or releases the reservation if the
+    node refused it. Raises ``TransferError`` on rejection; returns a result
+    dict.
+    """
+    _check_sender(sender, sender_email)
+    recipient, recipient_wallet = load_recipient(recipient_email, lock=True)
+
+    native = recipient is not None and recipient.verified and recipient.kyc_completed
+    if native and not recipient_wallet:
+        raise TransferError("Recipient wallet not found")
+
+    if not sender.wallet_id or not debit(sender.wallet_id, amount):
+        db.session.rollback()
+        raise TransferError("Insufficient balance or wallet not found")
+
+    if not native:  # Alien user (escrow)
+        escrow = Escrow(
+            sender_id=sender.id,
+            recipient_email=recipient_email,
+            amount=amount,
+            otp=pyotp.TOTP(pyotp.random_base32()).now()
+        )
+        db.session.add(escrow)
+        ledger.record_many([_entry(sender.wallet_id, sender.id, "Escrow", -amount, recipient_email)])
+        db.session.commit()
+        # The escrowed amount is only held locally, so there is nothing to
+        # re-sync from the node here (a sync would undo the hold).
+        balance_cache.invalidate(sender.wallet_address)
+        return {"escrow": escrow, "sender_wallet": sender.wallet_address}
+
+    receiver_id, receiver_user_id, receiver_address = recipient_wallet.id, recipient_wallet.user_id, recipient_wallet.address
+    call = node_events.mark_in_flight([sender.wallet_id, receiver_id])
+    db.session.commit()  # The reservation
+    balance_cache.invalidate(sender.wallet_address)
+
+    tx = {"sender": sender.wallet_address, "receiver": receiver_address, "amount": amount}
+    try:
+        response = blockchain.post("/transaction", json=tx)
+        response.raise_for_status()
+        result = response.json()
+    except requests.RequestException as e:
+        credit(sender.wallet_id, amount)
+        node_events.clear_in_flight(call)
+        db.session.commit()
+        balance_cache.invalidate(sender.wallet_address)
+        raise TransferError("Blockchain transaction failed", 500, str(e))
+
+    tx_id = result.get("tx_id", "simulated-tx-id")
+    ledger.record_many([
+        _entry(sender.wallet_id, sender.id, "Sent", -amount, receiver_address, tx_id),
+        _entry(receiver_id, receiver_user_id, "Received", amount, sender.wallet_address, tx_id),
+    ])
+    # Applied as a delta: other reservations against these wallets may be in
+    # flight, so the node's absolute balances would overwrite them.
+    credit(receiver_id, amount)
+    node_events.clear_in_flight(call)
+    db.session.commit()
+    # No sync with the node afterwards, even when it reports no balances: the
+    # booked deltas are the result, and a sync would write absolute values
+    # over the same in-flight reservations. Drift is left to the node's
+    # webhook and `flask cli sync-blockchain`.
+    balance_cache.invalidate(sender.wallet_address, receiver_address)
+
+    return {
+        "tx_id": tx_id,
+        "sender_wallet": sender.wallet_address,
+        "recipient_wallet": receiver_address,
+    }
+
+def _chunks(items, size):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+def load_recipients(emails):
+    """Map email -> (user, Genesis wallet or None) using IN queries of bounded size."""
+    recipients = {}
+    for chunk in _chunks(sorted(emails), 500):
+        rows = (
+            db.session.query(User, Wallet)
+            .outerjoin(Wallet, (Wallet.user_id == User.id) & (Wallet.name == GENESIS_WALLET))
+            .filter(User.email.in_(chunk))
+            .all()
+        )
+        recipients.update({user.email: (user, wallet) for user, wallet in rows})
+    return recipients
+
+def _submit(app, tx):
+    try:
+        with app.app_context():
+            response = blockchain.post("/transaction", json=tx)
+            response.raise_for_status()
+            return response.json().get("tx_id", "simulated-tx-id"), None
+    except (requests.RequestException, ValueError) as e:
+        return None, str(e)
+
+def send_batch(sender, sender_email, entries):
+    """Pay many recipients from the sender's Genesis wallet in one operation.
+
+    Rows are validated up front and the total is debited once. Recipients are
+    resolved with IN queries and everyone who is not a native recipient gets
+    an escrow; the debit and the escrows commit before the node is called, so
+    no write lock is held while the batch is submitted. Native recipients are
+    then submitted to the node in concurrent batches, and a second
+    transaction credits them with one executemany UPDATE and refunds the
+    rows that failed. Returns ``(results, escrows)`` where ``results`` has
+    one dict per input row and ``escrows`` maps row index to the new Escrow.
+    """
+    config = current_app.config
+    if len(entries) > config["TRANSFER_BATCH_MAX_ROWS"]:
+        raise TransferError(f"A batch may contain at most {config['TRANSFER_BATCH_MAX_ROWS']} transfers")
+
+    results = []
+    valid = []
+    for index, entry in enumerate(entries):
+        recipient_email = entry.get("recipient_email") if isinstance(entry, dict) else None
+        row = {"index": index, "recipient_email": recipient_email}
+        results.append(row)
+        try:
+            amount = float(entry.get("amount", 0))
+        except (AttributeError, TypeError, ValueError):
+            amount = 0
+        row["amount"] = amount
+        if not recipient_email or amount <= 0:
+            row.update(status="failed", error="recipient_email and a positive amount are required")
+            continue
+        valid.append(row)
+
+    _check_sender(sender, sender_email)
+
+    total = sum(row["amount"] for row in valid)
+    if not valid:
+        db.session.rollback()
+        return results, {}
+    if not sender.wallet_id or not debit(sender.wallet_id, total):
+        db.session.rollback()
+        raise TransferError("Insufficient balance or wallet not found")
+
+    recipients = load_recipients({row["recipient_email"] for row in valid})
+    native, escrowed = [], []
+    for row in valid:
+        user, wallet = recipients.get(row["recipient_email"], (None, None))
+        if user is not None and user.verified and user.kyc_completed:
+            if wallet is None:
+                row.update(status="failed", error="Recipient wallet not found")
+            else:
+                row["wallet"] = (wallet.id, wallet.user_id, wallet.address)
+                native.append(row)
+        else:
+            escrowed.append(row)
+
+    escrows = {}
+    for row in escrowed:
+        escrow = Escrow(
+            sender_id=sender.id,
+            recipient_email=row["recipient_email"],
+            amount=row["amount"],
+            otp=pyotp.TOTP(pyotp.random_base32()).now()
+        )
+        escrows[row["index"]] = escrow
+    db.session.add_all(escrows.values())
+    db.session.flush()
+    for row in escrowed:
+        row.update(status="escrow", escrow_id=escrows[row["index"]].id)
+    ledger.record_many([_entry(sender.wallet_id, sender.id, "Escrow", -row["amount"], row["recipient_email"]) for row in escrowed])
+    call = node_events.mark_in_flight([sender.wallet_id] + [row["wallet"][0] for row in native]) if native else None
+    db.session.commit()  # The reservation and the escrows
+
+    app = current_app._get_current_object()
+    with ThreadPoolExecutor(max_workers=config["TRANSFER_BATCH_WORKERS"]) as executor:
+        for chunk in _chunks(native, config["TRANSFER_BATCH_SUBMIT_SIZE"]):
+            txs = [{"sender": sender.wallet_address, "receiver": row["wallet"][2], "amount": row["amount"]} for row in chunk]
+            for row, (tx_id, error) in zip(chunk, executor.map(lambda tx: _submit(app, tx), txs)):
+                if error:
+                    row.update(status="failed", error="Blockchain transaction failed", details=error)
+                else:
+                    row.update(status="sent", tx_id=tx_id)
+
+    credits = {}
+    for row in native:
+        if row["status"] == "sent":
+            wallet_id = row["wallet"][0]
+            credits[wallet_id] = credits.get(wallet_id, 0.0) + row["amount"]
+    if credits:
+        db.session.connection().execute(
+            update(Wallet.__table__)
+            .where(Wallet.__table__.c.id == bindparam("credit_wallet_id"))
+            .values(balance=Wallet.__table__.c.balance + bindparam("credit_amount")),
+            [{"credit_wallet_id": wallet_id, "credit_amount": amount} for wallet_id, amount in credits.items()],
+        )
+
+    entries = []
+    for row in native:
+        if row["status"] == "sent":
+            wallet_id, user_id, address = row["wallet"]
+            entries.append(_entry(sender.wallet_id, sender.id, "Sent", -row["amount"], address, row["tx_id"]))
+            entries.append(_entry(wallet_id, user_id, "Received", row["amount"], sender.wallet_address, row["tx_id"]))
+    ledger.record_many(entries)
+
+    refund = sum(row["amount"] for row in valid if row["status"] == "failed")
+    if refund:
+        credit(sender.wallet_id, refund)
+    if call:
+        node_events.clear_in_flight(call)
+
+    db.session.commit()
+    balance_cache.invalidate(sender.wallet_address, *[row["wallet"][2] for row in native])
+
+    for row in native:
+        row.pop("wallet")
+    return results, escrows
+
+def claim_all(email, otp):
+    """Claim every pending, unexpired escrow sent to ``email`` in one operation.
+
+    ``otp`` must match one of them, which proves the caller reads the
+    mailbox. Escrows come from the ix_escrow_recipient_email_status_expires_at
+    index, the recipient and Genesis wallet are created at most once, and
+    the escrows are marked Claimed with one guarded UPDATE (so a concurrent
+    claim or sweep gets nothing twice); that commits before the node is
+    called. The node receives one transaction per sender for that sender's
+    total, submitted concurrently. A second transaction credits the
+    recipient once, books both sides of each transaction with its tx_id,
+    and returns the escrows of senders whose transaction failed to Pending
+    for a later claim. Raises ``TransferError`` on rejection; returns a
+    result dict.
+    """
+    config = current_app.config
+    limit = config["ESCROW_CLAIM_MAX_ROWS"]
+    escrows = (
+        db.session.query(Escrow.id, Escrow.sender_id, Escrow.amount, Escrow.otp)
+        .filter(Escrow.recipient_email == email, Escrow.status == "Pending", Escrow.expires_at >= datetime.utcnow())
+        .order_by(Escrow.id)
+        .limit(limit + 1)
+        .with_for_update()
+        .all()
+    )
+    more = len(escrows) > limit
+    escrows = escrows[:limit]
+    if not escrows:
+        raise TransferError("No pending escrows for this email")
+    if not otp or not any(escrow.otp == otp for escrow in escrows):
+        raise TransferError("Invalid OTP or email")
+
+    ids = [escrow.id for escrow in escrows]
+    flipped = 0
+    for chunk in _chunks(ids, 500):
+        flipped += db.session.execute(
+            update(Escrow).where(Escrow.id.in_(chunk), Escrow.status == "Pending").values(status="Claimed")
+        ).rowcount
+    if flipped != len(ids):
+        db.session.rollback()
+        raise TransferError("Escrows changed while claiming, please try again", 409)
+
+    user, wallet = provision_recipient(email)
+    user_id, wallet_id, wallet_address = user.id, wallet.id, wallet.address
+    by_sender = {}
+    for escrow in escrows:
+        group = by_sender.setdefault(escrow.sender_id, {"amount": 0.0, "escrow_ids": []})
+        group["amount"] += escrow.amount
+        group["escrow_ids"].append(escrow.id)
+    sender_wallets = {}
+    for chunk in _chunks(sorted(by_sender), 500):
+        rows = db.session.query(Wallet.user_id, Wallet.id, Wallet.address).filter(Wallet.user_id.in_(chunk), Wallet.name == GENESIS_WALLET)
+        sender_wallets.update({row.user_id: (row.id, row.address) for row in rows})
+    call = node_events.mark_in_flight([wallet_id] + [sender_wallet_id for sender_wallet_id, _ in sender_wallets.values()])
+    db.session.commit()  # The claim and the recipient, before any node call
+
+    app = current_app._get_current_object()
+    senders = [sender_id for sender_id in by_sender if sender_id in sender_wallets]
+    txs = [{"sender": sender_wallets[sender_id][1], "receiver": wallet_address, "amount": by_sender[sender_id]["amount"]} for sender_id in senders]
+    with ThreadPoolExecutor(max_workers=config["TRANSFER_BATCH_WORKERS"]) as executor:
+        for sender_id, (tx_id, error) in zip(senders, executor.map(lambda tx: _submit(app, tx), txs)):
+            by_sender[sender_id].update(tx_id=tx_id, error=error)
+
+    claimed, failed, entries = [], [], []
+    for sender_id, group in by_sender.items():
+        if sender_id not in sender_wallets:
+            group["error"] = "Sender wallet not found"
+        if group.get("error"):  # Back to Pending for a later claim
+            failed.append(group)
+            continue
+        claimed.append(group)
+        sender_wallet_id, sender_address = sender_wallets[sender_id]
+        entries.append(_entry(wallet_id, user_id, "Received", group["amount"], sender_address, group["tx_id"]))
+        # The escrow already took the amount from the sender's balance; this
+        # zero entry ties the node transaction to their wallet so the node's
+        # webhook for it is recognised as booked and not debited again.
+        entries.append(_entry(sender_wallet_id, sender_id, "Claimed", 0.0, email, group["tx_id"]))
+
+    unclaimed = [escrow_id for group in failed for escrow_id in group["escrow_ids"]]
+    for chunk in _chunks(unclaimed, 500):
+        db.session.execute(update(Escrow).where(Escrow.id.in_(chunk), Escrow.status == "Claimed").values(status="Pending"))
+    total = sum(group["amount"] for group in claimed)
+    if total:
+        credit(wallet_id, total)
+    ledger.record_many(entries)
+    node_events.clear_in_flight(call)
+    db.session.commit()
+    balance_cache.invalidate(wallet_address, *[address for _, address in sender_wallets.values()])
+
+    return {
+        "wallet_address": wallet_address,
+        "claimed": sum(len(group["escrow_ids"]) for group in claimed),
+        "amount": total,
+        "tx_ids": [group["tx_id"] for group in claimed],
+        "failed": [{"escrow_ids": group["escrow_ids"], "amount": group["amount"], "error": group["error"]} for group in failed],
+        "more": more,
+    }
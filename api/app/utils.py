@@ -1,24 +1,28 @@
 import requests
-from flask import current_app
-from app import db
+from app import db, blockchain
 from app.models.wallet import Wallet
+from app.cache import balance_cache
+from app import ledger
 
-def sync_wallet_with_blockchain(wallet_address):
-    blockchain_url = current_app.config["NILOTIC_API"]
+def sync_wallet_with_blockchain(wallet_address, timeout=None, tx_id=None):
+    """Copy the node's balance and stake onto the wallet row.
+
+    ``tx_id`` names a node transaction the sync takes in; its Sync entry is
+    booked under it (even at zero) so the node's event for it is skipped.
+    """
     try:
-        response = requests.get(f"{blockchain_url}/balance?address={wallet_address}", timeout=30)
-        response.raise_for_status()
-        balance_data = response.json()
-        blockchain_balance = float(balance_data.get("balance", 0.0))
-        blockchain_stake = float(balance_data.get("stake", 0.0))
+        blockchain_balance, blockchain_stake = blockchain.get_balance(wallet_address, timeout=timeout)
 
         wallet = Wallet.query.filter_by(address=wallet_address).first()
         if wallet:
-            if wallet.balance != blockchain_balance or wallet.stake != blockchain_stake:
+            if wallet.balance != blockchain_balance or wallet.stake != blockchain_stake or tx_id:
                 print(f"Syncing {wallet_address}: Local(balance={wallet.balance}, stake={wallet.stake}) -> Blockchain(balance={blockchain_balance}, stake={blockchain_stake})")
+                if wallet.balance != blockchain_balance or tx_id:
+                    ledger.record(wallet, "Sync", blockchain_balance - (wallet.balance or 0.0), tx_id=tx_id)
                 wallet.balance = blockchain_balance
                 wallet.stake = blockchain_stake
                 db.session.commit()
+            balance_cache.set(wallet_address, blockchain_balance, blockchain_stake)
             return True
         return False
     except requests.RequestException as e:
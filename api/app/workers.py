@@ -0,0 +1,86 @@
+import os
+import threading
+
+_registry = []
+
+def start_all():
+    """Start every configured background worker in this process.
+
+    Call once per serving process (after any fork); workers with no threads
+    configured stay idle.
+    """
+    for worker in _registry:
+        worker.start()
+
+def stop_all(timeout=None):
+    for worker in _registry:
+        worker.stop(timeout)
+
+
+class BackgroundWorker:
+    """A small pool of daemon threads that repeatedly run ``task()`` inside an app context.
+
+    ``task`` returns the number of items it processed; the threads keep calling
+    it while there is work and otherwise sleep for ``interval`` seconds or until
+    ``wake()`` is called. Threads start lazily on the first ``wake()`` (or an
+    explicit ``start()``) and are restarted after a fork, so the pool is safe
+    to configure in ``create_app`` before a pre-forking server spawns workers.
+    """
+
+    def __init__(self, name, task):
+        self.name = name
+        self.task = task
+        self.app = None
+        self.threads = 0
+        self.interval = 5.0
+        self._pid = None
+        self._threads = []
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        _registry.append(self)
+
+    def init_app(self, app, threads, interval):
+        self.app = app
+        self.threads = threads
+        self.interval = interval
+
+    def start(self):
+        if self.app is None or self.threads <= 0:
+            return
+        with self._lock:
+            if self._pid == os.getpid() and any(t.is_alive() for t in self._threads):
+                return
+            self._stop.clear()
+            self._threads = [
+                threading.Thread(target=self._run, name=f"{self.name}-{i}", daemon=True)
+                for i in range(self.threads)
+            ]
+            for thread in self._threads:
+                thread.start()
+            self._pid = os.getpid()
+
+    def wake(self):
+        self.start()
+        self._wake.set()
+
+    def stop(self, timeout=None):
+        self._stop.set()
+        self._wake.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+        self._pid = None
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                with self.app.app_context():
+                    processed = self.task()
+            except Exception as e:
+                print(f"{self.name} worker error: {e}")
+                processed = 0
+            if processed:
+                continue
+            self._wake.wait(self.interval)
+            self._wake.clear()
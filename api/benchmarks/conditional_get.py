@@ -0,0 +1,140 @@
+"""Bytes and CPU per poll of the wallet and history reads, with and without If-None-Match.
+
+Seeds a throwaway SQLite database with one user, ``--wallets`` wallets and
+``--entries`` ledger entries, then polls GET /wallet/balance (a balance
+cache hit), /wallet/list and /transaction/history through the Flask test
+client: ``--polls`` times as a first visit and as many again revalidating
+with the ETag the first response carried (a 304 when nothing changed). It
+also times serializing the history body with Flask's standard JSON provider
+and with FastJSONProvider (orjson, when installed).
+
+    cd api && python benchmarks/conditional_get.py
+    python benchmarks/conditional_get.py --polls 2000 --entries 500 --json
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+API_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, API_DIR)
+
+from fakes import FakeNode
+
+
+def seed(db, wallets, entries):
+    from datetime import datetime, timedelta
+    from app import ledger
+    from app.models.user import User
+    from app.models.wallet import Wallet
+
+    user = User(email="bench@example.com", verified=True, kyc_completed=True, password_hash="-")
+    db.session.add(user)
+    db.session.flush()
+    rows = [Wallet(user_id=user.id, name=f"Wallet {i}", address=f"bench-{i:06d}", balance=100.0, stake=1.0) for i in range(wallets)]
+    db.session.add_all(rows)
+    db.session.flush()
+    started = datetime.utcnow() - timedelta(days=1)
+    ledger.record_many([
+        {"wallet_id": rows[i % wallets].id, "user_id": user.id, "kind": "Received", "amount": 1.0,
+         "counterparty": "someone@example.com", "tx_id": f"tx-{i}", "created_at": started + timedelta(seconds=i)}
+        for i in range(entries)
+    ])
+    db.session.commit()
+    return user.id, rows[0].address
+
+
+def poll(client, path, headers, count):
+    """Return (body bytes, CPU microseconds) per request, and the status of the last one."""
+    body_bytes = 0
+    started = time.process_time()
+    for _ in range(count):
+        response = client.get(path, headers=headers)
+        body_bytes += len(response.data)
+    return body_bytes / count, (time.process_time() - started) / count * 1e6, response.status_code
+
+
+def time_dumps(provider, obj, count):
+    started = time.process_time()
+    for _ in range(count):
+        provider.dumps(obj, separators=(",", ":"))
+    return (time.process_time() - started) / count * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--polls", type=int, default=500)
+    parser.add_argument("--wallets", type=int, default=5)
+    parser.add_argument("--entries", type=int, default=200, help="ledger entries; history pages show up to 50")
+    parser.add_argument("--json", action="store_true", help="print machine-readable results")
+    args = parser.parse_args()
+
+    node = FakeNode(initial_balance=100.0).start()
+    with tempfile.TemporaryDirectory() as workdir:
+        os.environ.update(
+            DB_URI=f"sqlite:///{os.path.join(workdir, 'bench.db')}",
+            NILOTIC_API=node.url,
+            RATELIMIT_ENABLED="False",
+            METRICS_ENABLED="False",
+            FLASK_DEBUG="False",
+        )
+        from flask.json.provider import DefaultJSONProvider
+        from flask_jwt_extended import create_access_token
+        from app import create_app, db
+        from app.jsonprovider import FastJSONProvider
+
+        app = create_app()
+        with app.app_context():
+            db.create_all()
+            user_id, address = seed(db, args.wallets, args.entries)
+            token = create_access_token(identity=str(user_id))
+        auth = {"Authorization": f"Bearer {token}"}
+        client = app.test_client()
+
+        results = {"polls": args.polls, "wallets": args.wallets, "entries": args.entries, "routes": {}}
+        for name, path, headers in (
+            ("balance", f"/wallet/balance/{address}", {}),
+            ("list", "/wallet/list", auth),
+            ("history", "/transaction/history", auth),
+        ):
+            first = client.get(path, headers=headers)  # Also warms the balance cache
+            etag = first.headers["ETag"]
+            full_bytes, full_us, _ = poll(client, path, headers, args.polls)
+            cached_bytes, cached_us, status = poll(client, path, {**headers, "If-None-Match": etag}, args.polls)
+            results["routes"][name] = {
+                "full_bytes": round(full_bytes),
+                "full_cpu_us": round(full_us, 1),
+                "revalidated_status": status,
+                "revalidated_bytes": round(cached_bytes),
+                "revalidated_cpu_us": round(cached_us, 1),
+                "bytes_saved": round(full_bytes - cached_bytes),
+                "cpu_saved_us": round(full_us - cached_us, 1),
+            }
+
+        history = json.loads(client.get("/transaction/history", headers=auth).data)
+        fast = FastJSONProvider(app)
+        standard_us = time_dumps(DefaultJSONProvider(app), history, args.polls)
+        fast_us = time_dumps(fast, history, args.polls)
+        results["json"] = {
+            "orjson": fast._orjson is not None,
+            "history_standard_us": round(standard_us, 1),
+            "history_fast_us": round(fast_us, 1),
+        }
+    node.stop()
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"{args.polls} polls per case, {args.wallets} wallets, {args.entries} ledger entries")
+    print(f"{'route':<8} {'200 bytes':>10} {'200 us':>8} {'304 bytes':>10} {'304 us':>8} {'saved bytes':>12} {'saved us':>9}")
+    for name, r in results["routes"].items():
+        print(f"{name:<8} {r['full_bytes']:>10} {r['full_cpu_us']:>8} {r['revalidated_bytes']:>10} {r['revalidated_cpu_us']:>8} {r['bytes_saved']:>12} {r['cpu_saved_us']:>9}")
+    j = results["json"]
+    provider = "orjson" if j["orjson"] else "standard library (orjson not installed)"
+    print(f"history body serialization: {j['history_standard_us']} us standard, {j['history_fast_us']} us fast ({provider})")
+
+
+if __name__ == "__main__":
+    main()
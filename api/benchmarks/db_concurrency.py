@@ -0,0 +1,154 @@
+"""Write throughput of concurrent transfers under each DB_PROFILE.
+
+Each profile runs in a fresh interpreter against a new database: ``--writers``
+threads each commit transfer-shaped transactions (debit one wallet, credit
+another, two ledger rows) for ``--seconds``, while ``--readers`` threads page
+balances the way GET /wallets does. Reported per profile: commits per second,
+``database is locked`` errors and p50/p95 commit latency. SQLite profiles use
+a temporary file; pass ``--db-uri`` (an empty Postgres database) to add the
+server profile.
+
+    cd api && python benchmarks/db_concurrency.py
+    python benchmarks/db_concurrency.py --writers 16 --readers 4 --db-uri postgresql://localhost/bench --json
+"""
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+API_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+WALLETS = 200
+
+
+def percentile(values, pct):
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def child(writers, readers, seconds):
+    sys.path.insert(0, API_DIR)
+    from sqlalchemy import select, update
+    from sqlalchemy.exc import OperationalError
+    from app import create_app, db
+    from app.models.ledger import LedgerEntry
+    from app.models.user import User
+    from app.models.wallet import Wallet
+
+    app = create_app()
+    with app.app_context():
+        db.create_all()
+        user = User(email="bench@example.com", password_hash="-", verified=True)
+        db.session.add(user)
+        db.session.flush()
+        db.session.add_all(
+            Wallet(user_id=user.id, name=f"Wallet {i}", address=f"bench-{i:06d}", balance=1000.0) for i in range(WALLETS)
+        )
+        db.session.commit()
+        wallet_ids = [row.id for row in db.session.execute(select(Wallet.id))]
+        user_id = user.id
+
+    stop = time.monotonic() + seconds
+    latencies, locked, other_errors, reads = [], [], [], []
+    lock = threading.Lock()
+
+    def write():
+        rng = random.Random()
+        with app.app_context():
+            while time.monotonic() < stop:
+                sender, recipient = rng.sample(wallet_ids, 2)
+                started = time.perf_counter()
+                try:
+                    db.session.execute(update(Wallet).where(Wallet.id == sender).values(balance=Wallet.balance - 1.0))
+                    db.session.execute(update(Wallet).where(Wallet.id == recipient).values(balance=Wallet.balance + 1.0))
+                    db.session.add_all([
+                        LedgerEntry(wallet_id=sender, user_id=user_id, kind="Sent", amount=-1.0),
+                        LedgerEntry(wallet_id=recipient, user_id=user_id, kind="Received", amount=1.0),
+                    ])
+                    db.session.commit()
+                    with lock:
+                        latencies.append(time.perf_counter() - started)
+                except OperationalError as e:
+                    db.session.rollback()
+                    with lock:
+                        (locked if "locked" in str(e) else other_errors).append(str(e.orig))
+
+    def read():
+        with app.app_context():
+            count = 0
+            while time.monotonic() < stop:
+                db.session.execute(select(Wallet.address, Wallet.balance).where(Wallet.user_id == user_id)).all()
+                db.session.commit()
+                count += 1
+            with lock:
+                reads.append(count)
+
+    threads = [threading.Thread(target=write) for _ in range(writers)] + [threading.Thread(target=read) for _ in range(readers)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    with app.app_context():
+        total = db.session.execute(select(db.func.sum(Wallet.balance))).scalar()
+    print(json.dumps({
+        "commits": len(latencies),
+        "commits_per_s": round(len(latencies) / elapsed, 1),
+        "reads_per_s": round(sum(reads) / elapsed, 1),
+        "locked_errors": len(locked),
+        "other_errors": len(other_errors),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2) if latencies else None,
+        "p95_ms": round(percentile(latencies, 95) * 1000, 2) if latencies else None,
+        "balanced": abs(total - WALLETS * 1000.0) < 1e-6,  # Transfers net to zero
+    }))
+
+
+def run_profile(profile, uri, args):
+    env = dict(os.environ, DB_URI=uri, DB_PROFILE=profile, DB_REPLICA_URIS="")
+    env.setdefault("DB_POOL_SIZE", str(args.writers + args.readers))
+    output = subprocess.run(
+        [sys.executable, __file__, "--child", str(args.writers), str(args.readers), str(args.seconds)],
+        env=env, capture_output=True, text=True, check=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    if len(sys.argv) == 5 and sys.argv[1] == "--child":
+        return child(int(sys.argv[2]), int(sys.argv[3]), float(sys.argv[4]))
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--writers", type=int, default=8)
+    parser.add_argument("--readers", type=int, default=2)
+    parser.add_argument("--seconds", type=float, default=5.0, help="duration per profile")
+    parser.add_argument("--db-uri", help="an empty server database to run the server profile against")
+    parser.add_argument("--json", action="store_true", help="print machine-readable results")
+    args = parser.parse_args()
+
+    results = {}
+    with tempfile.TemporaryDirectory() as workdir:
+        for profile in ("none", "sqlite"):
+            uri = f"sqlite:///{os.path.join(workdir, profile + '.db')}"
+            results[profile] = run_profile(profile, uri, args)
+    if args.db_uri:
+        results["server"] = run_profile("server", args.db_uri, args)
+
+    if args.json:
+        print(json.dumps({"writers": args.writers, "readers": args.readers, "seconds": args.seconds, "profiles": results}, indent=2))
+        return
+    print(f"{args.writers} writers, {args.readers} readers, {args.seconds}s per profile")
+    print(f"{'profile':<8} {'commits/s':>10} {'reads/s':>10} {'locked':>7} {'p50 ms':>8} {'p95 ms':>8}")
+    for profile, r in results.items():
+        print(f"{profile:<8} {r['commits_per_s']:>10} {r['reads_per_s']:>10} {r['locked_errors']:>7} {r['p50_ms']!s:>8} {r['p95_ms']!s:>8}")
+
+
+if __name__ == "__main__":
+    main()
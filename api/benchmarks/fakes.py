@@ -0,0 +1,287 @@
+"""Local stand-ins for NILOTIC_API and the SMTP server, for benchmarks.
+
+``FakeNode`` serves /balance, /transaction, /mine and /stake with a
+configurable latency (mean plus uniform jitter) and error rate per
+endpoint. Given a webhook URL and secret it also posts signed
+transaction and block events, like the node does to POST /node/events. ``SmtpSink`` accepts every message and keeps it by recipient so
+a load driver can read verification links out of the mail. Both run on
+daemon threads in the calling process.
+
+    python benchmarks/fakes.py --node-port 8080 --smtp-port 1025 --latency /mine=0.5 --error-rate /transaction=0.01
+"""
+import argparse
+import email
+import hashlib
+import hmac
+import json
+import random
+import re
+import socketserver
+import threading
+import time
+import uuid
+import urllib.error
+import urllib.request
+from collections import defaultdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+ENDPOINTS = ("/balance", "/transaction", "/mine", "/stake")
+WEBHOOK_ATTEMPTS = 30
+
+
+class FakeNode:
+    """A tiny blockchain node that keeps balances in memory.
+
+    New addresses start with ``initial_balance`` so transfers and stakes
+    succeed without seeding. ``latency``, ``jitter`` and ``error_rate`` map
+    an endpoint (e.g. "/mine") to seconds or a 0-1 probability of a 503.
+    """
+
+    def __init__(self, port=0, latency=None, jitter=None, error_rate=None, initial_balance=1000.0, reward=5.0, webhook_url=None, webhook_secret=None):
+        self.webhook_url = webhook_url
+        self.webhook_secret = webhook_secret
+        self.latency = latency or {}
+        self.jitter = jitter or {}
+        self.error_rate = error_rate or {}
+        self.initial_balance = initial_balance
+        self.reward = reward
+        self.balances = {}
+        self.stakes = defaultdict(float)
+        self.calls = defaultdict(int)
+        self._lock = threading.Lock()
+        self.server = ThreadingHTTPServer(("127.0.0.1", port), self._handler())
+        self.server.daemon_threads = True
+        self.port = self.server.server_address[1]
+        self.url = f"http://127.0.0.1:{self.port}"
+
+    def start(self):
+        threading.Thread(target=self.server.serve_forever, name="fake-node", daemon=True).start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def _balance(self, address):
+        return self.balances.setdefault(address, self.initial_balance)
+
+    def _delay_or_fail(self, endpoint):
+        self.calls[endpoint] += 1
+        delay = self.latency.get(endpoint, 0.0) + random.uniform(0, self.jitter.get(endpoint, 0.0))
+        if delay:
+            time.sleep(delay)
+        return random.random() < self.error_rate.get(endpoint, 0.0)
+
+    def handle(self, method, path, query, body):
+        """Return ``(status, payload)`` for one request."""
+        if path not in ENDPOINTS:
+            return 404, {"error": "not found"}
+        if self._delay_or_fail(path):
+            return 503, {"error": "injected failure"}
+        with self._lock:
+            if path == "/balance":
+                address = (query.get("address") or [""])[0]
+                return 200, {"balance": self._balance(address), "stake": self.stakes[address]}
+            if path == "/stake":
+                address, amount = body.get("address"), float(body.get("amount", 0))
+                self.balances[address] = self._balance(address) - amount
+                self.stakes[address] += amount
+                return 200, {"address": address, "stake": self.stakes[address]}
+            if path == "/transaction":
+                sender, receiver, amount = body.get("sender"), body.get("receiver"), float(body.get("amount", 0))
+                if self._balance(sender) < amount:
+                    return 400, {"error": "insufficient balance"}
+                self.balances[sender] -= amount
+                self.balances[receiver] = self._balance(receiver) + amount
+                tx_id = uuid.uuid4().hex
+                self._notify("transaction", tx_id, [
+                    {"address": sender, "balance_delta": -amount, "counterparty": receiver},
+                    {"address": receiver, "balance_delta": amount, "counterparty": sender},
+                ])
+                return 200, {"tx_id": tx_id, "sender_balance": self.balances[sender], "receiver_balance": self.balances[receiver]}
+            address, stake = body.get("address"), float(body.get("stake", 0))
+            self.balances[address] = self._balance(address) - stake + self.reward
+            self.stakes[address] += stake
+            block_hash = uuid.uuid4().hex
+            self._notify("block", block_hash, [{"address": address, "balance_delta": self.reward - stake, "stake_delta": stake}])
+            return 200, {"reward": self.reward, "blockHash": block_hash}
+
+    def _notify(self, kind, tx_id, changes):
+        """Post a signed event to the webhook in the background, if one is configured.
+
+        Like the node, a delivery that is not answered with a 2xx is retried
+        (after Retry-After, if given) up to WEBHOOK_ATTEMPTS times.
+        """
+        if not self.webhook_url:
+            return
+        body = json.dumps({"id": uuid.uuid4().hex, "type": kind, "tx_id": tx_id, "changes": changes}).encode()
+        signature = "sha256=" + hmac.new((self.webhook_secret or "").encode(), body, hashlib.sha256).hexdigest()
+        request = urllib.request.Request(self.webhook_url, data=body, headers={"Content-Type": "application/json", "X-Nilotic-Signature": signature})
+
+        def post():
+            for attempt in range(1, WEBHOOK_ATTEMPTS + 1):
+                delay = 0.5
+                try:
+                    urllib.request.urlopen(request, timeout=10).close()
+                    return
+                except urllib.error.HTTPError as e:
+                    delay = float(e.headers.get("Retry-After") or delay)
+                    failure = f"HTTP {e.code}"
+                except OSError as e:
+                    failure = str(e)
+                if attempt < WEBHOOK_ATTEMPTS:
+                    time.sleep(delay)
+            print(f"Webhook delivery failed after {WEBHOOK_ATTEMPTS} attempts: {failure}")
+
+        threading.Thread(target=post, daemon=True).start()
+
+    def _handler(self):
+        node = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def _reply(self, status, payload):
+                data = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self):
+                url = urlparse(self.path)
+                self._reply(*node.handle("GET", url.path, parse_qs(url.query), {}))
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                body = json.loads(self.rfile.read(length) or b"{}")
+                url = urlparse(self.path)
+                self._reply(*node.handle("POST", url.path, parse_qs(url.query), body))
+
+        return Handler
+
+
+class SmtpSink:
+    """An SMTP server that accepts everything and remembers it by recipient."""
+
+    def __init__(self, port=0):
+        self.messages = defaultdict(list)
+        self.connections = 0
+        self._arrived = threading.Condition()
+        self.server = socketserver.ThreadingTCPServer(("127.0.0.1", port), self._handler())
+        self.server.daemon_threads = True
+        self.port = self.server.server_address[1]
+
+    def start(self):
+        threading.Thread(target=self.server.serve_forever, name="smtp-sink", daemon=True).start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def _deliver(self, recipients, raw):
+        message = email.message_from_string(raw)
+        parts = message.walk() if message.is_multipart() else [message]
+        body = "\n".join(
+            part.get_payload(decode=True).decode(part.get_content_charset() or "utf-8", errors="replace")
+            for part in parts if part.get_content_maintype() == "text"
+        )
+        with self._arrived:
+            for recipient in recipients:
+                self.messages[recipient.lower()].append(body)
+            self._arrived.notify_all()
+
+    def wait_for(self, recipient, pattern, timeout=30):
+        """Block until a message to ``recipient`` matches ``pattern``; return the first group."""
+        regex = re.compile(pattern)
+        deadline = time.monotonic() + timeout
+        with self._arrived:
+            while True:
+                for body in self.messages.get(recipient.lower(), []):
+                    match = regex.search(body)
+                    if match:
+                        return match.group(1)
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise TimeoutError(f"No email to {recipient} matching {pattern!r}")
+                self._arrived.wait(remaining)
+
+    def _handler(self):
+        sink = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                sink.connections += 1
+                reply = lambda line: self.wfile.write((line + "\r\n").encode())
+                reply("220 smtp-sink")
+                recipients, data = [], None
+                for raw in self.rfile:
+                    line = raw.decode(errors="replace").rstrip("\r\n")
+                    if data is not None:
+                        if line == ".":
+                            sink._deliver(recipients, "\n".join(data))
+                            recipients, data = [], None
+                            reply("250 OK")
+                        else:
+                            data.append(line[1:] if line.startswith("..") else line)
+                        continue
+                    command = line.upper()
+                    if command.startswith("EHLO"):
+                        reply("250-smtp-sink")
+                        reply("250 OK")
+                    elif command.startswith("RCPT TO:"):
+                        recipients.append(line[8:].strip().strip("<>"))
+                        reply("250 OK")
+                    elif command == "DATA":
+                        data = []
+                        reply("354 End data with <CR><LF>.<CR><LF>")
+                    elif command == "QUIT":
+                        reply("221 Bye")
+                        return
+                    else:
+                        reply("250 OK")
+
+        return Handler
+
+
+def parse_endpoint_values(pairs):
+    """Turn ["/mine=0.5", "/balance=0.01"] into {"/mine": 0.5, "/balance": 0.01}."""
+    values = {}
+    for pair in pairs or []:
+        endpoint, _, value = pair.partition("=")
+        values[endpoint] = float(value)
+    return values
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--node-port", type=int, default=8080)
+    parser.add_argument("--smtp-port", type=int, default=1025)
+    parser.add_argument("--latency", action="append", help="ENDPOINT=SECONDS (repeatable)")
+    parser.add_argument("--jitter", action="append", help="ENDPOINT=SECONDS (repeatable)")
+    parser.add_argument("--error-rate", action="append", help="ENDPOINT=0..1 (repeatable)")
+    parser.add_argument("--webhook-url", help="e.g. http://localhost:5500/node/events")
+    parser.add_argument("--webhook-secret", help="NODE_WEBHOOK_SECRET of the API")
+    args = parser.parse_args()
+
+    node = FakeNode(
+        args.node_port, parse_endpoint_values(args.latency), parse_endpoint_values(args.jitter), parse_endpoint_values(args.error_rate),
+        webhook_url=args.webhook_url, webhook_secret=args.webhook_secret,
+    ).start()
+    sink = SmtpSink(args.smtp_port).start()
+    print(f"Fake node on {node.url}, SMTP sink on 127.0.0.1:{sink.port}. Ctrl-C to stop.")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
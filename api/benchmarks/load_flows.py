@@ -0,0 +1,320 @@
+"""Drive full user flows against the API and report latency per route.
+
+Each virtual user runs register -> verify (link read from the SMTP sink)
+-> KYC upload -> login (polled until the KYC worker accepts the photo)
+-> create wallet -> balance -> send -> mine (and poll the job) -> wallet
+list. ``--concurrency`` users run at once. The API
+talks to a local fake node and SMTP sink (benchmarks/fakes.py) whose
+latency and error rates are configurable, so runs are reproducible and
+offline.
+
+By default the API is started in a subprocess against a fresh SQLite
+database, either on werkzeug's threaded server or under gunicorn with
+gunicorn.conf.py. Use ``--base-url`` to drive a server you started
+yourself, pointed at the fake ports (``--node-port``/``--smtp-port``) and
+with RATELIMIT_ENABLED=False and KYC_WORKERS of at least 1.
+
+    cd api && python benchmarks/load_flows.py --users 50 --concurrency 10
+    python benchmarks/load_flows.py --server gunicorn --latency /mine=0.2 --error-rate /transaction=0.02 --output before.json
+
+Results are p50/p95/p99/mean/max latency in ms, error counts and requests
+per second for each route, plus end-to-end flow and mining-job timings.
+"""
+import argparse
+import json
+import os
+import shutil
+import socket
+import struct
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+import zlib
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+API_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from fakes import FakeNode, SmtpSink, parse_endpoint_values
+
+
+def png_chunk(kind, data):
+    return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+
+
+# A valid 1x1 PNG, so KYC photos pass the worker's validation
+PNG = (
+    b"\x89PNG\r\n\x1a\n"
+    + png_chunk(b"IHDR", struct.pack(">IIBBBBB", 1, 1, 8, 2, 0, 0, 0))
+    + png_chunk(b"IDAT", zlib.compress(b"\x00\xff\xff\xff"))
+    + png_chunk(b"IEND", b"")
+)
+PASSWORD = "correct horse battery staple"
+
+
+class FlowError(Exception):
+    pass
+
+
+class Recorder:
+    def __init__(self):
+        self.samples = defaultdict(list)
+        self.errors = defaultdict(int)
+        self._lock = threading.Lock()
+
+    def add(self, name, seconds, ok=True):
+        with self._lock:
+            self.samples[name].append(seconds)
+            if not ok:
+                self.errors[name] += 1
+
+    def summary(self, elapsed):
+        return {name: summarize(values, self.errors[name], elapsed) for name, values in sorted(self.samples.items())}
+
+
+def percentile(values, pct):
+    return values[min(len(values) - 1, max(0, int(round(pct / 100 * len(values) + 0.5)) - 1))]
+
+
+def summarize(values, errors, elapsed):
+    values = sorted(values)
+    ms = lambda seconds: round(seconds * 1000, 2)
+    return {
+        "count": len(values),
+        "errors": errors,
+        "p50_ms": ms(percentile(values, 50)),
+        "p95_ms": ms(percentile(values, 95)),
+        "p99_ms": ms(percentile(values, 99)),
+        "mean_ms": ms(sum(values) / len(values)),
+        "max_ms": ms(values[-1]),
+        "rps": round(len(values) / elapsed, 2) if elapsed else None,
+    }
+
+
+class User:
+    def __init__(self, base_url, recorder, sink, email, recipient, mail_timeout):
+        self.base_url = base_url
+        self.recorder = recorder
+        self.sink = sink
+        self.email = email
+        self.recipient = recipient
+        self.mail_timeout = mail_timeout
+        self.session = requests.Session()
+
+    def call(self, name, method, path, expect, **kwargs):
+        started = time.perf_counter()
+        try:
+            response = self.session.request(method, self.base_url + path, timeout=60, **kwargs)
+        except requests.RequestException as e:
+            self.recorder.add(name, time.perf_counter() - started, ok=False)
+            raise FlowError(f"{name}: {e}")
+        ok = response.status_code == expect
+        self.recorder.add(name, time.perf_counter() - started, ok)
+        if not ok:
+            raise FlowError(f"{name}: HTTP {response.status_code} {response.text[:200]}")
+        return response.json()
+
+    def run(self):
+        self.call("POST /auth/register", "POST", "/auth/register", 201, json={"email": self.email, "password": PASSWORD})
+        token = self.sink.wait_for(self.email, r"verify-email\?token=([0-9a-f-]{36})", self.mail_timeout)
+        verified = self.call("GET /auth/verify", "GET", "/auth/verify", 200, params={"token": token})
+        user_id = verified["user_id"]
+        self.call(
+            "POST /auth/kyc/<user_id>", "POST", f"/auth/kyc/{user_id}", 200,
+            data={"kyc_token": verified["kyc_token"], "form_data": "{}"},
+            files={"photo_path": ("photo.png", PNG, "image/png")},
+        )
+        # The KYC worker accepts the photo in the background; until it has,
+        # login answers kyc_required
+        submitted = time.perf_counter()
+        while True:
+            login = self.call("POST /auth/login", "POST", "/auth/login", 200, json={"email": self.email, "password": PASSWORD})
+            if "access_token" in login or time.perf_counter() - submitted > self.mail_timeout:
+                break
+            time.sleep(0.05)
+        self.recorder.add("KYC review (submitted to accepted)", time.perf_counter() - submitted, "access_token" in login)
+        if "access_token" not in login:
+            raise FlowError(f"POST /auth/login: no access token ({login})")
+        self.session.headers["Authorization"] = f"Bearer {login['access_token']}"
+
+        wallet = self.call("POST /wallet/create", "POST", "/wallet/create", 201, json={"email": self.email})
+        address = wallet["address"]
+        self.call("GET /wallet/balance/<address>", "GET", f"/wallet/balance/{address}", 200)
+        # The recipient may not have registered yet, which exercises the escrow path
+        sent = self.session.post(self.base_url + "/transaction/send", json={"sender_email": self.email, "recipient_email": self.recipient, "amount": 1}, timeout=60)
+        self.recorder.add("POST /transaction/send", sent.elapsed.total_seconds(), sent.status_code in (200, 201))
+
+        queued = time.perf_counter()
+        job = self.call("POST /mining/mine", "POST", "/mining/mine", 202, json={"wallet_address": address, "stake": 1})
+        while True:
+            status = self.call("GET /mining/jobs/<id>", "GET", f"/mining/jobs/{job['job_id']}", 200)
+            if status["status"] in ("Succeeded", "Failed"):
+                break
+            time.sleep(0.05)
+        self.recorder.add("mining job (queued to finished)", time.perf_counter() - queued, status["status"] == "Succeeded")
+        self.call("GET /wallet/list", "GET", "/wallet/list", 200)
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def serve(port):
+    """Entry point for the werkzeug server subprocess."""
+    sys.path.insert(0, API_DIR)
+    from werkzeug.serving import run_simple
+    from app import create_app
+    from app.workers import start_all
+
+    app = create_app()
+    start_all()
+    run_simple("127.0.0.1", port, app, threaded=True)
+
+
+def start_server(args, node, sink, workdir):
+    port = free_port()
+    env = dict(
+        os.environ,
+        DB_URI=args.db_uri or f"sqlite:///{os.path.join(workdir, 'bench.db')}",
+        NILOTIC_API=node.url,
+        MAIL_SERVER="127.0.0.1",
+        MAIL_PORT=str(sink.port),
+        MAIL_USE_TLS="False",
+        MAIL_USE_SSL="False",
+        MAIL_QUEUE_POLL_INTERVAL="0.5",
+        RATELIMIT_ENABLED="False",
+        SIMULATE_MINING="False",
+        KYC_STORAGE_DIR=os.path.join(workdir, "kyc"),
+        APP_HOST="127.0.0.1",
+        APP_PORT=str(port),
+        FLASK_DEBUG="False",
+    )
+    subprocess.run([sys.executable, "-m", "flask", "--app", "app:create_app", "db", "upgrade"], cwd=API_DIR, env=env, check=True, capture_output=True)
+    if args.server == "gunicorn":
+        command = [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "wsgi:app"]
+        env.setdefault("GUNICORN_WORKERS", str(args.workers))
+        env["GUNICORN_ACCESS_LOG"] = ""
+    else:
+        command = [sys.executable, os.path.abspath(__file__), "--serve", str(port)]
+    process = subprocess.Popen(command, cwd=API_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    base_url = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            if requests.get(base_url + "/readyz", timeout=1).status_code == 200:
+                return process, base_url
+        except requests.RequestException:
+            pass
+        if process.poll() is not None:
+            break
+        time.sleep(0.2)
+    process.terminate()
+    raise SystemExit("The API did not become ready")
+
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=API_DIR, capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=20, help="flows to run")
+    parser.add_argument("--concurrency", type=int, default=5, help="flows running at once")
+    parser.add_argument("--server", choices=["werkzeug", "gunicorn"], default="werkzeug")
+    parser.add_argument("--workers", type=int, default=2, help="gunicorn workers (unless GUNICORN_WORKERS is set)")
+    parser.add_argument("--base-url", help="drive an already running API instead of starting one")
+    parser.add_argument("--db-uri", help="database for the started API (default: a throwaway SQLite file)")
+    parser.add_argument("--node-port", type=int, default=0)
+    parser.add_argument("--smtp-port", type=int, default=0)
+    parser.add_argument("--latency", action="append", help="fake node ENDPOINT=SECONDS (repeatable)")
+    parser.add_argument("--jitter", action="append", help="fake node ENDPOINT=SECONDS (repeatable)")
+    parser.add_argument("--error-rate", action="append", help="fake node ENDPOINT=0..1 (repeatable)")
+    parser.add_argument("--mail-timeout", type=float, default=30, help="seconds to wait for a verification email")
+    parser.add_argument("--output", help="also write the JSON results to this file")
+    parser.add_argument("--json", action="store_true", help="print machine-readable results")
+    parser.add_argument("--serve", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(args.serve)
+        return
+
+    latency, jitter, error_rate = (parse_endpoint_values(v) for v in (args.latency, args.jitter, args.error_rate))
+    node = FakeNode(args.node_port, latency, jitter, error_rate).start()
+    sink = SmtpSink(args.smtp_port).start()
+    workdir = tempfile.mkdtemp(prefix="nilotic-bench-")
+    process = None
+    try:
+        if args.base_url:
+            base_url = args.base_url.rstrip("/")
+        else:
+            process, base_url = start_server(args, node, sink, workdir)
+
+        run_id = uuid.uuid4().hex[:8]
+        emails = [f"bench-{run_id}-{i}@example.com" for i in range(args.users)]
+        recorder = Recorder()
+        failures = []
+
+        def flow(i):
+            started = time.perf_counter()
+            try:
+                User(base_url, recorder, sink, emails[i], emails[(i + 1) % len(emails)], args.mail_timeout).run()
+                recorder.add("flow (end to end)", time.perf_counter() - started)
+            except (FlowError, TimeoutError, KeyError, ValueError) as e:
+                recorder.add("flow (end to end)", time.perf_counter() - started, ok=False)
+                failures.append(str(e))
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+            list(pool.map(flow, range(args.users)))
+        elapsed = time.perf_counter() - started
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait(timeout=30)
+        node.stop()
+        sink.stop()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    results = {
+        "revision": git_revision(),
+        "server": "external" if args.base_url else args.server,
+        "users": args.users,
+        "concurrency": args.concurrency,
+        "node": {"latency": latency, "jitter": jitter, "error_rate": error_rate},
+        "seconds": round(elapsed, 3),
+        "flows_completed": args.users - len(failures),
+        "flows_failed": len(failures),
+        "flows_per_second": round((args.users - len(failures)) / elapsed, 3),
+        "routes": recorder.summary(elapsed),
+        "node_calls": dict(node.calls),
+        "smtp_connections": sink.connections,
+        "failures": failures[:20],
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"{'route':<34} {'count':>6} {'err':>4} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'rps':>8}")
+    for name, row in results["routes"].items():
+        print(f"{name:<34} {row['count']:>6} {row['errors']:>4} {row['p50_ms']:>9} {row['p95_ms']:>9} {row['p99_ms']:>9} {row['rps']:>8}")
+    print(f"{results['flows_completed']}/{args.users} flows completed in {results['seconds']}s ({results['flows_per_second']} flows/s)")
+    for failure in results["failures"]:
+        print(f"  failed: {failure}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""Logins per second for each password hashing setting.
+
+Each "login" is one ``PasswordHasher.verify`` call, the CPU-heavy part of
+/auth/login. Calls are issued from ``--concurrency`` threads to mimic a
+threaded worker serving a login peak.
+
+    cd api && python benchmarks/password_hashing.py
+    python benchmarks/password_hashing.py --method pbkdf2:sha256:600000 --method scrypt:32768:8:1 --json
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.passwords import PasswordHasher
+
+DEFAULT_METHODS = ["pbkdf2:sha256:260000", "pbkdf2:sha256:600000", "scrypt:32768:8:1"]
+DEFAULT_EXECUTORS = ["inline", "thread", "process"]
+
+
+def run(method, executor, workers, concurrency, logins):
+    hasher = PasswordHasher(method, executor=executor, workers=workers)
+    try:
+        pwhash = hasher.hash("correct horse battery staple")
+        hasher.warm_up()
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            ok = sum(pool.map(lambda _: hasher.verify(pwhash, "correct horse battery staple"), range(logins)))
+        elapsed = time.perf_counter() - started
+    finally:
+        hasher.shutdown()
+    assert ok == logins
+    return {
+        "method": method,
+        "executor": executor,
+        "workers": workers,
+        "concurrency": concurrency,
+        "logins": logins,
+        "seconds": round(elapsed, 4),
+        "logins_per_second": round(logins / elapsed, 2),
+        "ms_per_login": round(elapsed * 1000 / logins, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--method", action="append", help="werkzeug hash method (repeatable)")
+    parser.add_argument("--executor", action="append", choices=DEFAULT_EXECUTORS, help="repeatable")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 2)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--logins", type=int, default=40)
+    parser.add_argument("--json", action="store_true", help="print machine-readable results")
+    args = parser.parse_args()
+
+    results = [
+        run(method, executor, args.workers, args.concurrency, args.logins)
+        for method in args.method or DEFAULT_METHODS
+        for executor in args.executor or DEFAULT_EXECUTORS
+    ]
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"{'method':<24} {'executor':<8} {'logins/s':>10} {'ms/login':>10}")
+    for result in results:
+        print(f"{result['method']:<24} {result['executor']:<8} {result['logins_per_second']:>10} {result['ms_per_login']:>10}")
+
+
+if __name__ == "__main__":
+    main()
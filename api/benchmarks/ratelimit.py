@@ -0,0 +1,83 @@
+"""Per-request overhead of the auth rate limiter.
+
+Times two things: a bare ``limiter.check`` call against the in-memory store
+(spread over ``--keys`` distinct clients), and a POST through the Flask test
+client to a trivial view with and without ``@limiter.limit``. The
+difference between the two view timings is what the limiter adds per
+request.
+
+    cd api && python benchmarks/ratelimit.py
+    python benchmarks/ratelimit.py --requests 20000 --storage redis://localhost:6379/0 --json
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask, jsonify
+
+from app.ratelimit import RateLimiter, make_store
+
+
+def time_calls(fn, count):
+    started = time.perf_counter()
+    for i in range(count):
+        fn(i)
+    return (time.perf_counter() - started) / count * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--keys", type=int, default=1000, help="distinct client IPs/emails")
+    parser.add_argument("--storage", default="memory", help="memory or a redis:// URL")
+    parser.add_argument("--json", action="store_true", help="print machine-readable results")
+    args = parser.parse_args()
+
+    limiter = RateLimiter()
+    limiter.configure(True, make_store(args.storage))
+    rate = "1000000/second"  # Never limit; measure the bookkeeping only
+
+    check_us = time_calls(lambda i: limiter.check(f"bench:ip:{i % args.keys}", rate), args.requests)
+
+    app = Flask(__name__)
+    app.config.update(RATELIMIT_BENCH_PER_IP=rate, RATELIMIT_BENCH_PER_EMAIL=rate)
+
+    @app.route("/plain", methods=["POST"])
+    def plain():
+        return jsonify({"ok": True})
+
+    @app.route("/limited", methods=["POST"])
+    @limiter.limit("bench")
+    def limited():
+        return jsonify({"ok": True})
+
+    client = app.test_client()
+    body = lambda i: {"json": {"email": f"user{i % args.keys}@example.com"}, "environ_base": {"REMOTE_ADDR": f"10.0.{i % args.keys // 256}.{i % 256}"}}
+    plain_us = time_calls(lambda i: client.post("/plain", **body(i)), args.requests)
+    limited_us = time_calls(lambda i: client.post("/limited", **body(i)), args.requests)
+
+    results = {
+        "storage": args.storage,
+        "requests": args.requests,
+        "keys": args.keys,
+        "check_us": round(check_us, 2),
+        "plain_request_us": round(plain_us, 2),
+        "limited_request_us": round(limited_us, 2),
+        "overhead_us": round(limited_us - plain_us, 2),
+        "overhead_pct": round((limited_us - plain_us) / plain_us * 100, 2),
+    }
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"limiter.check:          {results['check_us']} us")
+    print(f"request without limit:  {results['plain_request_us']} us")
+    print(f"request with limit:     {results['limited_request_us']} us")
+    print(f"overhead per request:   {results['overhead_us']} us ({results['overhead_pct']}%)")
+
+
+if __name__ == "__main__":
+    main()
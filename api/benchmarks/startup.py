@@ -0,0 +1,106 @@
+"""Cold-start time of the API: imports, create_app, and the first request.
+
+Each run is a fresh interpreter (like a new autoscaled worker), timed in
+three phases: ``import app``, ``create_app()``, and the first request
+through the test client (``--path``, /readyz by default, which opens the
+first database connection). The run also counts the database connections
+opened before that request, which should stay at zero.
+
+    cd api && python benchmarks/startup.py
+    python benchmarks/startup.py --runs 20 --path /healthz --json
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+API_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def child(path):
+    started = time.perf_counter()
+    sys.path.insert(0, API_DIR)
+    from sqlalchemy import event
+    from sqlalchemy.engine import Engine
+
+    connections = []
+    event.listen(Engine, "connect", lambda *args: connections.append(time.perf_counter()))
+
+    import app as package
+    imported = time.perf_counter()
+    flask_app = package.create_app()
+    created = time.perf_counter()
+    connections_at_start = len(connections)
+    status = flask_app.test_client().get(path).status_code
+    served = time.perf_counter()
+    print(json.dumps({
+        "import_ms": (imported - started) * 1000,
+        "create_app_ms": (created - imported) * 1000,
+        "first_request_ms": (served - created) * 1000,
+        "total_ms": (served - started) * 1000,
+        "db_connections_before_first_request": connections_at_start,
+        "status": status,
+    }))
+
+
+def run(path, db_uri):
+    env = dict(os.environ, DB_URI=db_uri)
+    output = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "--child", "--path", path],
+        env=env, cwd=API_DIR, capture_output=True, text=True, check=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def summarize(samples, key):
+    values = sorted(sample[key] for sample in samples)
+    return {
+        "median": round(statistics.median(values), 2),
+        "p95": round(values[min(len(values) - 1, int(len(values) * 0.95))], 2),
+        "min": round(values[0], 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--path", default="/readyz", help="first request to serve")
+    parser.add_argument("--db-uri", help="database to start against (default: a throwaway SQLite file)")
+    parser.add_argument("--json", action="store_true", help="print machine-readable results")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(args.path)
+        return
+
+    handle, db_path = tempfile.mkstemp(suffix=".db")
+    os.close(handle)
+    try:
+        samples = [run(args.path, args.db_uri or f"sqlite:///{db_path}") for _ in range(args.runs)]
+    finally:
+        os.remove(db_path)
+
+    results = {
+        "runs": args.runs,
+        "path": args.path,
+        "status": samples[-1]["status"],
+        "db_connections_before_first_request": max(s["db_connections_before_first_request"] for s in samples),
+    }
+    for key in ("import_ms", "create_app_ms", "first_request_ms", "total_ms"):
+        results[key] = summarize(samples, key)
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"{'phase':<18} {'median ms':>10} {'p95 ms':>10} {'min ms':>10}")
+    for key in ("import_ms", "create_app_ms", "first_request_ms", "total_ms"):
+        print(f"{key[:-3]:<18} {results[key]['median']:>10} {results[key]['p95']:>10} {results[key]['min']:>10}")
+    print(f"database connections before the first request: {results['db_connections_before_first_request']}")
+
+
+if __name__ == "__main__":
+    main()
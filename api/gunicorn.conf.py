@@ -0,0 +1,75 @@
+"""Gunicorn settings for serving the API in production.
+
+    cd api && gunicorn -c gunicorn.conf.py wsgi:app
+
+Every setting can be overridden from the environment (see .example.env).
+The app is imported once in the master and forked into the workers. Each
+worker starts its own background threads (email queue, escrow sweeper) and
+drains them on shutdown. Pooled resources (database connections, the node
+HTTP session, the password hashing pool) are rebuilt per process.
+
+Most request time is spent waiting on NILOTIC_API and SMTP, so the default
+worker class is "gthread". GUNICORN_WORKER_CLASS=gevent (requires
+``pip install gevent``) serves many slow upstream calls per worker instead.
+Keep PASSWORD_HASH_EXECUTOR=process with gevent, so hashing never blocks
+the event loop.
+"""
+import multiprocessing
+import os
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+worker_class = os.getenv("GUNICORN_WORKER_CLASS", "gthread")
+if worker_class == "gevent":
+    # Patch before the app (and requests/ssl) is imported by preload_app.
+    from gevent import monkey
+    monkey.patch_all()
+
+bind = f"{os.getenv('APP_HOST', '0.0.0.0')}:{os.getenv('APP_PORT', '5500')}"
+workers = int(os.getenv("GUNICORN_WORKERS", multiprocessing.cpu_count() * 2 + 1))
+threads = int(os.getenv("GUNICORN_THREADS", 4))
+worker_connections = int(os.getenv("GUNICORN_WORKER_CONNECTIONS", 1000))  # gevent only
+preload_app = os.getenv("GUNICORN_PRELOAD", "True") == "True"
+timeout = int(os.getenv("GUNICORN_TIMEOUT", 60))
+graceful_timeout = int(os.getenv("GUNICORN_GRACEFUL_TIMEOUT", 30))
+keepalive = int(os.getenv("GUNICORN_KEEPALIVE", 5))
+max_requests = int(os.getenv("GUNICORN_MAX_REQUESTS", 0))
+max_requests_jitter = int(os.getenv("GUNICORN_MAX_REQUESTS_JITTER", 0))
+accesslog = os.getenv("GUNICORN_ACCESS_LOG", "-") or None  # Empty disables the access log
+# The default format with the path but not the query string (%(U)s instead of
+# %(r)s), which can carry tokens such as GET /wallet/events?jwt=...
+access_log_format = '%(h)s %(l)s %(u)s %(t)s "%(m)s %(U)s %(H)s" %(s)s %(b)s "%(f)s" "%(a)s"'
+
+
+def post_fork(server, worker):
+    # Connections opened in the master (e.g. by a preload hook) must not be
+    # shared with the children; drop them without closing the master's sockets.
+    from app import db
+    with server.app.wsgi().app_context():
+        for engine in db.engines.values():  # Primary and any replicas
+            engine.dispose(close=False)
+
+
+def post_worker_init(worker):
+    # Runs after the worker class has set up (and, for gevent, patched) the
+    # process, so background threads are created the same way request ones are.
+    from app.workers import start_all
+    start_all()
+
+
+def worker_exit(server, worker):
+    from app import blockchain
+    from app.passwords import password_hasher
+    from app.workers import stop_all
+    stop_all(graceful_timeout)
+    blockchain.close_session()
+    password_hasher.shutdown()
+
+
+def child_exit(server, worker):
+    # Drop the dead worker's live metric files (PROMETHEUS_MULTIPROC_DIR mode)
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+        multiprocess.mark_process_dead(worker.pid)
@@ -0,0 +1,41 @@
+"""hot lookup indexes
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18 09:20:05.604377
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '0003'
+down_revision = '0002'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # The Genesis wallet lookup (user_id, name) is already served by the
+    # unique_user_wallet_name constraint created in 0001.
+    with op.batch_alter_table('escrow', schema=None) as batch_op:
+        batch_op.create_index('ix_escrow_recipient_email_status', ['recipient_email', 'status'], unique=False)
+        batch_op.create_index('ix_escrow_status_expires_at', ['status', 'expires_at'], unique=False)
+
+    with op.batch_alter_table('kyc', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_kyc_user_id'), ['user_id'], unique=False)
+
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_user_reset_token'), ['reset_token'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_user_reset_token'))
+
+    with op.batch_alter_table('kyc', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_kyc_user_id'))
+
+    with op.batch_alter_table('escrow', schema=None) as batch_op:
+        batch_op.drop_index('ix_escrow_status_expires_at')
+        batch_op.drop_index('ix_escrow_recipient_email_status')
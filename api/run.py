@@ -1,4 +1,5 @@
 from app import create_app
+from app.workers import start_all
 from dotenv import load_dotenv
 import os
 
@@ -9,4 +10,6 @@ app = create_app()
 if __name__ == "__main__":
     host = app.config["APP_HOST"]  # Use config from create_app
     port = app.config["APP_PORT"]  # Use config from create_app
-    app.run(debug=True, host=host, port=port)
\ No newline at end of file
+    start_all()
+    # Development server only; use `gunicorn -c gunicorn.conf.py wsgi:app` in production
+    app.run(debug=os.getenv("FLASK_DEBUG", "True") == "True", host=host, port=port)
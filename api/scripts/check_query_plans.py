@@ -0,0 +1,117 @@
+"""Fail if any hot route query does a full table scan on SQLite.
+
+Builds a throwaway SQLite database from the Alembic migration history (not
+``db.create_all()``), so a missing migration fails the check too, then runs
+``EXPLAIN QUERY PLAN`` on the queries the routes issue.
+
+    cd api && python scripts/check_query_plans.py
+
+Add an entry to ``QUERIES`` whenever a route gains a new lookup.
+"""
+import os
+import sys
+import tempfile
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import text, tuple_, update
+from sqlalchemy.dialects import sqlite
+
+
+def build_queries():
+    from app import db
+    from app.models.user import User
+    from app.models.wallet import Wallet
+    from app.models.kyc import KYC
+    from app.models.escrow import Escrow
+    from app.models.outbound_email import OutboundEmail
+    from app.models.ledger import LedgerEntry
+    from app.models.mining_job import MiningJob
+    from app.models.node_event import NodeCall, NodeEvent
+
+    now = datetime(2025, 1, 1)
+    return [
+        ("user by email", User.query.filter_by(email="a@example.com")),
+        ("user by verification token", User.query.filter_by(verification_token="t")),
+        ("user by reset token", User.query.filter_by(reset_token="t")),
+        ("user by id", User.query.filter_by(id=1)),
+        ("principal", db.session.query(User.id, Wallet.id).outerjoin(Wallet, (Wallet.user_id == User.id) & (Wallet.name == "Genesis Wallet")).filter(User.id == 1)),
+        ("recipient by email", db.session.query(User, Wallet).outerjoin(Wallet, (Wallet.user_id == User.id) & (Wallet.name == "Genesis Wallet")).filter(User.email == "a@example.com")),
+        ("wallet by address", Wallet.query.filter_by(address="addr")),
+        ("wallet by address and owner", Wallet.query.filter_by(address="addr", user_id=1)),
+        ("genesis wallet", Wallet.query.filter_by(user_id=1, name="Genesis Wallet")),
+        ("wallet sync keyset page", db.session.query(Wallet.id, Wallet.address).filter(Wallet.id > 10).order_by(Wallet.id).limit(500)),
+        ("kyc by user", KYC.query.filter_by(user_id=1)),
+        ("pending kyc", db.session.query(KYC, User).join(User, User.id == KYC.user_id).filter(KYC.status == "Pending").order_by(KYC.id).limit(20)),
+        ("escrow by id", Escrow.query.filter_by(id=1)),
+        ("escrows by recipient", Escrow.query.filter_by(recipient_email="a@example.com", status="Pending")),
+        ("expired escrows", db.session.query(Escrow.id).filter(Escrow.status == "Pending", Escrow.expires_at < now).order_by(Escrow.expires_at, Escrow.id).limit(500)),
+        ("claimable escrows", db.session.query(Escrow.id, Escrow.sender_id, Escrow.amount, Escrow.otp).filter(Escrow.recipient_email == "a@example.com", Escrow.status == "Pending", Escrow.expires_at >= now).order_by(Escrow.id).limit(1001)),
+        ("escrow sender wallets", db.session.query(Wallet.user_id, Wallet.id, Wallet.address).filter(Wallet.user_id.in_([1, 2]), Wallet.name == "Genesis Wallet")),
+        ("pending outgoing escrow", db.session.query(Escrow.amount).filter(Escrow.sender_id == 1, Escrow.status == "Pending")),
+        ("user wallets", Wallet.query.filter_by(user_id=1).order_by(Wallet.id)),
+        ("escrow refund", update(Wallet).where(Wallet.user_id == 1, Wallet.name == "Genesis Wallet").values(balance=Wallet.balance + 1)),
+        ("due emails", db.session.query(OutboundEmail.id).filter(OutboundEmail.status == "Pending", OutboundEmail.next_attempt_at <= now).order_by(OutboundEmail.next_attempt_at, OutboundEmail.id).limit(50)),
+        ("leased emails", OutboundEmail.query.filter_by(claim_token="t")),
+        ("due mining jobs", db.session.query(MiningJob.id).filter(MiningJob.status.in_(["Queued", "Running"]), MiningJob.next_attempt_at <= now).order_by(MiningJob.next_attempt_at, MiningJob.id).limit(5)),
+        ("mining job by owner", MiningJob.query.filter_by(id=1, user_id=1)),
+        ("recent activity", db.session.query(LedgerEntry).filter(LedgerEntry.user_id == 1).order_by(LedgerEntry.created_at.desc(), LedgerEntry.id.desc()).limit(11)),
+        ("seen node events", db.session.query(NodeEvent.event_id).filter(NodeEvent.event_id.in_(["e1", "e2"]))),
+        ("node event wallets", db.session.query(Wallet.id, Wallet.user_id, Wallet.address).filter(Wallet.address.in_(["a", "b"]))),
+        ("node event changes already booked", db.session.query(LedgerEntry.wallet_id, LedgerEntry.tx_id).filter(LedgerEntry.tx_id.in_(["t1", "t2"]))),
+        ("node calls in flight", db.session.query(NodeCall.wallet_id).filter(NodeCall.wallet_id.in_([1, 2]))),
+        ("node call markers by key", db.session.query(NodeCall.id).filter(NodeCall.key == "k")),
+        ("mining block already booked", db.session.query(LedgerEntry.id).filter_by(wallet_id=1, tx_id="h")),
+        ("wallet history page", db.session.query(LedgerEntry).filter(LedgerEntry.wallet_id == 1, tuple_(LedgerEntry.created_at, LedgerEntry.id) < tuple_(now, 100)).order_by(LedgerEntry.created_at.desc(), LedgerEntry.id.desc()).limit(51)),
+    ]
+
+
+def compile_sql(query):
+    statement = getattr(query, "statement", query)
+    return str(statement.compile(dialect=sqlite.dialect(), compile_kwargs={"literal_binds": True}))
+
+
+def full_scans(plan_rows):
+    """Return plan details that scan a whole table rather than searching an index."""
+    scans = []
+    for row in plan_rows:
+        detail = row[-1]
+        if detail.startswith("SCAN ") and "USING INTEGER PRIMARY KEY" not in detail and "SUBQUERY" not in detail:
+            scans.append(detail)
+    return scans
+
+
+def main():
+    handle, path = tempfile.mkstemp(suffix=".db")
+    os.close(handle)
+    os.environ["DB_URI"] = f"sqlite:///{path}"
+
+    from flask_migrate import upgrade
+    from app import create_app, db
+
+    app = create_app()
+    failures = 0
+    try:
+        with app.app_context():
+            upgrade(directory=os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "migrations"))
+            for name, query in build_queries():
+                sql = compile_sql(query)
+                plan = db.session.execute(text(f"EXPLAIN QUERY PLAN {sql}")).fetchall()
+                scans = full_scans(plan)
+                status = "FAIL" if scans else "ok"
+                print(f"[{status}] {name}: " + "; ".join(row[-1] for row in plan))
+                failures += bool(scans)
+            db.session.remove()
+    finally:
+        os.remove(path)
+
+    if failures:
+        print(f"{failures} queries do a full table scan.")
+        return 1
+    print("All checked queries use an index.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
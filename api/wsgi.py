@@ -0,0 +1,10 @@
+"""WSGI entry point for production servers.
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+"""
+from dotenv import load_dotenv
+from app import create_app
+
+load_dotenv()
+
+app = create_app()
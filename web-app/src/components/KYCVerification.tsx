@@ -53,8 +53,8 @@ const KYCVerification: React.FC = () => {
       });
       setMessage(data.message || "KYC submitted successfully!");
       setWalletAddress(data.wallet?.address || null); // Store wallet address from response
-      toast.success("KYC completed! Your Genesis Wallet is ready.");
-      setTimeout(() => navigate("/wallet"), 3000); // Redirect to /wallet after 3s
+      // No redirect: the user can only log in once the KYC worker accepts the photo
+      toast.success("KYC submitted! Your photo is being reviewed.");
     } catch (err: any) {
       console.error("KYC submission error:", err.response || err);
       const errorMsg = err.response?.data?.error || "KYC submission failed";
@@ -86,6 +86,16 @@ const KYCVerification: React.FC = () => {
         {message ? (
           <div className="text-center space-y-4">
             <p className="text-green-600 dark:text-green-400">{message}</p>
+            <p className="text-sm text-gray-500 dark:text-gray-400">
+              Your photo is being reviewed. Log in once it has been accepted; we will email you if it needs to be submitted again.
+            </p>
+            <button
+              type="button"
+              onClick={() => navigate("/login")}
+              className="text-blue-600 hover:underline dark:text-teal-400"
+            >
+              Back to login
+            </button>
             {walletAddress && (
               <div className="bg-gray-50 dark:bg-gray-800 p-4 rounded-lg">
                 <p className="text-sm text-gray-700 dark:text-gray-300">
@@ -94,9 +104,6 @@ const KYCVerification: React.FC = () => {
                 <p className="text-blue-600 dark:text-teal-400 font-mono break-all">
                   {walletAddress}
                 </p>
-                <p className="text-sm text-gray-500 dark:text-gray-400 mt-2">
-                  Redirecting to your wallet in a moment...
-                </p>
               </div>
             )}
           </div>
@@ -1,7 +1,7 @@
 // src/pages/Wallet.tsx
 import { useState, useEffect } from "react";
 import { useAuth } from "../context/AuthContext";
-import api from "../services/api"; // Ensure this is your axios instance with token handling
+import api, { subscribeToWalletEvents } from "../services/api"; // Ensure this is your axios instance with token handling
 
 const Wallet: React.FC = () => {
   const { token, user } = useAuth();
@@ -28,6 +28,16 @@ const Wallet: React.FC = () => {
     fetchWallets();
   }, [token, user]);
 
+  // Apply pushed balance updates instead of re-polling
+  useEffect(() => {
+    if (!token) return;
+    return subscribeToWalletEvents((update) =>
+      setWallets((prev) =>
+        prev.map((w) => (w.address === update.address ? { ...w, balance: update.balance, stake: update.stake } : w))
+      )
+    );
+  }, [token]);
+
   // Handle wallet creation
   const handleCreateWallet = async (e: React.FormEvent) => {
     e.preventDefault();
@@ -68,6 +68,47 @@ export const getWalletBalance = async (address: string) => {
   return response.data;
 };
 
+export interface WalletUpdate {
+  address: string;
+  balance: number;
+  stake: number;
+  balance_delta: number;
+  stake_delta: number;
+}
+
+// Live balance updates over Server-Sent Events; returns a function that closes the stream.
+// EventSource cannot send headers, so the token goes in the query string.
+export const subscribeToWalletEvents = (onUpdate: (update: WalletUpdate) => void) => {
+  let source: EventSource | null = null;
+  let retry: ReturnType<typeof setTimeout> | undefined;
+  let closed = false;
+  const reconnect = () => {
+    if (!closed) retry = setTimeout(connect, 3000);
+  };
+  // The URL gets a short-lived stream token, never the login token, and a new
+  // one on every reconnect (the server ends each stream after a few minutes)
+  const connect = async () => {
+    try {
+      const response = await api.post("/wallet/events/token");
+      if (closed) return;
+      source = new EventSource(`${api.defaults.baseURL}/wallet/events?jwt=${encodeURIComponent(response.data.token)}`);
+      source.addEventListener("balance", (event) => onUpdate(JSON.parse((event as MessageEvent).data)));
+      source.onerror = () => {
+        source?.close();
+        reconnect();
+      };
+    } catch {
+      reconnect();
+    }
+  };
+  connect();
+  return () => {
+    closed = true;
+    clearTimeout(retry);
+    source?.close();
+  };
+};
+
 // Transaction APIs
 export const sendTransaction = async (
   senderEmail: string,
@@ -88,6 +129,11 @@ export const mine = async (walletAddress: string, stakeAmount: number = 0) => {
     wallet_address: walletAddress,
     stake: stakeAmount,
   });
+  return response.data; // 202 with job_id; poll getMiningJob for the result
+};
+
+export const getMiningJob = async (jobId: number) => {
+  const response = await api.get(`/mining/jobs/${jobId}`);
   return response.data;
 };
 
@@ -97,6 +143,12 @@ export const claimEscrow = async (escrowId: number, otp: string, email: string)
   return response.data;
 };
 
+// Claims every pending escrow for the email; the OTP from any one of them works
+export const claimAllEscrows = async (otp: string, email: string) => {
+  const response = await api.post("/escrow/claim-all", { otp, email });
+  return response.data;
+};
+
 export const checkExpiredEscrows = async () => {
   const response = await api.get("/escrow/check-expired");
   return response.data;